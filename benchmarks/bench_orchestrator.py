@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""End-to-end orchestrator benchmark against the fake Ollama server.
+
+Runs `Orchestrator.run_goal` (optionally the async variant) and
+`run_auto_improvement` in a throwaway workspace with loop sleeps turned off,
+then reports steps/sec, time per phase from the trace spans, the share of
+step time not spent waiting on the model (orchestration overhead), and memory.
+
+Usage:
+    python benchmarks/bench_orchestrator.py --steps 10 --token-latency 0.005
+    python benchmarks/bench_orchestrator.py --async --json bench_output.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "benchmarks"))
+
+from fake_ollama import FakeOllamaServer, Responder  # noqa: E402
+
+SAMPLE_CODE = '''\
+def add(a, b):
+    # TODO: validate inputs
+    return a + b
+
+
+def sub(a, b):
+    # TODO: support vectors
+    return a - b
+'''
+
+
+def _make_workspace() -> Path:
+    ws = Path(tempfile.mkdtemp(prefix="rlm_bench_"))
+    (ws / "sample").mkdir()
+    (ws / "sample" / "calc.py").write_text(SAMPLE_CODE, encoding="utf-8")
+    return ws
+
+
+def _phase_table(stats: Dict[str, Dict[str, float]]) -> List[Dict[str, Any]]:
+    rows = []
+    for name, st in sorted(stats.items(), key=lambda kv: -kv[1]["total_s"]):
+        rows.append({
+            "span": name,
+            "count": int(st["count"]),
+            "total_s": round(st["total_s"], 4),
+            "mean_ms": round(1000 * st["total_s"] / st["count"], 2),
+        })
+    return rows
+
+
+def run_benchmark(steps: int, use_async: bool, token_latency: float, prompt_token_latency: float) -> Dict[str, Any]:
+    server = FakeOllamaServer(
+        responder=Responder(),
+        token_latency=token_latency,
+        prompt_token_latency=prompt_token_latency,
+    ).start()
+    # The cache would hide the model entirely; measure real round-trips.
+    os.environ["RLM_LLM_CACHE"] = "off"
+
+    import main  # noqa: E402  (after env is configured)
+    main.OLLAMA_URL = server.url
+
+    ws = _make_workspace()
+    old_cwd = os.getcwd()
+    os.chdir(ws)
+    try:
+        script = str(REPO_ROOT / "core" / "html_terminal.py")
+        cls = main.AsyncOrchestrator if use_async else main.Orchestrator
+        orch = cls(script, project_root=str(ws))
+        orch.max_steps = steps
+        orch.startup_delay = 0.2
+        orch.step_delay = 0
+        orch.wait_delay = 0
+        orch.confirm_timeout = 0
+        if use_async:
+            orch.quiet_period = 0.05
+            orch.wait_timeout = 0.05
+
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        goal = orch.run_goal("List the files in the workspace and count the Python ones.")
+        goal_s = time.perf_counter() - t0
+
+        t1 = time.perf_counter()
+        orch.run_auto_improvement()
+        improve_s = time.perf_counter() - t1
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        stats = orch.tracer.aggregate()
+    finally:
+        os.chdir(old_cwd)
+        server.stop()
+        shutil.rmtree(ws, ignore_errors=True)
+
+    step_s = stats.get("step", {}).get("total_s", 0.0)
+    llm_s = stats.get("llm", {}).get("total_s", 0.0)
+    sleep_s = stats.get("sleep", {}).get("total_s", 0.0) + stats.get("settle", {}).get("total_s", 0.0)
+    # Early stop can end the goal before max_steps; rates use the steps actually run
+    steps_run = goal["steps"]
+    return {
+        "mode": "async" if use_async else "sync",
+        "max_steps": steps,
+        "steps": steps_run,
+        "status": goal["status"],
+        "goal_s": round(goal_s, 3),
+        "steps_per_s": round(steps_run / goal_s, 3) if goal_s else 0.0,
+        "auto_improvement_s": round(improve_s, 3),
+        "llm_requests": server.responder.requests,
+        "llm_s": round(llm_s, 3),
+        "overhead_s": round(max(0.0, step_s - llm_s - sleep_s), 3),
+        "overhead_per_step_ms": round(1000 * max(0.0, step_s - llm_s - sleep_s) / steps_run, 2) if steps_run else 0.0,
+        "peak_traced_mb": round(peak / 2**20, 2),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "phases": _phase_table(stats),
+    }
+
+
+def _print_report(result: Dict[str, Any]) -> None:
+    print("\n=== Orchestrator benchmark ===")
+    for key in ("mode", "max_steps", "steps", "status", "goal_s", "steps_per_s", "auto_improvement_s", "llm_requests",
+                "llm_s", "overhead_s", "overhead_per_step_ms", "peak_traced_mb", "max_rss_mb"):
+        print(f"{key:<22} {result[key]}")
+    print(f"\n{'SPAN':<22} {'COUNT':>6} {'TOTAL s':>9} {'MEAN ms':>9}")
+    for row in result["phases"]:
+        print(f"{row['span'][:22]:<22} {row['count']:>6} {row['total_s']:>9.3f} {row['mean_ms']:>9.2f}")
+
+
+def main(argv: List[str]) -> int:
+    p = argparse.ArgumentParser(description="Benchmark the orchestrator loop against a fake model")
+    p.add_argument("--steps", type=int, default=10)
+    p.add_argument("--async", dest="use_async", action="store_true", help="Benchmark AsyncOrchestrator")
+    p.add_argument("--token-latency", type=float, default=0.0, help="Fake seconds per generated token")
+    p.add_argument("--prompt-token-latency", type=float, default=0.0, help="Fake seconds per prompt token")
+    p.add_argument("--json", dest="json_out", help="Also write results to this JSON file")
+    args = p.parse_args(argv)
+
+    result = run_benchmark(args.steps, args.use_async, args.token_latency, args.prompt_token_latency)
+    _print_report(result)
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(result, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""Stand-in Ollama server for benchmarks and offline runs.
+
+Implements `POST /api/chat` (streaming NDJSON and non-streaming) and
+`GET /api/tags`. Replies come from a scripted list (served in order) or from
+regex rules matched against the request's messages; the built-in rules know
+the repo's prompts (meta decision, subagent plan, history summary, goal
+assessment) and answer everything else like a CLI operator.
+
+`options.num_predict` and `options.stop` cut replies short like the real
+server. Latency is simulated per prompt token and per generated token, and the
+response carries Ollama's timing fields (`prompt_eval_count`, `eval_count`,
+`*_duration` in nanoseconds) so tracing sees realistic numbers.
+
+Usage:
+    python benchmarks/fake_ollama.py --port 11434 --token-latency 0.02
+    python benchmarks/fake_ollama.py --rules rules.json   # [{"match": "...", "response": ...}]
+    python benchmarks/fake_ollama.py --script replies.json  # ["first reply", {...}, ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+
+def _as_text(response: Any) -> str:
+    return response if isinstance(response, str) else json.dumps(response)
+
+
+DECISION_CLI = {
+    "analysis": "Shell prompt is waiting for a command.",
+    "system_prompt": "You are a CLI operator. Output ONLY the command.",
+    "user_prompt": "Type a command that makes progress on the goal.",
+    "expected_output_format": "shell command",
+    "confidence": "high",
+    "action": "cli_interaction",
+}
+DECISION_DELEGATE = {
+    "analysis": "Needs code analysis.",
+    "confidence": "medium",
+    "action": "delegate_to_subagent",
+    "subagent_task": "Count the Python files in the current directory.",
+}
+
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {"match": r"meta-prompting system", "response": [DECISION_CLI, DECISION_CLI, DECISION_DELEGATE]},
+    {
+        "match": r"Tier 2 Execution Subagent",
+        "response": [
+            {"thought": "Look around.", "python_code": "import os\nprint(len(os.listdir('.')))", "is_complete": False, "final_answer": None},
+            {"thought": "Task is done.", "python_code": None, "is_complete": True, "final_answer": "Counted the files."},
+        ],
+    },
+    {"match": r"running summary", "response": "Earlier steps ran shell commands; nothing failed."},
+    {"match": r"has been COMPLETED", "response": {"completed": False, "explanation": "Not yet.", "next_step": "Continue."}},
+    {"match": r".", "response": ["ls", "echo hello", "pwd"]},
+]
+
+
+class Responder:
+    """Picks a reply for a chat request from a script or from regex rules."""
+
+    def __init__(self, rules: Optional[List[Dict[str, Any]]] = None, script: Optional[List[Any]] = None):
+        self._lock = threading.Lock()
+        self._script = iter(script) if script is not None else None
+        self._last_scripted: Optional[str] = None
+        self._rules = []
+        for rule in rules if rules is not None else DEFAULT_RULES:
+            replies = rule["response"] if isinstance(rule["response"], list) else [rule["response"]]
+            self._rules.append((re.compile(rule["match"], re.DOTALL), itertools.cycle([_as_text(r) for r in replies])))
+        self.requests = 0
+
+    def reply(self, payload: Dict[str, Any]) -> str:
+        with self._lock:
+            self.requests += 1
+            if self._script is not None:
+                # Once the script runs out, keep repeating its last reply.
+                nxt = next(self._script, None)
+                if nxt is not None:
+                    self._last_scripted = _as_text(nxt)
+                return self._last_scripted or ""
+            text = "\n".join(str(m.get("content", "")) for m in payload.get("messages", []))
+            for pattern, replies in self._rules:
+                if pattern.search(text):
+                    return next(replies)
+        return ""
+
+
+def _tokens(text: str) -> List[str]:
+    return re.findall(r"\S+\s*|\s+", text) or [""]
+
+
+class FakeOllamaServer:
+    """Threaded HTTP server speaking enough of the Ollama API for the orchestrator."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        responder: Optional[Responder] = None,
+        token_latency: float = 0.0,
+        prompt_token_latency: float = 0.0,
+    ):
+        self.responder = responder or Responder()
+        self.token_latency = token_latency
+        self.prompt_token_latency = prompt_token_latency
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.0"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.rstrip("/") == "/api/tags":
+                    self._send_json({"models": [{"name": "fake"}]})
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                if self.path.rstrip("/") != "/api/chat":
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    self.send_error(400, "invalid JSON")
+                    return
+                server._handle_chat(self, payload)
+
+            def _send_json(self, obj):
+                body = json.dumps(obj).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/api/chat"
+
+    def _handle_chat(self, handler: BaseHTTPRequestHandler, payload: Dict[str, Any]) -> None:
+        t0 = time.perf_counter()
+        model = payload.get("model", "fake")
+        prompt_text = "".join(str(m.get("content", "")) for m in payload.get("messages", []))
+        prompt_tokens = max(1, len(prompt_text) // 4)
+        options = payload.get("options") or {}
+        num_predict = options.get("num_predict")
+
+        time.sleep(prompt_tokens * self.prompt_token_latency)
+        prompt_eval_ns = int((time.perf_counter() - t0) * 1e9)
+
+        reply = self.responder.reply(payload)
+        for stop in options.get("stop") or []:
+            if stop and stop in reply:
+                reply = reply[:reply.index(stop)]
+        tokens = _tokens(reply)
+        if num_predict and num_predict > 0:
+            tokens = tokens[:num_predict]
+
+        def final(content: str, eval_ns: int) -> Dict[str, Any]:
+            return {
+                "model": model,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "message": {"role": "assistant", "content": content},
+                "done": True,
+                "done_reason": "stop",
+                "total_duration": int((time.perf_counter() - t0) * 1e9),
+                "load_duration": 0,
+                "prompt_eval_count": prompt_tokens,
+                "prompt_eval_duration": max(prompt_eval_ns, 1),
+                "eval_count": len(tokens),
+                "eval_duration": max(eval_ns, 1),
+            }
+
+        try:
+            if payload.get("stream", True):
+                handler.send_response(200)
+                handler.send_header("Content-Type", "application/x-ndjson")
+                handler.end_headers()
+                t1 = time.perf_counter()
+                for tok in tokens:
+                    time.sleep(self.token_latency)
+                    chunk = {"model": model, "message": {"role": "assistant", "content": tok}, "done": False}
+                    handler.wfile.write((json.dumps(chunk) + "\n").encode("utf-8"))
+                    handler.wfile.flush()
+                last = final("", int((time.perf_counter() - t1) * 1e9))
+                handler.wfile.write((json.dumps(last) + "\n").encode("utf-8"))
+            else:
+                t1 = time.perf_counter()
+                time.sleep(len(tokens) * self.token_latency)
+                body = json.dumps(final("".join(tokens), int((time.perf_counter() - t1) * 1e9))).encode("utf-8")
+                handler.send_response(200)
+                handler.send_header("Content-Type", "application/json")
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client cancelled the request (e.g. a discarded speculation).
+            pass
+
+    def start(self) -> "FakeOllamaServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+
+def _load_json(path: Optional[str]):
+    if not path:
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv: List[str]) -> int:
+    p = argparse.ArgumentParser(description="Fake Ollama /api/chat server")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=11434)
+    p.add_argument("--token-latency", type=float, default=0.0, help="Seconds per generated token")
+    p.add_argument("--prompt-token-latency", type=float, default=0.0, help="Seconds per prompt token")
+    p.add_argument("--rules", help="JSON file: list of {match, response} rules")
+    p.add_argument("--script", help="JSON file: list of replies served in order")
+    args = p.parse_args(argv)
+
+    responder = Responder(rules=_load_json(args.rules), script=_load_json(args.script))
+    server = FakeOllamaServer(args.host, args.port, responder, args.token_latency, args.prompt_token_latency)
+    print(f"Fake Ollama listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
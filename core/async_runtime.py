@@ -0,0 +1,192 @@
+"""Asyncio building blocks for the non-blocking orchestrator.
+
+- `post_json`: a minimal HTTP/1.1 JSON client on asyncio streams. Cancelling
+  the awaiting task closes the socket, which makes Ollama abort generation.
+- `AsyncIOManager`: the coroutine counterpart of `IOManager`; child output is
+  consumed by a reader task and every chunk bumps a version counter so callers
+  can tell whether the screen changed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import codecs
+import json
+import os
+import ssl
+import sys
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+
+class HttpError(RuntimeError):
+    pass
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        parts: List[bytes] = []
+        while True:
+            size_line = await reader.readline()
+            size = int(size_line.split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                await reader.readline()
+                break
+            parts.append(await reader.readexactly(size))
+            await reader.readline()
+        return b"".join(parts)
+    if "content-length" in headers:
+        return await reader.readexactly(int(headers["content-length"]))
+    return await reader.read()
+
+
+async def post_json(url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """POST `payload` as JSON and return the decoded JSON response."""
+    parts = urlsplit(url)
+    host = parts.hostname or "localhost"
+    use_ssl = parts.scheme == "https"
+    port = parts.port or (443 if use_ssl else 80)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+
+    body = json.dumps(payload).encode("utf-8")
+    reader, writer = await asyncio.open_connection(
+        host, port, ssl=ssl.create_default_context() if use_ssl else None
+    )
+    try:
+        writer.write(
+            (
+                f"POST {path} HTTP/1.1\r\n"
+                f"Host: {host}:{port}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode("ascii")
+            + body
+        )
+        await writer.drain()
+
+        status_line = (await reader.readline()).decode("latin-1").strip()
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise HttpError(f"Malformed status line: {status_line!r}")
+        headers: Dict[str, str] = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1")
+            if line in ("\r\n", "\n", ""):
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        raw = await _read_body(reader, headers)
+        if status != 200:
+            raise HttpError(f"HTTP {status}: {raw[:200].decode('utf-8', errors='replace')}")
+        return json.loads(raw.decode("utf-8"))
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
+
+
+class AsyncIOManager:
+    """Runs the child process and consumes its output on the event loop."""
+
+    def __init__(self, command: List[str]):
+        self.command = command
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.stdout_buffer: List[str] = []
+        self.output_offset = 0  # characters of child output read so far
+        self.version = 0
+        self._changed: Optional[asyncio.Event] = None
+        self._reader_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        env = {**os.environ, "PYTHONUNBUFFERED": "1"}
+        self._changed = asyncio.Event()
+        try:
+            self.process = await asyncio.create_subprocess_exec(
+                *self.command,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                cwd=os.getcwd(),
+                env=env,
+            )
+        except Exception as e:
+            print(f"[IO] Failed to start process: {e}")
+            raise
+        self._reader_task = asyncio.create_task(self._reader())
+        print(f"[IO] Started process: {' '.join(self.command)}")
+
+    async def _reader(self):
+        # Incremental decoding so multi-byte characters split across reads survive.
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while True:
+            chunk = await self.process.stdout.read(4096)
+            if not chunk:
+                break
+            text = decoder.decode(chunk)
+            if not text:
+                continue
+            sys.stdout.write(text)
+            sys.stdout.flush()
+            self.stdout_buffer.append(text)
+            self.output_offset += len(text)
+            self.version += 1
+            self._changed.set()
+        # Wake anyone waiting on output when the child exits.
+        self.version += 1
+        self._changed.set()
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    def get_snapshot(self, last_chars: int = 2000) -> str:
+        full_text = "".join(self.stdout_buffer)
+        return full_text[-last_chars:] if len(full_text) > last_chars else full_text
+
+    async def wait_for_change(self, timeout: float, since: Optional[int] = None) -> bool:
+        """Wait up to `timeout` seconds for output newer than version `since`.
+
+        Returns True if the screen changed.
+        """
+        start_version = self.version if since is None else since
+        if self.version != start_version:
+            return True
+        self._changed.clear()
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.version != start_version
+
+    async def send_input(self, text: str):
+        if self.process and self.process.stdin:
+            try:
+                self.process.stdin.write((text + "\n").encode("utf-8"))
+                await self.process.stdin.drain()
+            except Exception as e:
+                print(f"[IO] Error sending input: {e}")
+
+    async def cleanup(self):
+        if self.process and self.process.returncode is None:
+            try:
+                self.process.terminate()
+                await asyncio.wait_for(self.process.wait(), 1)
+            except Exception:
+                try:
+                    self.process.kill()
+                except Exception:
+                    pass
+        if self._reader_task:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except (asyncio.CancelledError, Exception):
+                pass
+        print("\n[IO] Process cleaned up.")
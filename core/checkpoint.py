@@ -0,0 +1,128 @@
+"""Append-only journal of orchestrator loop state, for resuming a goal.
+
+After every step the orchestrator appends one JSON line with the rolling
+history, the step index, how much terminal output had been read (and its
+tail), and any subagent task still in flight. A crash or Ctrl-C therefore
+loses at most the step in progress. `load_checkpoint` replays a journal into
+the latest state; a torn final line from a crash mid-write is ignored.
+
+Record types: "start", "resume", "pending" (subagent task started),
+"step" (step finished), "end" (goal finished; the journal is then not
+offered for resuming).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+
+DEFAULT_CHECKPOINT_DIR = Path(".flexi/checkpoints")
+
+
+@dataclass
+class Checkpoint:
+    path: Path
+    goal: str
+    step: int = 0
+    history: Dict[str, Any] = field(default_factory=dict)
+    snapshot_offset: int = 0
+    snapshot_tail: str = ""
+    pending_task: Optional[str] = None
+    finished: bool = False
+    status: Optional[str] = None
+
+
+class GoalJournal:
+    """Writer for one goal's journal file."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("a", encoding="utf-8")
+
+    @classmethod
+    def create(cls, goal: str, checkpoint_dir: Union[str, Path] = DEFAULT_CHECKPOINT_DIR) -> "GoalJournal":
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        journal = cls(Path(checkpoint_dir) / f"goal_{stamp}_{os.getpid()}.jsonl")
+        journal._write({"type": "start", "goal": goal})
+        return journal
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        record["time"] = time.time()
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+        # Steps take seconds to minutes; an fsync each is cheap insurance.
+        os.fsync(self._file.fileno())
+
+    def record_resume(self, step: int) -> None:
+        self._write({"type": "resume", "step": step})
+
+    def record_pending(self, step: int, task: str) -> None:
+        self._write({"type": "pending", "step": step, "task": task})
+
+    def record_step(self, step: int, history: Dict[str, Any], snapshot_offset: int, snapshot_tail: str) -> None:
+        self._write({
+            "type": "step",
+            "step": step,
+            "history": history,
+            "snapshot_offset": snapshot_offset,
+            "snapshot_tail": snapshot_tail,
+        })
+
+    def finish(self, status: str) -> None:
+        self._write({"type": "end", "status": status})
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+
+def load_checkpoint(path: Union[str, Path]) -> Checkpoint:
+    """Replay a journal into its latest state."""
+    path = Path(path)
+    cp: Optional[Checkpoint] = None
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn write
+            kind = rec.get("type")
+            if kind == "start":
+                cp = Checkpoint(path=path, goal=rec.get("goal", ""))
+            elif cp is None:
+                continue
+            elif kind == "pending":
+                cp.pending_task = rec.get("task")
+            elif kind == "step":
+                cp.step = rec.get("step", cp.step)
+                cp.history = rec.get("history") or {}
+                cp.snapshot_offset = rec.get("snapshot_offset", 0)
+                cp.snapshot_tail = rec.get("snapshot_tail", "")
+                cp.pending_task = None
+            elif kind == "end":
+                cp.finished = True
+                cp.status = rec.get("status")
+    if cp is None:
+        raise ValueError(f"{path}: not a goal journal (no start record)")
+    return cp
+
+
+def latest_checkpoint(checkpoint_dir: Union[str, Path] = DEFAULT_CHECKPOINT_DIR) -> Optional[Checkpoint]:
+    """Most recently written journal that has not finished, if any."""
+    directory = Path(checkpoint_dir)
+    if not directory.is_dir():
+        return None
+    for path in sorted(directory.glob("*.jsonl"), key=lambda p: p.stat().st_mtime, reverse=True):
+        try:
+            cp = load_checkpoint(path)
+        except (OSError, ValueError):
+            continue
+        if not cp.finished:
+            return cp
+    return None
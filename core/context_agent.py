@@ -6,6 +6,13 @@ import shutil
 from pathlib import Path
 from typing import Optional, Dict, Any
 
+from core.prompt_registry import PromptRegistry
+from core.history import RollingHistory, make_llm_summarizer
+from core import tracing
+from core.model_router import ModelRouter
+from core.inference_profiles import InferenceProfiles
+from core.structured_output import SUBAGENT_PLAN_SCHEMA, parse_json_response
+
 # Import shared utilities from parent (e.g. inference) if possible, 
 # or we can pass the inference function in.
 # For now, we'll duplicte/import the inference helper or assume it's passed.
@@ -15,8 +22,14 @@ class ContextAgent:
     A subagent that uses rlm_repl.py to research the codebase and answer questions.
     """
     
-    def __init__(self, inference_func, repl_script_path: Optional[str] = None):
+    def __init__(self, inference_func, repl_script_path: Optional[str] = None, prompts: Optional[PromptRegistry] = None,
+                 router: Optional[ModelRouter] = None, profiles: Optional[InferenceProfiles] = None):
         self.inference_func = inference_func
+        # Planning goes through the "subagent" route (escalates on bad JSON)
+        self.router = router if router is not None else ModelRouter()
+        self.model = self.router.model_for("subagent")
+        self.profiles = profiles if profiles is not None else InferenceProfiles()
+        self.prompts = prompts if prompts is not None else PromptRegistry("prompts")
         
         if repl_script_path is None:
              # Default to sibling file 'rlm_repl.py' in the same directory
@@ -24,6 +37,7 @@ class ContextAgent:
 
         self.repl_script_path = Path(repl_script_path).resolve()
         self.max_steps = 5
+        self.max_output_chars = 2000
         self.repl_state_path = Path(".flexi/rlm_state/state.pkl")
         
         # Ensure REPL is initialized
@@ -44,6 +58,12 @@ class ContextAgent:
 
     def _run_repl_code(self, code: str) -> str:
         """Execute code in the persistent REPL."""
+        with tracing.span("subagent.repl", code_chars=len(code)) as span:
+            output = self._exec_repl(code)
+            span.set(output_chars=len(output))
+            return output
+
+    def _exec_repl(self, code: str) -> str:
         try:
             # We use the 'exec' command of rlm_repl.py
             # Using stdin to pass code
@@ -64,48 +84,67 @@ class ContextAgent:
         except Exception as e:
             return f"Error executing REPL code: {e}"
 
+    def _parse_plan(self, response: str) -> Optional[Dict[str, Any]]:
+        """Extract the JSON plan from a model reply; None if it cannot be repaired."""
+        plan = parse_json_response(response, kind="plan")
+        if plan is None:
+            print(f"[SUBAGENT] Error parsing JSON plan: {response[:100]}...")
+        return plan
+
     def execute_task(self, task: str) -> str:
         """
         Main entry point. Runs the agent loop to execute the task.
         """
+        with tracing.span("subagent.task", task=task[:200]) as span:
+            result = self._execute_task(task)
+            span.set(result_chars=len(result))
+            return result
+
+    def _execute_task(self, task: str) -> str:
         print(f"\n[SUBAGENT] Executing Task: {task}")
         
-        history = []
+        # Raw REPL outputs are capped; older steps are folded into a summary.
+        summarize_model = self.router.model_for("summarize")
+        history = RollingHistory(
+            keep_last=3,
+            max_entry_chars=self.max_output_chars,
+            summarizer=make_llm_summarizer(self.inference_func, self.prompts,
+                                           model=summarize_model,
+                                           budget_tokens=self.profiles.get("summarize").prompt_budget(summarize_model),
+                                           profile="summarize"),
+            fold_batch=2,
+        )
         
-        # Load prompt template
-        try:
-            with open("prompts/subagent_prompt.md", "r", encoding="utf-8") as f:
-                prompt_template = f.read()
-        except FileNotFoundError:
-            return "Error: promts/subagent_prompt.md not found."
+        # Load prompt template (compiled once, reloaded on change)
+        if self.prompts.get("subagent_prompt.md") is None:
+            return "Error: prompts/subagent_prompt.md not found."
             
         for step in range(self.max_steps):
-            # Format prompt
-            prompt = prompt_template.format(
-                query=task,
-                cwd=os.getcwd(),
-                history=json.dumps(history, indent=2)
+            # Format prompt, keeping the most recent history within the model's budget
+            prompt = self.prompts.render(
+                "subagent_prompt.md",
+                {
+                    "query": task,
+                    "cwd": os.getcwd(),
+                    "history": json.dumps(history.as_list(), indent=2),
+                },
+                trim={"history": "tail"},
+                budget_tokens=self.profiles.get("subagent").prompt_budget(self.model),
             )
             
             messages = [{"role": "user", "content": prompt}]
             
-            # Call LLM
+            # Call LLM (retried on the escalation model if the plan is unparseable)
             print(f"[SUBAGENT] Thinking (Step {step+1})...")
-            response = self.inference_func(messages, model="gemma3:4b")
+            with tracing.span("subagent.think", step=step + 1):
+                plan = self.router.call(
+                    "subagent",
+                    lambda m: self._parse_plan(self.inference_func(messages, model=m, schema=SUBAGENT_PLAN_SCHEMA,
+                                                                  profile="subagent")),
+                    accept=lambda p: p is not None,
+                )
             
-            # Parse JSON
-            try:
-                # Extract JSON block
-                import re
-                json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response, re.DOTALL)
-                if json_match:
-                    response_json = json_match.group(1)
-                else:
-                    response_json = response
-                
-                plan = json.loads(response_json)
-            except Exception as e:
-                print(f"[SUBAGENT] Error parsing JSON: {e}")
+            if plan is None:
                 # Retry or note error
                 history.append(f"Step {step+1} Error: Invalid JSON response from LLM.")
                 continue
@@ -0,0 +1,232 @@
+"""Concurrent inference dispatcher.
+
+A bounded pool of worker threads pulls jobs from a priority queue. A job only
+starts when its model is below its concurrency limit, so a busy model never
+blocks work queued for another one. Lower priority numbers run first:
+interactive CLI-operator calls go ahead of planning, which goes ahead of
+background summarisation.
+
+The submitting thread's contextvars (e.g. the active tracing span) are carried
+into the worker, so spans created by a job nest under the caller's span.
+
+Coroutines make their own (cancellable) HTTP calls but still queue for a model
+slot with `async with dispatcher.slot(model, priority)`, so the limits and
+priorities hold across sync and async callers alike.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import itertools
+import threading
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_PLANNING = 10
+PRIORITY_BACKGROUND = 20
+
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_MODEL_LIMIT = 1
+
+
+class _Job:
+    __slots__ = ("priority", "seq", "model", "fn", "args", "kwargs", "future", "context")
+
+    def __init__(self, priority, seq, model, fn, args, kwargs):
+        self.priority = priority
+        self.seq = seq
+        self.model = model
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future: Future = Future()
+        self.context = contextvars.copy_context()
+
+
+def _release_granted(claim: Future) -> None:
+    if not claim.cancelled() and claim.exception() is None:
+        claim.result()()
+
+
+class InferenceDispatcher:
+    """Priority-ordered worker pool with per-model concurrency limits."""
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        model_limits: Optional[Dict[str, int]] = None,
+        default_model_limit: int = DEFAULT_MODEL_LIMIT,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.model_limits = dict(model_limits or {})
+        self.default_model_limit = max(1, default_model_limit)
+
+        self._cond = threading.Condition()
+        self._pending: List[_Job] = []
+        self._running: Dict[str, int] = {}
+        self._seq = itertools.count()
+        self._shutdown = False
+        self._local = threading.local()
+        self.completed = 0
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"inference-{i}", daemon=True)
+            for i in range(self.max_workers)
+        ]
+        for t in self._workers:
+            t.start()
+
+    # --- submission ---
+
+    def submit(self, fn: Callable[..., Any], *args: Any, model: str = "", priority: int = PRIORITY_PLANNING, **kwargs: Any) -> Future:
+        """Queue `fn(*args, **kwargs)` as a call against `model`. Returns a Future."""
+        if getattr(self._local, "in_worker", False):
+            # A job submitting (and waiting on) another job could deadlock the
+            # pool; run nested calls inline on the current worker instead.
+            future: Future = Future()
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            return future
+
+        return self._enqueue(_Job(priority, next(self._seq), model, fn, args, kwargs))
+
+    def reserve(self, model: str = "", priority: int = PRIORITY_PLANNING) -> Future:
+        """Queue a claim on one of `model`'s slots without running anything.
+
+        Claims are granted in the same order as jobs. The Future resolves to a
+        `release` callable; the holder makes its call and must then release.
+        Cancelling the Future before it is granted withdraws the claim. Held
+        slots count against the model limit but do not occupy a worker.
+        """
+        return self._enqueue(_Job(priority, next(self._seq), model, None, (), {}))
+
+    @contextlib.asynccontextmanager
+    async def slot(self, model: str = "", priority: int = PRIORITY_PLANNING) -> AsyncIterator[None]:
+        """Hold one of `model`'s slots for the body of an `async with` block."""
+        claim = self.reserve(model, priority)
+        try:
+            release = await asyncio.wrap_future(claim)
+        except asyncio.CancelledError:
+            # Granted while the caller was being cancelled: hand it straight back
+            claim.add_done_callback(_release_granted)
+            raise
+        try:
+            yield
+        finally:
+            release()
+
+    def _enqueue(self, job: _Job) -> Future:
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("InferenceDispatcher has been shut down")
+            self._pending.append(job)
+            self._cond.notify_all()
+        return job.future
+
+    def submit_batch(self, requests: Iterable[Dict[str, Any]]) -> List[Future]:
+        """Submit several jobs at once.
+
+        Each request is a dict with `fn` and optional `args`, `kwargs`,
+        `model` and `priority`. Futures are returned in request order.
+        """
+        futures = []
+        for req in requests:
+            futures.append(self.submit(
+                req["fn"],
+                *req.get("args", ()),
+                model=req.get("model", ""),
+                priority=req.get("priority", PRIORITY_PLANNING),
+                **req.get("kwargs", {}),
+            ))
+        return futures
+
+    def run(self, fn: Callable[..., Any], *args: Any, model: str = "", priority: int = PRIORITY_PLANNING, **kwargs: Any) -> Any:
+        """Submit and block for the result."""
+        return self.submit(fn, *args, model=model, priority=priority, **kwargs).result()
+
+    # --- scheduling ---
+
+    def limit_for(self, model: str) -> int:
+        return self.model_limits.get(model, self.default_model_limit)
+
+    def _next_job(self) -> Optional[_Job]:
+        # Highest priority (lowest number) first, FIFO within a priority,
+        # skipping jobs whose model is already at its limit.
+        for job in sorted(self._pending, key=lambda j: (j.priority, j.seq)):
+            if self._running.get(job.model, 0) < self.limit_for(job.model):
+                self._pending.remove(job)
+                return job
+        return None
+
+    def _worker(self) -> None:
+        self._local.in_worker = True
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    if self._shutdown and not self._pending:
+                        return
+                    self._cond.wait()
+                    job = self._next_job()
+                self._running[job.model] = self._running.get(job.model, 0) + 1
+
+            if job.fn is None:
+                # A reserve() claim: the holder releases the slot when done
+                release = self._releaser(job.model)
+                if job.future.set_running_or_notify_cancel():
+                    job.future.set_result(release)
+                else:
+                    release()
+                continue
+
+            try:
+                if job.future.set_running_or_notify_cancel():
+                    try:
+                        job.future.set_result(job.context.run(job.fn, *job.args, **job.kwargs))
+                    except BaseException as e:
+                        job.future.set_exception(e)
+            finally:
+                self._release(job.model)
+
+    def _release(self, model: str) -> None:
+        with self._cond:
+            self._running[model] -= 1
+            self.completed += 1
+            self._cond.notify_all()
+
+    def _releaser(self, model: str) -> Callable[[], None]:
+        released = threading.Event()
+
+        def release() -> None:
+            if not released.is_set():
+                released.set()
+                self._release(model)
+        return release
+
+    # --- lifecycle ---
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "workers": self.max_workers,
+                "pending": len(self._pending),
+                "running": {m: n for m, n in self._running.items() if n},
+                "completed": self.completed,
+            }
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False) -> None:
+        with self._cond:
+            self._shutdown = True
+            if cancel_pending:
+                for job in self._pending:
+                    job.future.cancel()
+                self._pending.clear()
+            self._cond.notify_all()
+        if wait:
+            for t in self._workers:
+                t.join()
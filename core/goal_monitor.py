@@ -0,0 +1,107 @@
+"""Decides when a goal loop should stop before its step cap.
+
+Cheap rules run after every step:
+  * the CLI process has exited;
+  * the last `stuck_after` inputs sent to the CLI produced no new output
+    (steps that send nothing, such as delegating to a subagent or waiting,
+    are not counted);
+  * the same input produced the same output `repeat_limit` times in a row
+    (answering a menu with "1" is fine; getting the same reply back each
+    time is a loop).
+
+Every `assess_every` steps the orchestrator also asks a small model (the
+"assess" route, `prompts/goal_assessment_prompt.md`) whether the goal is done;
+`apply_assessment` turns that reply into a verdict.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+
+DEFAULT_ASSESS_EVERY = 3
+DEFAULT_STUCK_AFTER = 5
+DEFAULT_REPEAT_LIMIT = 4
+
+
+@dataclass
+class Verdict:
+    done: bool
+    status: str = "running"  # running | completed | stuck | exited
+    reason: str = ""
+    next_step: str = ""
+
+
+CONTINUE = Verdict(False)
+
+
+class GoalMonitor:
+    """Tracks per-step screen and input history for one goal."""
+
+    def __init__(
+        self,
+        assess_every: int = DEFAULT_ASSESS_EVERY,
+        stuck_after: int = DEFAULT_STUCK_AFTER,
+        repeat_limit: int = DEFAULT_REPEAT_LIMIT,
+    ):
+        self.assess_every = assess_every
+        self.stuck_after = stuck_after
+        self.repeat_limit = repeat_limit
+        self.reset()
+
+    def reset(self) -> None:
+        self._last_offset: Optional[int] = None
+        self._idle_steps = 0
+        self._pending_input: Optional[str] = None
+        self._exchanges: List[Tuple[str, str]] = []
+
+    def record_input(self, text: str) -> None:
+        self._pending_input = text.strip()
+
+    def observe(self, snapshot: str, alive: bool, output_offset: int) -> Verdict:
+        """Apply the rule-based checks after a step.
+
+        `output_offset` is the total output read so far; the tail of
+        `snapshot` beyond the previous offset is what this step produced.
+        """
+        if not alive:
+            return Verdict(True, "exited", "The CLI process has exited.")
+
+        new_chars = output_offset - self._last_offset if self._last_offset is not None else output_offset
+        self._last_offset = output_offset
+        if new_chars > 0:
+            self._idle_steps = 0
+        elif self._pending_input is not None:
+            self._idle_steps += 1
+        if self.stuck_after > 0 and self._idle_steps >= self.stuck_after:
+            return Verdict(True, "stuck", f"No new output after {self._idle_steps} inputs.")
+
+        if self._pending_input is None:
+            self._exchanges.clear()
+        else:
+            produced = snapshot[-new_chars:] if 0 < new_chars <= len(snapshot) else snapshot
+            digest = hashlib.sha1(produced.encode("utf-8", "replace")).hexdigest()
+            self._exchanges.append((self._pending_input, digest))
+            self._pending_input = None
+            last = self._exchanges[-self.repeat_limit:]
+            if self.repeat_limit > 0 and len(last) == self.repeat_limit and len(set(last)) == 1:
+                return Verdict(True, "stuck", f"Sent {last[0][0]!r} {self.repeat_limit} times with the same result.")
+        return CONTINUE
+
+    def should_assess(self, step: int) -> bool:
+        return self.assess_every > 0 and step > 0 and step % self.assess_every == 0
+
+    @staticmethod
+    def apply_assessment(assessment: Optional[Dict[str, Any]]) -> Verdict:
+        """Turn a goal-assessment reply into a verdict (unparseable means keep going)."""
+        if not assessment:
+            return CONTINUE
+        completed = assessment.get("completed")
+        if isinstance(completed, str):
+            completed = completed.strip().lower() == "true"
+        explanation = str(assessment.get("explanation") or "")
+        if completed is True:
+            return Verdict(True, "completed", explanation)
+        return Verdict(False, "running", explanation, str(assessment.get("next_step") or ""))
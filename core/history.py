@@ -0,0 +1,217 @@
+"""Rolling conversation history with model-generated compaction.
+
+The most recent `keep_last` entries are kept verbatim. Once `fold_batch` more
+have accumulated, the oldest overflow is folded into a running summary by a
+summarizer callable (normally an LLM call using
+`prompts/history_summary_prompt.md`). Every entry is capped at
+`max_entry_chars` on the way in, so prompt size stays roughly constant no
+matter how many steps have run.
+
+Callers on a latency-sensitive loop can append with `compact=False` and fold
+off the critical path: `compact_in_background` hands the summarizer call to an
+executor and `apply_compaction` swaps the result in once it is ready.
+"""
+
+from __future__ import annotations
+
+import json
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.prompt_registry import PromptRegistry
+from core import tracing
+
+
+Summarizer = Callable[[str, List[Any]], str]
+
+DEFAULT_KEEP_LAST = 8
+DEFAULT_FOLD_BATCH = 4
+DEFAULT_MAX_ENTRY_CHARS = 2000
+DEFAULT_MAX_SUMMARY_CHARS = 2400
+SUMMARY_PROMPT = "history_summary_prompt.md"
+
+
+def cap_text(text: str, max_chars: int) -> str:
+    """Keep the head and tail of an oversized string; errors usually sit at the end."""
+    if max_chars <= 0 or len(text) <= max_chars:
+        return text
+    half = max_chars // 2
+    omitted = len(text) - 2 * half
+    return f"{text[:half]}\n... [{omitted} chars omitted] ...\n{text[-half:]}"
+
+
+def cap_entry(entry: Any, max_chars: int) -> Any:
+    if isinstance(entry, str):
+        return cap_text(entry, max_chars)
+    if isinstance(entry, dict):
+        return {k: cap_text(v, max_chars) if isinstance(v, str) else v for k, v in entry.items()}
+    return entry
+
+
+def _fallback_summary(previous: str, entries: List[Any], max_chars: int) -> str:
+    """Deterministic summary used when no model is available or it fails."""
+    lines = [previous] if previous else []
+    for entry in entries:
+        if isinstance(entry, dict):
+            text = entry.get("content") or entry.get("thought") or json.dumps(entry)
+            role = entry.get("role") or f"step {entry.get('step', '?')}"
+            lines.append(f"- {role}: {str(text)[:160]}")
+        else:
+            lines.append(f"- {str(entry)[:160]}")
+    return cap_text("\n".join(lines), max_chars)
+
+
+def make_llm_summarizer(
+    inference_func: Callable[..., str],
+    prompts: PromptRegistry,
+    model: Optional[str] = None,
+    max_words: int = 250,
+    budget_tokens: Optional[int] = None,
+    **call_kwargs: Any,
+) -> Summarizer:
+    """Build a summarizer that asks the model to fold entries into the summary.
+
+    `budget_tokens` caps the rendered prompt (default: the model's window).
+    Extra keyword arguments (e.g. a dispatcher priority or inference profile)
+    are passed through to `inference_func`.
+    """
+    def summarize(previous: str, entries: List[Any]) -> str:
+        prompt = prompts.render(
+            SUMMARY_PROMPT,
+            {
+                "previous_summary": previous or "(none yet)",
+                "new_entries": json.dumps(entries, indent=2),
+                "max_words": max_words,
+            },
+            model=model,
+            trim={"new_entries": "tail", "previous_summary": "tail"},
+            budget_tokens=budget_tokens,
+        )
+        if not prompt:
+            return ""
+        kwargs = dict(call_kwargs)
+        if model:
+            kwargs["model"] = model
+        return inference_func([{"role": "user", "content": prompt}], **kwargs).strip()
+    return summarize
+
+
+class RollingHistory:
+    """List-like history that keeps recent entries verbatim and summarizes the rest."""
+
+    def __init__(
+        self,
+        keep_last: int = DEFAULT_KEEP_LAST,
+        max_entry_chars: int = DEFAULT_MAX_ENTRY_CHARS,
+        summarizer: Optional[Summarizer] = None,
+        fold_batch: int = DEFAULT_FOLD_BATCH,
+        max_summary_chars: int = DEFAULT_MAX_SUMMARY_CHARS,
+    ):
+        self.keep_last = keep_last
+        self.max_entry_chars = max_entry_chars
+        self.summarizer = summarizer
+        self.fold_batch = max(1, fold_batch)
+        self.max_summary_chars = max_summary_chars
+        self.entries: List[Any] = []
+        self.summary = ""
+        self.folded = 0
+        # (entries being folded, summary future) while a background fold runs
+        self._pending: Optional[Tuple[List[Any], Future]] = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(list(self.entries))
+
+    def __getitem__(self, index):
+        return self.entries[index]
+
+    def append(self, entry: Any, compact: bool = True) -> None:
+        self.entries.append(cap_entry(entry, self.max_entry_chars))
+        if compact:
+            self.compact()
+
+    def needs_compaction(self) -> bool:
+        return len(self.entries) >= self.keep_last + self.fold_batch
+
+    def compact(self) -> None:
+        """Fold everything older than the last `keep_last` entries into the summary."""
+        self.apply_compaction(wait=True)
+        if not self.needs_compaction():
+            return
+        to_fold = self.entries[:len(self.entries) - self.keep_last]
+        self._fold(to_fold, self._summarize(self.summary, to_fold))
+
+    def compact_in_background(self, submit: Callable[[Callable[[], str]], Future]) -> bool:
+        """Start folding the overflow through `submit` (e.g. a dispatcher); returns whether one started.
+
+        Entries may keep being appended meanwhile; `apply_compaction` folds
+        exactly the entries that were summarized.
+        """
+        if self._pending is not None or not self.needs_compaction():
+            return False
+        to_fold = self.entries[:len(self.entries) - self.keep_last]
+        previous = self.summary
+        self._pending = (to_fold, submit(lambda: self._summarize(previous, to_fold)))
+        return True
+
+    def apply_compaction(self, wait: bool = False) -> bool:
+        """Swap in a finished background fold (or wait for it); returns whether one was applied."""
+        if self._pending is None:
+            return False
+        to_fold, future = self._pending
+        if not (wait or future.done()):
+            return False
+        self._pending = None
+        try:
+            summary = future.result()
+        except Exception as e:
+            print(f"[History] Summarization failed: {e}")
+            summary = ""
+        self._fold(to_fold, summary)
+        return True
+
+    def _summarize(self, previous: str, to_fold: List[Any]) -> str:
+        summary = ""
+        if self.summarizer:
+            with tracing.span("history.compact", entries=len(to_fold)):
+                try:
+                    summary = self.summarizer(previous, to_fold)
+                except Exception as e:
+                    print(f"[History] Summarization failed: {e}")
+        return summary
+
+    def _fold(self, to_fold: List[Any], summary: str) -> None:
+        if not summary:
+            summary = _fallback_summary(self.summary, to_fold, self.max_summary_chars)
+        # Swap in one go so concurrent readers see either the old or new state.
+        overflow = len(to_fold)
+        self.summary = cap_text(summary, self.max_summary_chars)
+        self.entries = self.entries[overflow:]
+        self.folded += overflow
+
+    def messages(self) -> List[Dict[str, Any]]:
+        """Chat messages: the running summary (if any) followed by recent entries."""
+        out: List[Dict[str, Any]] = []
+        if self.summary:
+            out.append({"role": "system", "content": f"Summary of {self.folded} earlier turns:\n{self.summary}"})
+        out.extend(self.entries)
+        return out
+
+    def as_list(self) -> List[Any]:
+        """Plain list for JSON prompts: a summary record followed by recent entries."""
+        out: List[Any] = []
+        if self.summary:
+            out.append({"summary_of_earlier_steps": self.summary, "steps_folded": self.folded})
+        out.extend(self.entries)
+        return out
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"entries": list(self.entries), "summary": self.summary, "folded": self.folded}
+
+    def load_dict(self, data: Dict[str, Any]) -> None:
+        self._pending = None
+        self.entries = list(data.get("entries", []))
+        self.summary = data.get("summary", "")
+        self.folded = data.get("folded", 0)
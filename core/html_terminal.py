@@ -3,15 +3,20 @@ import subprocess
 import os
 import datetime
 import html
+import threading
+import time
+import argparse
+import codecs
+import queue
+import shlex
+import signal
+import uuid
+import json
+import re
+import struct
+import tempfile
 
-class HtmlLogger:
-    def __init__(self, filename="terminal_log.html"):
-        self.filename = filename
-        self._init_file()
-
-    def _init_file(self):
-        with open(self.filename, "w", encoding="utf-8") as f:
-            f.write("""
+HTML_HEADER = """
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -23,12 +28,425 @@ class HtmlLogger:
         .output { color: #cccccc; white-space: pre-wrap; }
         .error { color: #f48771; }
         .timestamp { color: #858585; font-size: 0.8em; margin-right: 10px; }
+        .spill { color: #569cd6; }
+        a { color: #569cd6; }
         div { margin-bottom: 5px; }
     </style>
 </head>
 <body>
     <h3>Terminal Session Recorded</h3>
-""")
+"""
+HTML_FOOTER = "</body></html>"
+
+# Buffered writes: flushed when this much is pending or this long has passed
+DEFAULT_FLUSH_BYTES = 64 * 1024
+DEFAULT_FLUSH_INTERVAL = 1.0
+# Larger outputs are written to a side file and linked from the log
+DEFAULT_MAX_ENTRY_CHARS = 20000
+# A segment is rotated out at this size (bytes) or age (seconds, 0 = never)
+DEFAULT_SEGMENT_BYTES = 5 * 1024 * 1024
+DEFAULT_SEGMENT_SECONDS = 0
+# Numbered segments kept on disk (oldest are deleted with their spill files)
+DEFAULT_KEEP_SEGMENTS = 20
+# Streaming command output is logged in batches of this size or age
+LOG_BATCH_CHARS = 8192
+LOG_BATCH_SECONDS = 0.5
+READ_CHUNK = 65536
+# Events per page when rendering the JSONL log to HTML
+DEFAULT_PAGE_EVENTS = 1000
+# Rows in the `stats` builtin's slowest-commands table
+DEFAULT_STATS_TOP = 10
+# Unread output kept per background job; older output is dropped beyond this
+DEFAULT_JOB_BUFFER_CHARS = 1024 * 1024
+
+
+_OFFSET = struct.Struct("<Q")
+
+
+def index_event_log(path, repair=True):
+    """Bring `<path>.idx` up to date with the event log; returns the event count.
+
+    Only the part of the log past the last indexed event is scanned. With
+    `repair`, a torn final line (crash mid-write) is cut off the log so the
+    next append starts on a fresh line; readers pass False and just skip it.
+    """
+    index_path = path + ".idx"
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    idx_size = os.path.getsize(index_path) if os.path.exists(index_path) else 0
+    count = idx_size // _OFFSET.size
+    mode = "r+b" if os.path.exists(index_path) else "w+b"
+    with open(index_path, mode) as idx:
+        start = 0
+        if count:
+            idx.seek((count - 1) * _OFFSET.size)
+            (last,) = _OFFSET.unpack(idx.read(_OFFSET.size))
+            if last < size:
+                with open(path, "rb") as log:
+                    log.seek(last)
+                    line = log.readline()
+                start = last + len(line) if line.endswith(b"\n") else last
+            if last >= size or start == last:
+                count, start = 0, 0  # index does not match the log; rebuild
+        idx.truncate(count * _OFFSET.size)
+        idx.seek(count * _OFFSET.size)
+        if not size:
+            return count
+        with open(path, "rb") as log:
+            log.seek(start)
+            offset = start
+            for line in log:
+                if not line.endswith(b"\n"):
+                    break
+                idx.write(_OFFSET.pack(offset))
+                offset += len(line)
+                count += 1
+    if repair and offset < size:
+        with open(path, "r+b") as log:
+            log.truncate(offset)
+    return count
+
+
+class EventLog:
+    """Append-only JSONL record of the session, one event per line.
+
+    `<path>.idx` holds the byte offset of every event as a little-endian
+    uint64, so event n is found with two seeks and any page of a large log
+    can be read without scanning it. Sessions append to the same log; each
+    starts with a "session" event. Writes are buffered by the owning
+    `HtmlLogger`, and the index is always written after the events it
+    points to.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.count = index_event_log(path)
+        self._file = open(path, "ab")
+        self._index = open(self.index_path, "ab")
+        self._size = self._file.tell()
+        self._lines = []
+        self._offsets = []
+
+    def append(self, kind, **fields):
+        event = {"ts": round(time.time(), 3), "kind": kind}
+        event.update(fields)
+        line = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+        self._lines.append(line)
+        self._offsets.append(_OFFSET.pack(self._size))
+        self._size += len(line)
+        self.count += 1
+
+    def flush(self):
+        if self._lines:
+            self._file.write(b"".join(self._lines))
+            self._file.flush()
+            self._index.write(b"".join(self._offsets))
+            self._lines.clear()
+            self._offsets.clear()
+        self._index.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+        self._index.close()
+
+
+def event_count(path):
+    index_path = path + ".idx"
+    if not os.path.exists(index_path):
+        return index_event_log(path, repair=False)
+    return os.path.getsize(index_path) // _OFFSET.size
+
+
+def read_events(path, start=0, stop=None):
+    """Yield events [start, stop) of a JSONL event log using its offset index.
+
+    Negative positions count from the end, as in slicing.
+    """
+    start, stop, _ = slice(start, stop).indices(event_count(path))
+    if start >= stop:
+        return
+    with open(path + ".idx", "rb") as idx:
+        idx.seek(start * _OFFSET.size)
+        (offset,) = _OFFSET.unpack(idx.read(_OFFSET.size))
+    with open(path, "rb") as log:
+        log.seek(offset)
+        for _ in range(stop - start):
+            line = log.readline()
+            if not line.endswith(b"\n"):
+                return
+            yield json.loads(line)
+
+
+def _usage_from_rusage(ru):
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    rss = ru.ru_maxrss // 1024 if sys.platform == "darwin" else ru.ru_maxrss
+    return {"user_s": round(ru.ru_utime, 3), "sys_s": round(ru.ru_stime, 3), "max_rss_kb": rss}
+
+
+def wait_with_usage(proc):
+    """Reap `proc` and return (returncode, usage).
+
+    usage holds user/sys CPU seconds and max RSS of the process and of the
+    children it waited for (so a shell's pipeline is included), or is None
+    where `os.wait4` is unavailable.
+    """
+    if not hasattr(os, "wait4"):
+        return proc.wait(), None
+    try:
+        _, status, ru = os.wait4(proc.pid, 0)
+    except ChildProcessError:
+        return proc.wait(), None
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return proc.returncode, _usage_from_rusage(ru)
+
+
+def _fmt_rss(kb):
+    if kb is None:
+        return "-"
+    return f"{kb / 1024:.1f}M" if kb >= 1024 else f"{kb}K"
+
+
+def _fmt_cpu(seconds):
+    return "-" if seconds is None else f"{seconds:.2f}"
+
+
+class CommandStats:
+    """Finished commands of a session (the fields of their "command" events)."""
+
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self.records.append(record)
+
+    def summary(self, top=DEFAULT_STATS_TOP):
+        with self._lock:
+            records = list(self.records)
+        if not records:
+            return "no commands recorded"
+        wall = sum(r.get("duration_s", 0) for r in records)
+        user = sum(r.get("user_s") or 0 for r in records)
+        system = sum(r.get("sys_s") or 0 for r in records)
+        failed = sum(1 for r in records if r.get("exit") != 0)
+        lines = [f"{len(records)} commands, {wall:.1f}s wall, {user:.1f}s user, {system:.1f}s sys, {failed} failed"]
+
+        lines.append(f"Slowest {min(top, len(records))}:")
+        lines.append(f"  {'wall_s':>8} {'user_s':>7} {'sys_s':>7} {'max_rss':>8} {'exit':>4} {'out':>9}  command")
+        for r in sorted(records, key=lambda r: r.get("duration_s", 0), reverse=True)[:top]:
+            out = r.get("stdout_bytes", 0) + r.get("stderr_bytes", 0)
+            job = f"%{r['job']} " if "job" in r else ""
+            lines.append(
+                f"  {r.get('duration_s', 0):>8.3f} {_fmt_cpu(r.get('user_s')):>7} {_fmt_cpu(r.get('sys_s')):>7} "
+                f"{_fmt_rss(r.get('max_rss_kb')):>8} {r.get('exit')!s:>4} {out:>9}  {job}{r.get('cmd', '')}"
+            )
+
+        by_program = {}
+        for r in records:
+            words = r.get("cmd", "").split()
+            entry = by_program.setdefault(words[0] if words else "", [0, 0.0])
+            entry[0] += 1
+            entry[1] += r.get("duration_s", 0)
+        lines.append("By program:")
+        for name, (count, total) in sorted(by_program.items(), key=lambda kv: kv[1][1], reverse=True)[:top]:
+            share = 100 * total / wall if wall else 0
+            lines.append(f"  {total:>8.3f}s {share:>5.1f}% {count:>5}x  {name}")
+        return "\n".join(lines)
+
+
+class HtmlLogger:
+    """Appends the session to `filename` through a long-lived buffered writer.
+
+    The active log is always `filename`; rotated segments become
+    `<stem>.<N>.html` (higher N is newer) and oversized outputs go to
+    `<stem>_spill/seg<N>_<k>.txt`. A log left over from a previous session is
+    rotated out at startup instead of being truncated.
+
+    Every entry is also appended to the JSONL event log `events_file`
+    (default `<stem>.jsonl`, "" to disable), which survives rotation and
+    which `render` turns into paged HTML.
+    """
+
+    def __init__(self, filename="terminal_log.html",
+                 flush_bytes=DEFAULT_FLUSH_BYTES,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 max_entry_chars=DEFAULT_MAX_ENTRY_CHARS,
+                 segment_bytes=DEFAULT_SEGMENT_BYTES,
+                 segment_seconds=DEFAULT_SEGMENT_SECONDS,
+                 keep_segments=DEFAULT_KEEP_SEGMENTS,
+                 events_file=None):
+        self.filename = filename
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.max_entry_chars = max_entry_chars
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.keep_segments = keep_segments
+
+        base, _ = os.path.splitext(filename)
+        self._base = base
+        self.spill_dir = base + "_spill"
+        self.events_file = base + ".jsonl" if events_file is None else events_file
+        self.events = EventLog(self.events_file) if self.events_file else None
+        self.stats = CommandStats()
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._buffered = 0
+        self._spills = 0
+        self._file = None
+        self._closed = False
+
+        self.segment = self._next_segment_number()
+        if os.path.exists(filename) and os.path.getsize(filename) > 0:
+            self._archive_active()
+        self._open_segment()
+
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+        self.log_event("session", pid=os.getpid(), segment=self.segment)
+
+    # --- segments ---
+
+    def _segment_path(self, n):
+        return f"{self._base}.{n}.html"
+
+    def _next_segment_number(self):
+        directory = os.path.dirname(self.filename) or "."
+        prefix = os.path.basename(self._base) + "."
+        numbers = [0]
+        for name in os.listdir(directory):
+            if name.startswith(prefix) and name.endswith(".html"):
+                middle = name[len(prefix):-len(".html")]
+                if middle.isdigit():
+                    numbers.append(int(middle))
+        return max(numbers) + 1
+
+    def _archive_active(self):
+        """Rename the active log to the next numbered segment and prune old ones."""
+        os.replace(self.filename, self._segment_path(self.segment))
+        self.segment += 1
+        self._prune()
+
+    def _prune(self):
+        if self.keep_segments <= 0:
+            return
+        cutoff = self.segment - self.keep_segments
+        directory = os.path.dirname(self.filename) or "."
+        prefix = os.path.basename(self._base) + "."
+        for name in os.listdir(directory):
+            if name.startswith(prefix) and name.endswith(".html"):
+                middle = name[len(prefix):-len(".html")]
+                if middle.isdigit() and int(middle) < cutoff:
+                    os.remove(os.path.join(directory, name))
+        if os.path.isdir(self.spill_dir):
+            for name in os.listdir(self.spill_dir):
+                seg = name[len("seg"):].split("_", 1)[0]
+                if name.startswith("seg") and seg.isdigit() and int(seg) < cutoff:
+                    os.remove(os.path.join(self.spill_dir, name))
+
+    def _open_segment(self):
+        self._file = open(self.filename, "w", encoding="utf-8")
+        self._file.write(HTML_HEADER)
+        if self.segment > 1:
+            prev = os.path.basename(self._segment_path(self.segment - 1))
+            self._file.write(f'    <p><a href="{html.escape(prev)}">&larr; previous segment</a></p>\n')
+        self._file.flush()
+        self._opened_at = time.monotonic()
+        self._spills = 0
+
+    def _rotate_locked(self):
+        self._write_buffer_locked()
+        self._file.write(HTML_FOOTER)
+        self._file.close()
+        self._archive_active()
+        self._open_segment()
+
+    def _needs_rotation(self):
+        if self.segment_bytes and self._file.tell() >= self.segment_bytes:
+            return True
+        return bool(self.segment_seconds) and time.monotonic() - self._opened_at >= self.segment_seconds
+
+    # --- buffered writing ---
+
+    def _write_buffer_locked(self):
+        if self._buffer:
+            self._file.write("".join(self._buffer))
+            self._buffer.clear()
+            self._buffered = 0
+        self._file.flush()
+        if self.events:
+            self.events.flush()
+
+    def flush(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._write_buffer_locked()
+            if self._needs_rotation():
+                self._rotate_locked()
+
+    def _flush_loop(self):
+        while not self._closed:
+            time.sleep(self.flush_interval)
+            if self._buffer or (self.events and self.events._lines):
+                self.flush()
+
+    def _append(self, content, kind=None, **fields):
+        with self._lock:
+            if self._closed:
+                return
+            if kind and self.events:
+                self.events.append(kind, **fields)
+            self._buffer.append(content)
+            self._buffered += len(content)
+            if self._buffered >= self.flush_bytes:
+                self._write_buffer_locked()
+                if self._needs_rotation():
+                    self._rotate_locked()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._write_buffer_locked()
+            self._file.write(HTML_FOOTER)
+            self._file.close()
+            if self.events:
+                self.events.close()
+            self._closed = True
+
+    # --- entries ---
+
+    def log_event(self, kind, **fields):
+        """Record an event in the JSONL log only."""
+        with self._lock:
+            if self._closed or not self.events:
+                return
+            self.events.append(kind, **fields)
+
+    def log_command(self, cmd, returncode, duration, stdout_bytes=0, stderr_bytes=0, usage=None, **fields):
+        """Record a finished command: exit code, wall time, CPU/RSS `usage` and output sizes."""
+        record = {"cmd": cmd, "exit": returncode, "duration_s": round(duration, 3),
+                  "stdout_bytes": stdout_bytes, "stderr_bytes": stderr_bytes}
+        record.update(usage or {})
+        record.update(fields)
+        self.stats.add(record)
+        self.log_event("command", **record)
+
+    def open_spill(self):
+        """Create the next spill file; returns (file, link path relative to the log)."""
+        with self._lock:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            self._spills += 1
+            name = f"seg{self.segment}_{self._spills}.txt"
+        f = open(os.path.join(self.spill_dir, name), "w", encoding="utf-8")
+        return f, f"{os.path.basename(self.spill_dir)}/{name}"
+
+    def log_spill_link(self, rel, label):
+        self._append(f'\n        <div class="spill"><a href="{html.escape(rel)}">{html.escape(label)}</a></div>\n',
+                     "spill", path=rel, label=label)
 
     def log_input(self, cmd):
         ts = datetime.datetime.now().strftime("%H:%M:%S")
@@ -39,27 +457,709 @@ class HtmlLogger:
             <span class="command">{html.escape(cmd)}</span>
         </div>
         """
-        self._append(entry)
+        self._append(entry, "input", cmd=cmd)
 
     def log_output(self, output, is_error=False):
         cls = "error" if is_error else "output"
+        rel = None
+        if self.max_entry_chars and len(output) > self.max_entry_chars:
+            f, rel = self.open_spill()
+            with f:
+                f.write(output)
+            total = len(output)
+            half = self.max_entry_chars // 2
+            output = f"{output[:half]}\n... [{total - 2 * half} chars omitted] ...\n{output[-half:]}"
         entry = f"""
         <div class="{cls}">{html.escape(output)}</div>
         """
-        self._append(entry)
+        self._append(entry, "output", stream="stderr" if is_error else "stdout", text=output,
+                     bytes=len(output.encode("utf-8", "replace")))
+        if rel:
+            self.log_spill_link(rel, f"full output ({total} chars)")
+
+
+class StreamLog:
+    """Logs one command's output in batches while it streams.
+
+    Consecutive chunks from the same stream are merged into one entry. Once
+    the command has logged `max_entry_chars`, the rest goes to a spill file
+    and only a link to it is logged.
+    """
+
+    def __init__(self, logger, batch_chars=LOG_BATCH_CHARS, batch_seconds=LOG_BATCH_SECONDS):
+        self.logger = logger
+        self.batch_chars = batch_chars
+        self.batch_seconds = batch_seconds
+        self.logged = 0
+        self._pending = []
+        self._pending_chars = 0
+        self._pending_error = False
+        self._last = time.monotonic()
+        self._spill = None
+        self._spill_rel = None
+        self._spilled = 0
+        self.bytes = {False: 0, True: 0}  # by is_error
+
+    def add(self, text, is_error=False):
+        self.bytes[is_error] += len(text.encode("utf-8", "replace"))
+        if self._pending and is_error != self._pending_error:
+            self.flush()
+        self._pending.append(text)
+        self._pending_chars += len(text)
+        self._pending_error = is_error
+        if self._pending_chars >= self.batch_chars or time.monotonic() - self._last >= self.batch_seconds:
+            self.flush()
+
+    def flush(self):
+        self._last = time.monotonic()
+        if not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending.clear()
+        self._pending_chars = 0
+
+        cap = self.logger.max_entry_chars
+        if self._spill is None and (not cap or self.logged + len(text) <= cap):
+            self.logger.log_output(text, is_error=self._pending_error)
+            self.logged += len(text)
+            return
+        if self._spill is None:
+            room = cap - self.logged
+            if room > 0:
+                self.logger.log_output(text[:room], is_error=self._pending_error)
+                self.logged += room
+                text = text[room:]
+            self._spill, self._spill_rel = self.logger.open_spill()
+        self._spill.write(text)
+        self._spilled += len(text)
+
+    def close(self):
+        self.flush()
+        if self._spill is not None:
+            self._spill.close()
+            self.logger.log_spill_link(self._spill_rel, f"remaining output ({self._spilled} chars)")
+            self._spill = None
+
+
+def _pump(pipe, is_error, events):
+    """Forward raw chunks from `pipe` to `events` as (is_error, text); None marks EOF."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    fd = pipe.fileno()
+    try:
+        while True:
+            data = os.read(fd, READ_CHUNK)
+            if not data:
+                break
+            text = decoder.decode(data)
+            if text:
+                events.put((is_error, text))
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            events.put((is_error, tail))
+    finally:
+        pipe.close()
+        events.put((is_error, None))
+
+
+def _queued_chunks(events, streams, timeout):
+    """Yield (is_error, text) from `events` until `streams` EOFs; None on idle ticks."""
+    while streams:
+        try:
+            is_error, text = events.get(timeout=timeout)
+        except queue.Empty:
+            yield None
+            continue
+        if text is None:
+            streams -= 1
+            continue
+        yield is_error, text
+
+
+def _stream_output(chunks, logger):
+    """Echo chunks to our stdout as they arrive and log them in batches.
+
+    Returns (stdout bytes, stderr bytes).
+    """
+    stream = StreamLog(logger)
+    at_line_start = True
+    try:
+        for item in chunks:
+            if item is None:
+                stream.flush()
+                continue
+            is_error, text = item
+            sys.stdout.write(text)
+            sys.stdout.flush()
+            at_line_start = text.endswith("\n")
+            stream.add(text, is_error)
+    finally:
+        stream.close()
+        if not at_line_start:
+            sys.stdout.write("\n")
+    return stream.bytes[False], stream.bytes[True]
+
+
+def _log_exit(logger, returncode):
+    if returncode != 0:
+        logger.log_output(f"[exit {returncode}]", is_error=True)
+
+
+def run_command(cmd, logger):
+    """Run `cmd` in a fresh system shell, echoing and logging output as it arrives.
+
+    stdout and stderr are read by one thread each into a shared queue, so the
+    echo keeps their interleaving. Returns the exit code.
+    """
+    started = time.monotonic()
+    # Use shell=True to allow complex commands (dir, echo, etc)
+    proc = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    events = queue.Queue()
+    for pipe, is_error in ((proc.stdout, False), (proc.stderr, True)):
+        threading.Thread(target=_pump, args=(pipe, is_error, events), daemon=True).start()
+    try:
+        out_bytes, err_bytes = _stream_output(_queued_chunks(events, 2, LOG_BATCH_SECONDS), logger)
+        returncode, usage = wait_with_usage(proc)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+    _log_exit(logger, returncode)
+    logger.log_command(cmd, returncode, time.monotonic() - started, out_bytes, err_bytes, usage)
+    return returncode
+
+
+def _partial_suffix(text, marker):
+    """Length of the longest suffix of `text` that is a proper prefix of `marker`."""
+    for k in range(min(len(text), len(marker) - 1), 0, -1):
+        if text.endswith(marker[:k]):
+            return k
+    return 0
+
+
+_TIMES_RE = re.compile(r"^(?:(\d+)m)?(\d+(?:[.,]\d*)?)s$")
+
+
+def _parse_times(value):
+    """Seconds from a `times` field such as '1m2.500s'; None if unparseable."""
+    m = _TIMES_RE.match(value)
+    if not m:
+        return None
+    return int(m.group(1) or 0) * 60 + float(m.group(2).replace(",", "."))
+
+
+class PersistentShell:
+    """One long-lived POSIX shell that runs every command.
+
+    `cd`, exported variables and activated virtualenvs carry over between
+    commands, and no shell is spawned per command. Each command is followed
+    by a unique sentinel on both streams, carrying the exit code and `$PWD`
+    on stdout, so completion is detected without closing the pipes. Commands
+    run with stdin from /dev/null so they cannot swallow the framing.
+
+    The frame also carries the shell's cumulative child CPU time from the
+    `times` builtin (written to a scratch file, so nothing forks); per-command
+    user/sys CPU is its delta. Max RSS is not available in this mode.
+    """
+
+    def __init__(self, shell=None):
+        self.shell = shell or ("/bin/bash" if os.path.exists("/bin/bash") else "/bin/sh")
+        self.cwd = os.getcwd()
+        fd, self._times_file = tempfile.mkstemp(prefix="html_term_times_")
+        os.close(fd)
+        self._start()
+
+    def _start(self):
+        self.proc = subprocess.Popen(
+            [self.shell], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=self.cwd
+        )
+        self._events = queue.Queue()
+        for pipe, is_error in ((self.proc.stdout, False), (self.proc.stderr, True)):
+            threading.Thread(target=_pump, args=(pipe, is_error, self._events), daemon=True).start()
+        self._child_cpu = (0.0, 0.0)
+
+    def _framed(self, cmd, sentinel):
+        # eval keeps a syntax error in `cmd` from eating the sentinel lines
+        times_file = shlex.quote(self._times_file)
+        return (
+            f"eval {shlex.quote(cmd)} < /dev/null\n"
+            f"__htrc=$?\n"
+            f"times > {times_file}\n"
+            f"{{ read __htself; read __htcu __htcs; }} < {times_file}\n"
+            f"printf '%s %s %s %s %s\\n' '{sentinel}' \"$__htrc\" \"$__htcu\" \"$__htcs\" \"$PWD\"\n"
+            f"printf '%s\\n' '{sentinel}' >&2\n"
+        )
+
+    def _chunks(self, marker, status):
+        """Yield output up to `marker` on both streams; fills `status` from the stdout frame."""
+        carry = {False: "", True: ""}
+        done = {False: False, True: False}
+        while not (done[False] and done[True]):
+            try:
+                is_error, text = self._events.get(timeout=LOG_BATCH_SECONDS)
+            except queue.Empty:
+                yield None
+                continue
+            if text is None:
+                # The shell itself exited (e.g. `exit 3`); flush what is left.
+                done[is_error] = True
+                if carry[is_error]:
+                    yield is_error, carry[is_error]
+                    carry[is_error] = ""
+                continue
+            buf = carry[is_error] + text
+            idx = buf.find(marker)
+            if idx >= 0:
+                frame, sep, _ = buf[idx + len(marker):].partition("\n")
+                if not sep:
+                    carry[is_error] = buf  # frame line not complete yet
+                    continue
+                if buf[:idx]:
+                    yield is_error, buf[:idx]
+                if not is_error:
+                    code, cpu_user, cpu_sys, cwd = (frame.strip().split(" ", 3) + ["", "", ""])[:4]
+                    status["returncode"] = int(code) if code.lstrip("-").isdigit() else 1
+                    status["cpu"] = (_parse_times(cpu_user), _parse_times(cpu_sys))
+                    status["cwd"] = cwd
+                carry[is_error] = ""
+                done[is_error] = True
+                continue
+            # Hold back only what could be the start of a split marker.
+            keep = _partial_suffix(buf, marker)
+            if len(buf) > keep:
+                yield is_error, buf[:len(buf) - keep]
+            carry[is_error] = buf[len(buf) - keep:]
+
+    def run(self, cmd, logger):
+        """Run `cmd` in the shell, streaming output like `run_command`. Returns the exit code."""
+        sentinel = f"__HTML_TERM_{uuid.uuid4().hex}__"
+        status = {}
+        started = time.monotonic()
+        try:
+            self.proc.stdin.write(self._framed(cmd, sentinel).encode("utf-8"))
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError):
+            pass  # shell is gone; _chunks sees EOF and we restart below
+        out_bytes, err_bytes = _stream_output(self._chunks(sentinel, status), logger)
+
+        usage = None
+        if "returncode" in status:
+            returncode = status["returncode"]
+            self.cwd = status.get("cwd") or self.cwd
+            cpu = status["cpu"]
+            if None not in cpu:
+                usage = {"user_s": round(max(0.0, cpu[0] - self._child_cpu[0]), 3),
+                         "sys_s": round(max(0.0, cpu[1] - self._child_cpu[1]), 3)}
+                self._child_cpu = cpu
+        else:
+            returncode = self.proc.wait()
+            print(f"[shell exited with {returncode}; restarted in {self.cwd}]")
+            self._start()
+        _log_exit(logger, returncode)
+        logger.log_command(cmd, returncode, time.monotonic() - started, out_bytes, err_bytes, usage, cwd=self.cwd)
+        return returncode
+
+    def close(self):
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=2)
+        except Exception:
+            self.proc.kill()
+        try:
+            os.remove(self._times_file)
+        except OSError:
+            pass
+
+
+class Job:
+    """A command started with a trailing `&`.
+
+    Its output is collected into an in-memory buffer instead of being echoed,
+    so the prompt comes back at once. `take_output` hands over (and clears)
+    what has not been shown yet; past `buffer_chars` the oldest unread output
+    is dropped and counted.
+    """
+
+    def __init__(self, job_id, cmd, cwd=None, buffer_chars=DEFAULT_JOB_BUFFER_CHARS, logger=None):
+        self.id = job_id
+        self.cmd = cmd
+        self.logger = logger
+        self.buffer_chars = buffer_chars
+        # Own session/process group, so `kill %N` reaches the whole pipeline.
+        extra = {} if os.name == "nt" else {"start_new_session": True}
+        self.proc = subprocess.Popen(
+            cmd, shell=True, cwd=cwd,
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **extra
+        )
+        self.started = time.monotonic()
+        self.ended = None
+        self.returncode = None
+        self.total_chars = 0
+        self.bytes = {False: 0, True: 0}  # by is_error
+        self.dropped = 0
+        self.notified = False
+        self._unread = []
+        self._unread_chars = 0
+        self._cond = threading.Condition()
+        events = queue.Queue()
+        for pipe, is_error in ((self.proc.stdout, False), (self.proc.stderr, True)):
+            threading.Thread(target=_pump, args=(pipe, is_error, events), daemon=True).start()
+        threading.Thread(target=self._collect, args=(events,), daemon=True).start()
+
+    def _collect(self, events):
+        for is_error, text in _queued_chunks(events, 2, None):
+            with self._cond:
+                self._unread.append((is_error, text))
+                self._unread_chars += len(text)
+                self.total_chars += len(text)
+                self.bytes[is_error] += len(text.encode("utf-8", "replace"))
+                while self._unread_chars > self.buffer_chars and len(self._unread) > 1:
+                    _, old = self._unread.pop(0)
+                    self._unread_chars -= len(old)
+                    self.dropped += len(old)
+                self._cond.notify_all()
+        returncode, usage = wait_with_usage(self.proc)
+        with self._cond:
+            self.returncode = returncode
+            self.ended = time.monotonic()
+            self._cond.notify_all()
+        if self.logger:
+            self.logger.log_command(self.cmd, returncode, self.ended - self.started,
+                                    self.bytes[False], self.bytes[True], usage, job=self.id)
+
+    @property
+    def done(self):
+        return self.returncode is not None
+
+    @property
+    def unread_chars(self):
+        return self._unread_chars
+
+    def wait(self, timeout=None):
+        """Block until the job finishes or new output arrives; returns `done`."""
+        with self._cond:
+            if not self.done and not self._unread:
+                self._cond.wait(timeout)
+            return self.done
+
+    def take_output(self):
+        """Return (chars dropped, [(is_error, text), ...]) not shown yet, and clear them."""
+        with self._cond:
+            chunks, dropped = self._unread, self.dropped
+            self._unread, self._unread_chars, self.dropped = [], 0, 0
+            return dropped, chunks
+
+    def kill(self):
+        if self.done:
+            return
+        try:
+            if os.name == "nt":
+                self.proc.terminate()
+            else:
+                os.killpg(self.proc.pid, signal.SIGTERM)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def status_line(self):
+        if not self.done:
+            state = f"Running {time.monotonic() - self.started:.0f}s"
+        elif self.returncode == 0:
+            state = f"Done {self.ended - self.started:.1f}s"
+        elif self.returncode < 0:
+            state = f"Killed (signal {-self.returncode})"
+        else:
+            state = f"Exit {self.returncode}"
+        return f"[{self.id}] {state}  {self.cmd}"
+
+
+def split_background(cmd):
+    """('cmd', True) for 'cmd &'; `&&` and an escaped `\\&` are not a background marker."""
+    if cmd.endswith("&") and not cmd.endswith("&&") and not cmd.endswith("\\&"):
+        return cmd[:-1].rstrip(), True
+    return cmd, False
+
+
+class JobTable:
+    """Background jobs of one session, numbered like a shell's (%1, %2, ...)."""
+
+    def __init__(self, buffer_chars=DEFAULT_JOB_BUFFER_CHARS, logger=None):
+        self.buffer_chars = buffer_chars
+        self.logger = logger
+        self.jobs = {}
+        self._next_id = 1
+
+    def start(self, cmd, cwd=None):
+        job = Job(self._next_id, cmd, cwd=cwd, buffer_chars=self.buffer_chars, logger=self.logger)
+        self.jobs[job.id] = job
+        self._next_id += 1
+        return job
+
+    def resolve(self, spec):
+        """Job for '%N' or 'N'; raises KeyError with a message otherwise."""
+        key = spec[1:] if spec.startswith("%") else spec
+        if key.isdigit() and int(key) in self.jobs:
+            return self.jobs[int(key)]
+        raise KeyError(f"no such job: {spec}")
+
+    def completion_notices(self):
+        """Status lines for jobs that finished since the last prompt.
+
+        A finished job is forgotten once it has been announced and its output
+        has been read, as a shell forgets reported jobs.
+        """
+        lines = []
+        for job in list(self.jobs.values()):
+            if job.done and not job.notified:
+                job.notified = True
+                line = job.status_line()
+                if job.unread_chars:
+                    line += f"  ({job.unread_chars} chars of output; 'wait %{job.id}' to show)"
+                lines.append(line)
+            if job.done and job.notified and not job.unread_chars:
+                del self.jobs[job.id]
+        return lines
+
+    def close(self):
+        for job in self.jobs.values():
+            job.kill()
+
+
+def _job_chunks(job):
+    """Yield a job's unread output, then anything new until it finishes."""
+    while True:
+        finished = job.wait(LOG_BATCH_SECONDS)
+        dropped, chunks = job.take_output()
+        if dropped:
+            yield True, f"[... {dropped} earlier chars dropped ...]\n"
+        yield from chunks
+        if finished:
+            return
+        yield None
+
+
+def run_builtin(cmd, jobs, logger):
+    """Handle `jobs`, `wait [%N ...]`, `kill %N ...`, `output %N ...` and `stats [N]`.
+
+    Returns False when `cmd` is not one of them; `kill` and `output` with
+    plain PIDs or names are left to the shell.
+    """
+    try:
+        name, *args = shlex.split(cmd)
+    except ValueError:
+        return False
+    if name == "stats" and len(args) <= 1:
+        top = int(args[0]) if args and args[0].isdigit() else DEFAULT_STATS_TOP
+        _print_logged(logger.stats.summary(top), logger)
+        return True
+    if name == "jobs" and not args:
+        lines = [job.status_line() for job in jobs.jobs.values()] or ["no background jobs"]
+        _print_logged("\n".join(lines), logger)
+        return True
+    if name == "wait" or (name in ("kill", "output") and args and all(a.startswith("%") for a in args)):
+        try:
+            targets = [jobs.resolve(a) for a in args] if args else list(jobs.jobs.values())
+        except KeyError as e:
+            _print_logged(f"{name}: {e.args[0]}", logger, is_error=True)
+            return True
+        for job in targets:
+            if name == "kill":
+                job.kill()
+                continue
+            if name == "wait":
+                _stream_output(_job_chunks(job), logger)
+                job.notified = True
+                _print_logged(job.status_line(), logger)
+                del jobs.jobs[job.id]
+            else:
+                dropped, chunks = job.take_output()
+                if dropped:
+                    chunks.insert(0, (True, f"[... {dropped} earlier chars dropped ...]\n"))
+                _stream_output(iter(chunks), logger)
+        return True
+    return False
+
 
-    def _append(self, content):
-        with open(self.filename, "a", encoding="utf-8") as f:
-            f.write(content)
+def _print_logged(text, logger, is_error=False):
+    print(text)
+    logger.log_output(text, is_error=is_error)
 
-def main():
-    logger = HtmlLogger()
+
+def _page_name(n):
+    return f"page_{n:05d}.html"
+
+
+def _page_nav(n, pages):
+    links = ['<a href="index.html">index</a>']
+    if n > 1:
+        links += [f'<a href="{_page_name(1)}">first</a>', f'<a href="{_page_name(n - 1)}">&larr; prev</a>']
+    links.append(f"page {n} of {pages}")
+    if n < pages:
+        links += [f'<a href="{_page_name(n + 1)}">next &rarr;</a>', f'<a href="{_page_name(pages)}">last</a>']
+    return f"    <p>{' | '.join(links)}</p>\n"
+
+
+def _render_event(event, link_prefix):
+    kind = event.get("kind")
+    when = datetime.datetime.fromtimestamp(event.get("ts", 0))
+    ts = f'<span class="timestamp">[{when:%H:%M:%S}]</span>'
+    if kind == "input":
+        return (f'    <div>{ts}<span class="prompt">HTML-TERM&gt;</span> '
+                f'<span class="command">{html.escape(event.get("cmd", ""))}</span></div>\n')
+    if kind == "output":
+        cls = "error" if event.get("stream") == "stderr" else "output"
+        return f'    <div class="{cls}">{html.escape(event.get("text", ""))}</div>\n'
+    if kind == "spill":
+        href = html.escape(link_prefix + event.get("path", ""))
+        return f'    <div class="spill"><a href="{href}">{html.escape(event.get("label", ""))}</a></div>\n'
+    if kind == "command":
+        job = f'job %{event["job"]} ' if "job" in event else ""
+        cpu = ""
+        if event.get("user_s") is not None:
+            cpu = f' &middot; {event["user_s"]:.2f}s user {event.get("sys_s", 0):.2f}s sys'
+        if event.get("max_rss_kb") is not None:
+            cpu += f' &middot; {_fmt_rss(event["max_rss_kb"])} rss'
+        return (f'    <div class="timestamp">{job}exit {event.get("exit")} &middot; {event.get("duration_s", 0):.3f}s{cpu} '
+                f'&middot; {event.get("stdout_bytes", 0)} B out &middot; {event.get("stderr_bytes", 0)} B err</div>\n')
+    if kind == "job_start":
+        return f'    <div class="timestamp">{ts}job %{event.get("job")} started (pid {event.get("pid")})</div>\n'
+    if kind == "session":
+        return f"    <h4>Session started {when:%Y-%m-%d %H:%M:%S} (pid {event.get('pid')})</h4>\n"
+    return ""
+
+
+def render_pages(events_path, out_dir=None, page_events=DEFAULT_PAGE_EVENTS, only=None):
+    """Render an event log to `out_dir/page_NNNNN.html` plus an `index.html`.
+
+    `only` is a list of 1-based page numbers (negative counts from the end);
+    by default every page is written. Each page is read through the offset
+    index, so rendering one page of a huge log costs only that page.
+    Returns the paths written.
+    """
+    out_dir = out_dir or os.path.splitext(events_path)[0] + "_pages"
+    os.makedirs(out_dir, exist_ok=True)
+    total = event_count(events_path)
+    pages = max(1, -(-total // page_events))
+    wanted = range(1, pages + 1) if only is None else sorted({n if n > 0 else pages + 1 + n for n in only})
+    # Spill links in events are relative to the log's directory
+    link_prefix = os.path.relpath(os.path.dirname(os.path.abspath(events_path)), os.path.abspath(out_dir))
+    link_prefix = "" if link_prefix == "." else link_prefix.replace(os.sep, "/") + "/"
+
+    written = []
+    for n in wanted:
+        if not 1 <= n <= pages:
+            raise ValueError(f"page {n} out of range (1-{pages})")
+        path = os.path.join(out_dir, _page_name(n))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(HTML_HEADER)
+            f.write(_page_nav(n, pages))
+            for event in read_events(events_path, (n - 1) * page_events, n * page_events):
+                f.write(_render_event(event, link_prefix))
+            f.write(_page_nav(n, pages))
+            f.write(HTML_FOOTER)
+        written.append(path)
+
+    index = os.path.join(out_dir, "index.html")
+    with open(index, "w", encoding="utf-8") as f:
+        f.write(HTML_HEADER)
+        f.write(f"    <p>{total} events in {pages} pages of {page_events}</p>\n")
+        for n in range(1, pages + 1):
+            first = next(read_events(events_path, (n - 1) * page_events, (n - 1) * page_events + 1), None)
+            when = datetime.datetime.fromtimestamp(first["ts"]).strftime("%Y-%m-%d %H:%M:%S") if first else ""
+            f.write(f'    <div><a href="{_page_name(n)}">page {n}</a> <span class="timestamp">{when}</span></div>\n')
+        f.write(HTML_FOOTER)
+    written.append(index)
+    return written
+
+
+def render_main(argv):
+    p = argparse.ArgumentParser(prog="html_terminal.py render",
+                                description="Render a JSONL session log to paged HTML")
+    p.add_argument("events", nargs="?", default="terminal_log.jsonl", help="Event log to render")
+    p.add_argument("--out", help="Output directory (default: <stem>_pages)")
+    p.add_argument("--page-events", type=int, default=DEFAULT_PAGE_EVENTS, help="Events per page")
+    p.add_argument("--page", type=int, action="append",
+                   help="Render only this page (repeatable; -1 = last); default all")
+    args = p.parse_args(argv)
+    if not os.path.exists(args.events):
+        p.error(f"{args.events} not found")
+    if args.page_events <= 0:
+        p.error("--page-events must be positive")
+    try:
+        written = render_pages(args.events, args.out, args.page_events, args.page)
+    except ValueError as e:
+        p.error(str(e))
+    print(f"Wrote {len(written)} files to {os.path.dirname(written[-1]) or '.'}")
+
+
+def stats_main(argv):
+    p = argparse.ArgumentParser(prog="html_terminal.py stats",
+                                description="Summarise the slowest commands in a JSONL session log")
+    p.add_argument("events", nargs="?", default="terminal_log.jsonl", help="Event log to read")
+    p.add_argument("--top", type=int, default=DEFAULT_STATS_TOP, help="Rows to show")
+    args = p.parse_args(argv)
+    if not os.path.exists(args.events):
+        p.error(f"{args.events} not found")
+    stats = CommandStats()
+    for event in read_events(args.events):
+        if event.get("kind") == "command":
+            stats.add({k: v for k, v in event.items() if k not in ("ts", "kind")})
+    print(stats.summary(args.top))
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Shell that records the session to HTML")
+    p.add_argument("--log", default="terminal_log.html", help="Active log file")
+    p.add_argument("--events", help="JSONL event log (default: <log stem>.jsonl; '' to disable)")
+    p.add_argument("--flush-bytes", type=int, default=DEFAULT_FLUSH_BYTES)
+    p.add_argument("--flush-interval", type=float, default=DEFAULT_FLUSH_INTERVAL, help="Seconds")
+    p.add_argument("--max-entry-chars", type=int, default=DEFAULT_MAX_ENTRY_CHARS,
+                   help="Longer outputs are spilled to a side file (0 = never)")
+    p.add_argument("--segment-bytes", type=int, default=DEFAULT_SEGMENT_BYTES, help="Rotate at this size (0 = never)")
+    p.add_argument("--segment-seconds", type=float, default=DEFAULT_SEGMENT_SECONDS, help="Rotate at this age (0 = never)")
+    p.add_argument("--keep-segments", type=int, default=DEFAULT_KEEP_SEGMENTS, help="Rotated segments to keep (0 = all)")
+    p.add_argument("--persistent", action="store_true",
+                   help="Run all commands in one long-lived shell (cd/exports persist; POSIX only)")
+    p.add_argument("--shell", help="Shell for --persistent (default: /bin/bash, else /bin/sh)")
+    p.add_argument("--job-buffer-chars", type=int, default=DEFAULT_JOB_BUFFER_CHARS,
+                   help="Unread output kept per background job")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["render"]:
+        return render_main(argv[1:])
+    if argv[:1] == ["stats"]:
+        return stats_main(argv[1:])
+    args = parse_args(argv)
+    logger = HtmlLogger(
+        args.log,
+        flush_bytes=args.flush_bytes,
+        flush_interval=args.flush_interval,
+        max_entry_chars=args.max_entry_chars,
+        segment_bytes=args.segment_bytes,
+        segment_seconds=args.segment_seconds,
+        keep_segments=args.keep_segments,
+        events_file=args.events,
+    )
+    shell = None
+    if args.persistent and os.name == "nt":
+        print("--persistent needs a POSIX shell; running each command separately.")
+    elif args.persistent:
+        shell = PersistentShell(args.shell)
+    jobs = JobTable(args.job_buffer_chars, logger)
     print("HTML Terminal Shell v1.0")
     print("Type 'exit' to quit.")
-    print("Commands are executed in system shell.")
+    if shell:
+        print(f"Commands are executed in a persistent {shell.shell} session.")
+    else:
+        print("Commands are executed in system shell.")
+    print("End a command with '&' to run it in the background; see 'jobs', 'wait', 'kill %N', 'output %N'.")
+    print("'stats [N]' lists the N slowest commands of this session.")
     
     while True:
         try:
+            for notice in jobs.completion_notices():
+                _print_logged(notice, logger)
             # Force flush to ensure parent process sees prompt
             sys.stdout.write("\nHTML-TERM> ")
             sys.stdout.flush()
@@ -77,23 +1177,19 @@ def main():
             if cmd.lower() in ["exit", "quit"]:
                 break
             
-            # Execute command
+            # Execute command, streaming its output
             try:
-                # Use shell=True to allow complex commands (dir, echo, etc)
-                result = subprocess.run(
-                    cmd, 
-                    shell=True, 
-                    capture_output=True, 
-                    text=True
-                )
-                
-                output = result.stdout
-                if result.stderr:
-                    output += "\n[STDERR]\n" + result.stderr
-                    
-                print(output)
-                logger.log_output(output, is_error=(result.returncode != 0))
-                
+                cmd, background = split_background(cmd)
+                if background and cmd:
+                    job = jobs.start(cmd, cwd=shell.cwd if shell else None)
+                    _print_logged(f"[{job.id}] {job.proc.pid}", logger)
+                    logger.log_event("job_start", job=job.id, pid=job.proc.pid, cmd=cmd)
+                elif run_builtin(cmd, jobs, logger):
+                    pass
+                elif shell:
+                    shell.run(cmd, logger)
+                else:
+                    run_command(cmd, logger)
             except Exception as e:
                 err_msg = f"Error executing command: {e}"
                 print(err_msg)
@@ -104,9 +1200,11 @@ def main():
         except KeyboardInterrupt:
             break
 
-    # Close HTML tag
-    with open(logger.filename, "a", encoding="utf-8") as f:
-        f.write("</body></html>")
+    jobs.close()
+    if shell:
+        shell.close()
+    # Flush what is buffered and close the HTML tag
+    logger.close()
 
 if __name__ == "__main__":
     main()
@@ -2,9 +2,14 @@
 """
 Improvements Manager - RLM Style
 Combines task tracking (JSON) with codebase scanning capabilities (REPL/Exec).
+
+Usable as a CLI (add --json for machine-readable output) or imported as a
+library via ImprovementsStore. Large trackers can live in SQLite instead
+(init --backend sqlite, or SqliteImprovementsStore).
 """
 
 import argparse
+import copy
 import json
 import os
 import sys
@@ -14,28 +19,60 @@ import pickle
 import glob
 import subprocess
 import shutil
+import hashlib
+import sqlite3
+import threading
+import time
+import multiprocessing
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from contextlib import redirect_stdout, redirect_stderr
+from typing import Any, Dict, List, Optional
+from contextlib import contextmanager, redirect_stdout, redirect_stderr
 import io
 import traceback
 
 # Constants
 IMPROVEMENTS_FILE = 'improvements.json'
+IMPROVEMENTS_DB = 'improvements.db'
 STATE_FILE = Path(".flexi/improvements_state.pkl")
+TODO_PATTERN = r"TODO[:\s]?.+"
+# Per-file scan results, relative to the codebase root
+SCAN_CACHE_FILE = Path(".flexi/scan_cache.json")
+# Changed files are scanned in a process pool once there are this many
+SCAN_PARALLEL_MIN_FILES = 64
+# Never descended into by CodebaseUtils (virtualenvs are also detected by pyvenv.cfg)
+DEFAULT_IGNORED_DIRS = frozenset({
+    ".git", ".hg", ".svn", ".flexi", "node_modules", "__pycache__", ".venv", "venv",
+    ".tox", ".nox", ".mypy_cache", ".pytest_cache", ".ruff_cache", ".eggs", "site-packages",
+})
+# Additionally skipped by scan and prune
+SCAN_EXCLUDED_DIRS = frozenset({"scripts"})
+# A NUL byte in this many leading bytes marks a file as binary (as git does)
+BINARY_SNIFF_BYTES = 8000
 
 # --- DATA MANAGEMENT ---
 
+class TrackerError(RuntimeError):
+    """The tracker file could not be read; it is left untouched."""
+
+def new_data():
+    return {"meta": {"version": "2.0", "generated_at": datetime.now().isoformat()}, "items": []}
+
 def load_data(json_path):
     if not os.path.exists(json_path):
-        return {"meta": {"version": "2.0", "generated_at": datetime.now().isoformat()}, "items": []}
+        return new_data()
     
     try:
         with open(json_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
-    except json.JSONDecodeError:
-        print(f"Error: Invalid JSON file at {json_path}.")
-        return {"items": []}
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        # Never hand back an empty tracker: the next save would overwrite the file with it
+        raise TrackerError(f"Invalid JSON file at {json_path}: {e}") from e
+    if not isinstance(data, dict):
+        raise TrackerError(f"Invalid JSON file at {json_path}: expected an object")
 
     if "items" not in data:
         data["items"] = []
@@ -68,40 +105,955 @@ def load_state():
     except Exception:
         return {}
 
-def save_state(state):
-    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with STATE_FILE.open("wb") as f:
+def save_state(state, state_file=None):
+    state_file = Path(state_file) if state_file else STATE_FILE
+    state_file.parent.mkdir(parents=True, exist_ok=True)
+    with state_file.open("wb") as f:
         pickle.dump(state, f)
 
+# --- LIBRARY API ---
+# Typed, in-process access to the tracker. The CLI commands below are thin
+# wrappers around ImprovementsStore; main.py's TaskManager uses it directly.
+
+ITEM_FIELDS = ("id", "title", "status", "created_at", "updated_at", "source")
+
+@dataclass
+class Item:
+    id: str
+    title: str
+    status: str
+    created_at: str = ""
+    updated_at: str = ""
+    source: str = "manual"
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, d):
+        known = {k: d[k] for k in ITEM_FIELDS if k in d}
+        extra = {k: v for k, v in d.items() if k not in ITEM_FIELDS}
+        return cls(extra=extra, **known)
+
+    def to_dict(self):
+        d = {k: getattr(self, k) for k in ITEM_FIELDS}
+        d.update(self.extra)
+        return d
+
+@dataclass
+class Result:
+    ok: bool
+    message: str
+    item: Optional[Item] = None
+
+    def to_dict(self):
+        return {"ok": self.ok, "message": self.message, "item": self.item.to_dict() if self.item else None}
+
+class ImprovementsStore:
+    """The improvements.json tracker as a library.
+
+    The parsed file is kept in memory and only re-read when its mtime or size
+    changes, so repeated queries (e.g. once per orchestrator step) cost a stat.
+    A file that cannot be parsed raises TrackerError and is never written over.
+    """
+    def __init__(self, json_path, root=None):
+        self.json_path = Path(json_path)
+        self.root = Path(root) if root else self.json_path.parent
+        self._data = None
+        self._stamp = None
+
+    def _file_stamp(self):
+        try:
+            st = self.json_path.stat()
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _load(self):
+        stamp = self._file_stamp()
+        if self._data is None or stamp != self._stamp:
+            self._data = load_data(str(self.json_path))
+            self._data.setdefault("meta", {"version": "2.0", "generated_at": datetime.now().isoformat()})
+            self._stamp = stamp
+        return self._data
+
+    def _save(self):
+        save_data(self._data, str(self.json_path))
+        self._stamp = self._file_stamp()
+
+    def list(self, status=None, search=None) -> List[Item]:
+        items = self._load()["items"]
+        if status:
+            items = [i for i in items if i["status"] == status]
+        if search:
+            query = search.lower()
+            items = [i for i in items if query in i["title"].lower()]
+        return [Item.from_dict(i) for i in items]
+
+    def get(self, item_id) -> Optional[Item]:
+        for i in self._load()["items"]:
+            if i["id"] == item_id:
+                return Item.from_dict(i)
+        return None
+
+    def add(self, title, status="suggestion", source="manual") -> Item:
+        data = self._load()
+        item = create_item_dict(title, status, source)
+        data["items"].append(item)
+        self._save()
+        return Item.from_dict(item)
+
+    def next(self, item_id=None) -> Result:
+        """Move a suggestion (the first one, or `item_id`) to in_progress."""
+        data = self._load()
+
+        # 1. Check if we are already working on something
+        in_progress = [i for i in data["items"] if i["status"] == "in_progress"]
+        if in_progress:
+            return Result(False, f"Already working on: {in_progress[0]['title']} ({in_progress[0]['id']})",
+                          Item.from_dict(in_progress[0]))
+
+        # 2. Find next suggestion
+        suggestions = [i for i in data["items"] if i["status"] == "suggestion"
+                       and (item_id is None or i["id"] == item_id)]
+        if not suggestions:
+            if item_id:
+                return Result(False, f"Suggestion {item_id} not found.")
+            return Result(False, "No suggestions pending. Good job!")
+
+        next_item = suggestions[0]
+        next_item["status"] = "in_progress"
+        next_item["updated_at"] = datetime.now().isoformat()
+        self._save()
+        return Result(True, f"Picked up: {next_item['title']} ({next_item['id']})", Item.from_dict(next_item))
+
+    def resolve(self, item_id=None, status="completed") -> Result:
+        data = self._load()
+
+        target_id = item_id
+        # If no ID and one item is in progress, resolve that one
+        if not target_id:
+            in_progress = [i for i in data["items"] if i["status"] == "in_progress"]
+            if len(in_progress) == 1:
+                target_id = in_progress[0]["id"]
+
+        if not target_id:
+            return Result(False, "Please specify ID or have exactly one item in progress.")
+
+        for item in data["items"]:
+            if item["id"] == target_id:
+                item["status"] = status
+                item["updated_at"] = datetime.now().isoformat()
+                self._save()
+                return Result(True, f"Item {target_id} marked as {status}", Item.from_dict(item))
+
+        return Result(False, f"Item {target_id} not found.")
+
+    def scan(self, workers=None, use_cache=True) -> List[Item]:
+        """Add a suggestion for every new TODO in the codebase. Returns the added items."""
+        data = self._load()
+        titles = {i["title"] for i in data["items"]}
+        new = scan_items(self.root, titles.__contains__, workers, use_cache)
+        if new:
+            data["items"].extend(new)
+            self._save()
+        return [Item.from_dict(i) for i in new]
+
+    def prune(self, verbose=False) -> List[Item]:
+        """Remove scanned suggestions whose TODO text no longer exists. Returns the removed items."""
+        data = self._load()
+        candidates = [i for i in data["items"] if i.get("source") == "scan" and i["status"] == "suggestion"]
+        stale = stale_scan_items(self.root, candidates, verbose)
+        if stale:
+            stale_ids = {i["id"] for i in stale}
+            data["items"] = [i for i in data["items"] if i["id"] not in stale_ids]
+            self._save()
+        return [Item.from_dict(i) for i in stale]
+
+    def export_data(self):
+        """The tracker in improvements.json form."""
+        return self._load()
+
+    def import_data(self, data, replace=False):
+        """Merge (or with `replace`, substitute) items in improvements.json form."""
+        current = self._load()
+        if replace:
+            current["items"] = list(data.get("items", []))
+        else:
+            by_id = {i["id"]: n for n, i in enumerate(current["items"])}
+            for item in data.get("items", []):
+                if item["id"] in by_id:
+                    current["items"][by_id[item["id"]]] = item
+                else:
+                    by_id[item["id"]] = len(current["items"])
+                    current["items"].append(item)
+        self._save()
+
+    def apply_changes(self, upsert=(), delete=()):
+        """Write the `upsert` items (by id, new ones appended) and drop the `delete` ids.
+
+        Items not mentioned keep whatever is on disk now.
+        """
+        data = self._load()
+        delete = set(delete)
+        by_id = {i["id"]: i for i in upsert}
+        items = [by_id.pop(i["id"], i) for i in data["items"] if i["id"] not in delete]
+        data["items"] = items + list(by_id.values())
+        self._save()
+
+# --- SCAN HELPERS ---
+# Shared by both stores: finding TODOs and checking scanned items against the code.
+
+def todo_title(content):
+    return f"TODO: {content.strip()}"
+
+_matchers = {}
+
+def _scan_file(path, pattern, known_sha1=None):
+    """(sha1, hits) for one file, matching like CodebaseUtils.grep.
+
+    hits is None when the content hash equals `known_sha1` (touched but
+    unchanged); sha1 is None when the file cannot be read.
+    """
+    try:
+        data = Path(path).read_bytes()
+    except OSError:
+        return None, []
+    digest = hashlib.sha1(data).hexdigest()
+    if digest == known_sha1:
+        return digest, None
+    if is_binary(data):
+        return digest, []
+    matcher = _matchers.get(pattern) or _matchers.setdefault(pattern, MultiMatcher([pattern]))
+    hits = [{"line": lineno, "column": column, "content": line.strip()}
+            for lineno, column, _, line in matcher.match_buffer(data)]
+    return digest, hits
+
+def _scan_file_job(job):
+    return _scan_file(*job)
+
+class ScanCache:
+    """TODO hits per file, keyed by path relative to the root.
+
+    A file is rescanned only when its (mtime, size) changed; if its content
+    hash is still the same, the old hits are kept without running the regex.
+    Files modified within a couple of seconds of the previous scan are
+    re-hashed anyway, since a same-tick edit would not change the mtime.
+    """
+    RACY_NS = 2_000_000_000
+    VERSION = 2
+
+    def __init__(self, root, path=SCAN_CACHE_FILE, pattern=TODO_PATTERN):
+        self.path = Path(root) / path
+        self.pattern = pattern
+        self.files = {}
+        self.scanned_at_ns = 0
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("pattern") == pattern and data.get("version") == self.VERSION:
+                self.files = data.get("files", {})
+                self.scanned_at_ns = data.get("scanned_at_ns", 0)
+        except (OSError, ValueError):
+            pass
+
+    def fresh(self, rel, mtime_ns, size):
+        entry = self.files.get(rel)
+        return (entry is not None and entry["mtime_ns"] == mtime_ns and entry["size"] == size
+                and mtime_ns < self.scanned_at_ns - self.RACY_NS)
+
+    def save(self, scanned_at_ns):
+        self.scanned_at_ns = scanned_at_ns
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "pattern": self.pattern,
+                       "scanned_at_ns": scanned_at_ns, "files": self.files}, f)
+        os.replace(tmp, self.path)
+
+def _available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+def scan_todos(root, workers=None, use_cache=True):
+    """TODO hits ({"file", "line", "column", "content"}) in the root's *.py files.
+
+    Files are found with walk_files, skipping DEFAULT_IGNORED_DIRS,
+    SCAN_EXCLUDED_DIRS and .gitignored paths.
+
+    Unchanged files are answered from the ScanCache; changed ones are scanned
+    in a process pool when there are at least SCAN_PARALLEL_MIN_FILES of them
+    (`workers` = pool size, default one per CPU; 1 scans in-process).
+    """
+    root = Path(root)
+    started_ns = time.time_ns()
+    cache = ScanCache(root) if use_cache else None
+
+    files = {}
+    for path, rel in walk_files(root, DEFAULT_IGNORED_DIRS | SCAN_EXCLUDED_DIRS):
+        if not rel.endswith(".py"):
+            continue
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        files[rel] = (path, st.st_mtime_ns, st.st_size)
+
+    results = {}
+    changed = []
+    for rel, (_, mtime_ns, size) in files.items():
+        if cache and cache.fresh(rel, mtime_ns, size):
+            results[rel] = cache.files[rel]
+        else:
+            changed.append(rel)
+
+    jobs = [(files[rel][0], TODO_PATTERN, cache.files.get(rel, {}).get("sha1") if cache else None)
+            for rel in changed]
+    workers = workers or _available_cpus()
+    if workers > 1 and len(jobs) >= SCAN_PARALLEL_MIN_FILES:
+        # spawn, not fork: the orchestrator calls this from a process with live
+        # threads (dispatcher, tracer), and a forked child can inherit a held lock
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            scanned = list(pool.map(_scan_file_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    else:
+        scanned = [_scan_file(*job) for job in jobs]
+
+    for rel, (digest, hits) in zip(changed, scanned):
+        if digest is None:
+            continue
+        if hits is None:
+            hits = cache.files[rel]["hits"]
+        _, mtime_ns, size = files[rel]
+        results[rel] = {"mtime_ns": mtime_ns, "size": size, "sha1": digest, "hits": hits}
+
+    if cache is not None and (changed or len(results) != len(cache.files)):
+        cache.files = results
+        cache.save(started_ns)
+
+    return [
+        {"file": files[rel][0], "line": hit["line"], "column": hit["column"], "content": hit["content"]}
+        for rel in files if rel in results
+        for hit in results[rel]["hits"]
+    ]
+
+def scan_items(root, is_known, workers=None, use_cache=True):
+    """New scan item dicts for TODOs under `root` whose titles `is_known(title)` rejects.
+
+    A TODO repeated in several places is only added once.
+    """
+    new = []
+    added = set()
+
+    for hit in scan_todos(root, workers, use_cache):
+        title = todo_title(hit['content'])
+        if title in added or is_known(title):
+            continue
+        added.add(title)
+        item = create_item_dict(title, "suggestion", "scan")
+        item["source_file"] = os.path.relpath(hit["file"], root)
+        item["source_line"] = hit["line"]
+        new.append(item)
+    return new
+
+class AhoCorasick:
+    """Which of many literal strings occur in a text, found in one pass over it."""
+    def __init__(self, needles):
+        self.needles = list(needles)
+        self._goto = [{}]
+        self._out = [[]]
+        for index, needle in enumerate(self.needles):
+            state = 0
+            for ch in needle:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(index)
+
+        # Failure links, breadth first; outputs inherit those of their failure state
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def occurring(self, text, found=None):
+        """Indices of needles that occur in `text` (added to `found` if given)."""
+        found = set() if found is None else found
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+def stale_scan_items(root, candidates, verbose=False):
+    """The item dicts in `candidates` whose TODO text no longer occurs in the codebase.
+
+    A scanned item's text contains a TODO match, so it still occurs exactly
+    when it is part of some line that scan_todos reports. One (cached,
+    incremental) scan therefore answers every item. Each item is checked
+    first against its own source file's hits, and the rest with an
+    Aho-Corasick pass over all hit lines. Texts without a TODO match (e.g.
+    from hand-edited titles) share one combined-regex pass over the files.
+    """
+    by_text = defaultdict(list)
+    for item in candidates:
+        # Extract content from title "TODO: <content>"
+        if item["title"].startswith("TODO: "):
+            by_text[item["title"][6:].strip()].append(item) # len("TODO: ") == 6
+    if not by_text:
+        return []
+
+    hits = scan_todos(root)
+    lines_by_file = defaultdict(set)
+    for hit in hits:
+        lines_by_file[os.path.relpath(hit["file"], root)].add(hit["content"])
+
+    todo = re.compile(TODO_PATTERN)
+    found = set()
+    remaining, other = [], []
+    for text, items in by_text.items():
+        if any(text in lines_by_file.get(i.get("source_file"), ()) for i in items):
+            found.add(text)
+        elif todo.search(text):
+            remaining.append(text)
+        else:
+            other.append(text)
+
+    if remaining:
+        matcher = AhoCorasick(remaining)
+        indices = set()
+        for line in {hit["content"] for hit in hits}:
+            matcher.occurring(line, indices)
+            if len(indices) == len(remaining):
+                break
+        found.update(remaining[i] for i in indices)
+    if other:
+        codebase = CodebaseUtils(root, DEFAULT_IGNORED_DIRS | SCAN_EXCLUDED_DIRS)
+        patterns = {re.escape(t): t for t in other}
+        found.update(patterns[h["pattern"]] for h in codebase.grep_many(list(patterns)))
+
+    stale = []
+    for text, items in by_text.items():
+        if text not in found:
+            for item in items:
+                if verbose:
+                    print(f"Removing stale: {item['title'][:50]}...")
+                stale.append(item)
+    return stale
+
+# --- SQLITE BACKEND ---
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    title_hash TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT,
+    updated_at TEXT,
+    source TEXT,
+    source_file TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS items_status ON items(status);
+CREATE INDEX IF NOT EXISTS items_title_hash ON items(title_hash);
+CREATE INDEX IF NOT EXISTS items_source_file ON items(source_file);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+def title_hash(title):
+    return hashlib.sha1(title.encode("utf-8")).hexdigest()
+
+class SqliteImprovementsStore:
+    """The tracker in a SQLite database; same interface as ImprovementsStore.
+
+    Items keep their JSON insertion order (rowid). Indexes on status, title
+    hash and source file make `next`, dedup and per-file lookups cheap, and
+    every change is a single transaction instead of a rewrite of the whole
+    file. `export_data`/`import_data` (and the export/import commands)
+    convert to and from the improvements.json format.
+    """
+    def __init__(self, db_path, root=None):
+        self.db_path = Path(db_path)
+        self.root = Path(root) if root else self.db_path.parent
+        # Used from worker threads too (asyncio.to_thread); the lock serialises access.
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SQLITE_SCHEMA)
+        if self._meta().get("generated_at") is None:
+            with self._transaction() as conn:
+                self._set_meta(conn, new_data()["meta"])
+
+    def close(self):
+        self._conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so next() cannot race another writer
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._set_meta(self._conn, {"last_updated": datetime.now().isoformat()})
+            self._conn.execute("COMMIT")
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _meta(self):
+        return {row["key"]: json.loads(row["value"]) for row in self._query("SELECT key, value FROM meta")}
+
+    @staticmethod
+    def _set_meta(conn, meta):
+        conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                         [(k, json.dumps(v)) for k, v in meta.items()])
+
+    @staticmethod
+    def _to_row(d):
+        extra = {k: v for k, v in d.items() if k not in ITEM_FIELDS and k != "source_file"}
+        return (d["id"], d["title"], title_hash(d["title"]), d.get("status", "suggestion"),
+                d.get("created_at", ""), d.get("updated_at", ""), d.get("source", "manual"),
+                d.get("source_file"), json.dumps(extra) if extra else None)
+
+    @staticmethod
+    def _to_dict(row):
+        d = {k: row[k] for k in ITEM_FIELDS}
+        if row["source_file"] is not None:
+            d["source_file"] = row["source_file"]
+        if row["extra"]:
+            d.update(json.loads(row["extra"]))
+        return d
+
+    def _item(self, row):
+        return Item.from_dict(self._to_dict(row))
+
+    _INSERT = ("INSERT INTO items (id, title, title_hash, status, created_at, updated_at, source, source_file, extra) "
+               "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+    _UPSERT = _INSERT + (" ON CONFLICT(id) DO UPDATE SET title=excluded.title, title_hash=excluded.title_hash, "
+                         "status=excluded.status, created_at=excluded.created_at, updated_at=excluded.updated_at, "
+                         "source=excluded.source, source_file=excluded.source_file, extra=excluded.extra")
+
+    def list(self, status=None, search=None) -> List[Item]:
+        sql, params = "SELECT * FROM items", []
+        clauses = []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if search:
+            clauses.append("instr(lower(title), ?) > 0")
+            params.append(search.lower())
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return [self._item(r) for r in self._query(sql + " ORDER BY rowid", params)]
+
+    def get(self, item_id) -> Optional[Item]:
+        rows = self._query("SELECT * FROM items WHERE id = ?", (item_id,))
+        return self._item(rows[0]) if rows else None
+
+    def add(self, title, status="suggestion", source="manual") -> Item:
+        item = create_item_dict(title, status, source)
+        with self._transaction() as conn:
+            conn.execute(self._INSERT, self._to_row(item))
+        return Item.from_dict(item)
+
+    def next(self, item_id=None) -> Result:
+        """Move a suggestion (the first one, or `item_id`) to in_progress."""
+        with self._transaction() as conn:
+            current = conn.execute("SELECT * FROM items WHERE status = 'in_progress' ORDER BY rowid LIMIT 1").fetchone()
+            if current:
+                return Result(False, f"Already working on: {current['title']} ({current['id']})", self._item(current))
+
+            if item_id is None:
+                row = conn.execute("SELECT * FROM items WHERE status = 'suggestion' ORDER BY rowid LIMIT 1").fetchone()
+            else:
+                row = conn.execute("SELECT * FROM items WHERE status = 'suggestion' AND id = ?", (item_id,)).fetchone()
+            if not row:
+                if item_id:
+                    return Result(False, f"Suggestion {item_id} not found.")
+                return Result(False, "No suggestions pending. Good job!")
+
+            now = datetime.now().isoformat()
+            conn.execute("UPDATE items SET status = 'in_progress', updated_at = ? WHERE id = ?", (now, row["id"]))
+            item = self._item(row)
+            item.status, item.updated_at = "in_progress", now
+        return Result(True, f"Picked up: {item.title} ({item.id})", item)
+
+    def resolve(self, item_id=None, status="completed") -> Result:
+        with self._transaction() as conn:
+            target_id = item_id
+            # If no ID and one item is in progress, resolve that one
+            if not target_id:
+                in_progress = conn.execute("SELECT id FROM items WHERE status = 'in_progress' LIMIT 2").fetchall()
+                if len(in_progress) == 1:
+                    target_id = in_progress[0]["id"]
+
+            if not target_id:
+                return Result(False, "Please specify ID or have exactly one item in progress.")
+
+            now = datetime.now().isoformat()
+            if not conn.execute("UPDATE items SET status = ?, updated_at = ? WHERE id = ?",
+                                (status, now, target_id)).rowcount:
+                return Result(False, f"Item {target_id} not found.")
+            row = conn.execute("SELECT * FROM items WHERE id = ?", (target_id,)).fetchone()
+        return Result(True, f"Item {target_id} marked as {status}", self._item(row))
+
+    def _has_title(self, title):
+        rows = self._query("SELECT title FROM items WHERE title_hash = ?", (title_hash(title),))
+        return any(r["title"] == title for r in rows)
+
+    def scan(self, workers=None, use_cache=True) -> List[Item]:
+        """Add a suggestion for every new TODO in the codebase. Returns the added items."""
+        new = scan_items(self.root, self._has_title, workers, use_cache)
+        if new:
+            with self._transaction() as conn:
+                conn.executemany(self._INSERT, [self._to_row(i) for i in new])
+        return [Item.from_dict(i) for i in new]
+
+    def prune(self, verbose=False) -> List[Item]:
+        """Remove scanned suggestions whose TODO text no longer exists. Returns the removed items."""
+        candidates = [self._to_dict(r) for r in self._query(
+            "SELECT * FROM items WHERE status = 'suggestion' AND source = 'scan' ORDER BY rowid")]
+        stale = stale_scan_items(self.root, candidates, verbose)
+        if stale:
+            with self._transaction() as conn:
+                conn.executemany("DELETE FROM items WHERE id = ?", [(i["id"],) for i in stale])
+        return [Item.from_dict(i) for i in stale]
+
+    def export_data(self):
+        """The tracker in improvements.json form."""
+        return {"meta": self._meta(),
+                "items": [self._to_dict(r) for r in self._query("SELECT * FROM items ORDER BY rowid")]}
+
+    def import_data(self, data, replace=False):
+        """Merge (or with `replace`, substitute) items in improvements.json form."""
+        with self._transaction() as conn:
+            if replace:
+                conn.execute("DELETE FROM items")
+            conn.executemany(self._UPSERT, [self._to_row(i) for i in data.get("items", [])])
+            meta = {k: v for k, v in data.get("meta", {}).items() if k != "last_updated"}
+            self._set_meta(conn, meta)
+
+    def apply_changes(self, upsert=(), delete=()):
+        """Write the `upsert` items (by id, new ones appended) and drop the `delete` ids.
+
+        One transaction touching only those rows; others keep their current state.
+        """
+        with self._transaction() as conn:
+            conn.executemany("DELETE FROM items WHERE id = ?", [(i,) for i in delete])
+            conn.executemany(self._UPSERT, [self._to_row(i) for i in upsert])
+
+def init_project(path, state_file=None, backend="json"):
+    """Point the tracker at a codebase root and create its improvements.json (or .db) if needed.
+
+    A new SQLite tracker starts with the items of an existing improvements.json.
+    """
+    root = Path(path).resolve()
+    json_path = root / IMPROVEMENTS_FILE
+
+    state = {
+        "root": str(root),
+        "json_path": str(json_path),
+        "backend": backend,
+        "globals": {} # For persistent REPL vars
+    }
+    if backend == "sqlite":
+        db_path = root / IMPROVEMENTS_DB
+        state["db_path"] = str(db_path)
+        created = not db_path.exists()
+        if created:
+            store = SqliteImprovementsStore(db_path, root)
+            if json_path.exists():
+                store.import_data(load_data(json_path))
+            store.close()
+    else:
+        created = not json_path.exists()
+        if created:
+            save_data(load_data(json_path), json_path)
+    save_state(state, state_file)
+    return state, created
+
+def open_store(state):
+    if state.get("backend") == "sqlite":
+        return SqliteImprovementsStore(state["db_path"], state["root"])
+    return ImprovementsStore(state["json_path"], state["root"])
+
+def store_for(root, backend=None):
+    """Open the tracker of `root`: SQLite if `backend` is "sqlite", or if unset and improvements.db exists."""
+    root = Path(root)
+    db_path = root / IMPROVEMENTS_DB
+    if backend == "sqlite" or (backend is None and db_path.exists()):
+        return SqliteImprovementsStore(db_path, root)
+    return ImprovementsStore(root / IMPROVEMENTS_FILE, root)
+
+# --- FILE WALKING AND MATCHING ---
+
+def _glob_to_regex(pattern):
+    """Regex source for a glob where `*`/`?` stay within one path segment and `**` spans any."""
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2:]:
+            end = pattern.index("]", i + 2)
+            body = pattern[i + 1:end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append("[" + body.replace("\\", "\\\\") + "]")
+            i = end + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out)
+
+class GitIgnore:
+    """Rules of one .gitignore, matched against paths relative to its directory.
+
+    Supports comments, `!` negation, trailing `/` (directories only), anchoring
+    by a leading or inner `/`, and `*`, `?`, `[...]` and `**`.
+    """
+    def __init__(self, lines):
+        self.rules = []
+        for raw in lines:
+            line = raw.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            line = line.replace("\\#", "#").replace("\\!", "!")
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            body = _glob_to_regex(line.lstrip("/"))
+            regex = re.compile(("^" if anchored else "(?:^|/)") + body + "$")
+            self.rules.append((regex, negate, dir_only))
+
+    @classmethod
+    def from_file(cls, path):
+        try:
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                return cls(f)
+        except OSError:
+            return None
+
+    def match(self, rel, is_dir):
+        """True/False if a rule decides `rel`, None if none applies (last match wins)."""
+        result = None
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.search(rel):
+                result = not negate
+        return result
+
+def walk_files(root, ignored_dirs=DEFAULT_IGNORED_DIRS, use_gitignore=True):
+    """Yield (path, relative posix path) for files under `root`, in sorted order.
+
+    Ignored directories, virtualenvs and anything matched by .gitignore files
+    (nested ones apply below their directory) are pruned before they are
+    read. Symlinked directories are not followed.
+    """
+    root = os.fspath(root)
+    # (dir rel path, ignore rules in effect there: [(base rel, GitIgnore)])
+    stack = [("", [])]
+    while stack:
+        rel_dir, rules = stack.pop()
+        directory = os.path.join(root, rel_dir) if rel_dir else root
+        if use_gitignore:
+            gi = GitIgnore.from_file(os.path.join(directory, ".gitignore"))
+            if gi and gi.rules:
+                rules = rules + [(rel_dir, gi)]
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if not is_dir and not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            if is_dir and entry.name in ignored_dirs:
+                continue
+            ignored = None
+            for base, gi in rules:
+                decided = gi.match(rel[len(base) + 1:] if base else rel, is_dir)
+                if decided is not None:
+                    ignored = decided
+            if ignored:
+                continue
+            if is_dir:
+                if not os.path.exists(os.path.join(entry.path, "pyvenv.cfg")):
+                    subdirs.append(rel)
+            else:
+                yield entry.path, rel
+        stack.extend((d, rules) for d in reversed(subdirs))
+
+# Line breaks str.splitlines() honours besides "\n"
+_OTHER_LINE_BREAKS = re.compile("[\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+# Lookarounds, \A/\Z and inline flags behave differently (or fail to compile)
+# inside an alternation searched over the whole text
+_NOT_COMBINABLE = re.compile(r"\(\?<?[=!]|\\[AZz]|\(\?[aiLmsux]+[:)-]|\(\?\(")
+
+class MultiMatcher:
+    """Finds lines matching any of several regexes in one pass per file.
+
+    Lines are those of str.splitlines() on the decoded text, so results are
+    exactly those of a line-by-line search. When it is safe, all patterns
+    are combined into one alternation searched over the whole text and only
+    lines where it hits are checked against each pattern. Patterns with
+    groups, backreferences, lookarounds, anchors other than ^/$ or inline
+    flags, and texts with line breaks other than "\n", are searched line by
+    line instead.
+    """
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._compiled = [re.compile(p) for p in self.patterns]
+        self._combined = None
+        if all(regex.groups == 0 and not _NOT_COMBINABLE.search(p)
+               for p, regex in zip(self.patterns, self._compiled)):
+            self._combined = re.compile("|".join(f"(?:{p})" for p in self.patterns), re.MULTILINE)
+
+    def match_text(self, text):
+        """Yield (line number, column, pattern index, line text) for `text`."""
+        if self._combined is None or _OTHER_LINE_BREAKS.search(text):
+            for lineno, line in enumerate(text.splitlines(), 1):
+                for index, regex in enumerate(self._compiled):
+                    hit = regex.search(line)
+                    if hit:
+                        yield lineno, hit.start() + 1, index, line
+            return
+        search = self._combined.search
+        pos = 0
+        counted_to = 0
+        lineno = 1
+        while True:
+            m = search(text, pos)
+            if m is None:
+                return
+            start = text.rfind("\n", 0, m.start()) + 1
+            if start == len(text):
+                return  # after the final newline: not a line for splitlines()
+            end = text.find("\n", m.start())
+            if end < 0:
+                end = len(text)
+            lineno += text.count("\n", counted_to, start)
+            counted_to = start
+            line = text[start:end]
+            for index, regex in enumerate(self._compiled):
+                hit = regex.search(line)
+                if hit:
+                    yield lineno, hit.start() + 1, index, line
+            # A match may run past the line end; resume at the next line so it cannot hide one there
+            pos = end + 1
+            if pos > len(text):
+                return
+
+    def match_buffer(self, buf):
+        """Like match_text for UTF-8 bytes (undecodable bytes are dropped)."""
+        yield from self.match_text(bytes(buf).decode("utf-8", errors="ignore"))
+
+    def match_file(self, path):
+        """Like match_buffer for a file; binary and unreadable files yield nothing."""
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return
+        if not data or is_binary(data):
+            return
+        yield from self.match_buffer(data)
+
+def is_binary(data):
+    return b"\0" in data[:BINARY_SNIFF_BYTES]
+
 # --- EXEC HELPERS ---
 
 class CodebaseUtils:
-    def __init__(self, root_path):
+    """File helpers for exec scripts and scans.
+
+    walk/grep skip `ignored_dirs`, virtualenvs, .gitignored paths and (grep)
+    binary files.
+    """
+    def __init__(self, root_path, ignored_dirs=DEFAULT_IGNORED_DIRS, use_gitignore=True):
         self.root = Path(root_path)
+        self.ignored_dirs = ignored_dirs
+        self.use_gitignore = use_gitignore
+
+    def _files(self, pattern):
+        match = re.compile("^" + _glob_to_regex(pattern) + "$").match
+        for path, rel in walk_files(self.root, self.ignored_dirs, self.use_gitignore):
+            if match(rel):
+                yield path
 
     def walk(self, pattern="**/*"):
         """List files matching a glob pattern."""
-        return [str(p) for p in self.root.glob(pattern) if p.is_file()]
+        return list(self._files(pattern))
 
-    def grep(self, regex, file_pattern="**/*.py"):
-        """Search for a regex in files."""
+    def grep_many(self, regexes, file_pattern="**/*.py"):
+        """Search for several regexes in one pass per file.
+
+        Returns one result per matching (line, regex): file, line, column
+        (1-based, of the first match), content and the regex that matched.
+        """
+        matcher = MultiMatcher(regexes)
         results = []
-        pattern = re.compile(regex)
-        for filepath in self.root.glob(file_pattern):
-            if not filepath.is_file(): continue
-            try:
-                content = filepath.read_text(encoding='utf-8', errors='ignore')
-                for i, line in enumerate(content.splitlines()):
-                    if pattern.search(line):
-                        results.append({
-                            "file": str(filepath),
-                            "line": i + 1,
-                            "content": line.strip()
-                        })
-            except Exception:
-                pass
+        for path in self._files(file_pattern):
+            for lineno, column, index, line in matcher.match_file(path):
+                results.append({
+                    "file": path,
+                    "line": lineno,
+                    "column": column,
+                    "content": line.strip(),
+                    "pattern": matcher.patterns[index],
+                })
         return results
 
+    def grep(self, regex, file_pattern="**/*.py"):
+        """Search for a regex in files."""
+        return [
+            {"file": r["file"], "line": r["line"], "column": r["column"], "content": r["content"]}
+            for r in self.grep_many([regex], file_pattern)
+        ]
+
     def read(self, filepath):
         """Read a file."""
         return (self.root / filepath).read_text(encoding='utf-8', errors='ignore')
@@ -152,23 +1104,23 @@ class CodebaseUtils:
 
 # --- COMMANDS ---
 
+def _emit(args, payload, text):
+    """Print `payload` as JSON when --json was given, otherwise the human text."""
+    if getattr(args, "json", False):
+        print(json.dumps(payload, indent=2))
+    elif text:
+        print(text)
+
 def cmd_init(args):
-    root = Path(args.path).resolve()
-    json_path = root / IMPROVEMENTS_FILE
-    
-    state = {
-        "root": str(root),
-        "json_path": str(json_path),
-        "globals": {} # For persistent REPL vars
-    }
-    save_state(state)
-    print(f"Initialized Improvements Manager.")
-    print(f"Codebase Root: {root}")
-    print(f"Data File: {json_path}")
-    
-    if not json_path.exists():
-        save_data(load_data(json_path), json_path)
-        print("Created empty improvements.json")
+    state, created = init_project(args.path, backend=args.backend)
+    data_file = state.get("db_path", state["json_path"])
+    text = (f"Initialized Improvements Manager.\n"
+            f"Codebase Root: {state['root']}\n"
+            f"Data File: {data_file}")
+    if created:
+        text += f"\nCreated {os.path.basename(data_file)}"
+    _emit(args, {"root": state["root"], "json_path": state["json_path"], "backend": state["backend"],
+                 "data_file": data_file, "created": created}, text)
 
 def cmd_list(args):
     state = load_state()
@@ -176,145 +1128,71 @@ def cmd_list(args):
         print("Not initialized. Run 'init <path>' first.")
         return
 
-    data = load_data(state["json_path"])
-    items = data["items"]
-    
-    if args.status:
-        items = [i for i in items if i["status"] == args.status]    
-    if args.search:
-        query = args.search.lower()
-        items = [i for i in items if query in i["title"].lower()]
-
-    print(f"{'ID':<10} {'STATUS':<12} {'TITLE'}")
-    print("-" * 60)
+    items = open_store(state).list(status=args.status, search=args.search)
+
+    lines = [f"{'ID':<10} {'STATUS':<12} {'TITLE'}", "-" * 60]
     for item in items:
         status_icon = "⚪"
-        if item["status"] == "completed": status_icon = "✅"
-        elif item["status"] == "in_progress": status_icon = "🚧"
-        elif item["status"] == "suggestion": status_icon = "💡"
+        if item.status == "completed": status_icon = "✅"
+        elif item.status == "in_progress": status_icon = "🚧"
+        elif item.status == "suggestion": status_icon = "💡"
         
-        print(f"{item['id']:<10} {status_icon} {item['status']:<10} {item['title'][:60]}")
+        lines.append(f"{item.id:<10} {status_icon} {item.status:<10} {item.title[:60]}")
+    _emit(args, [i.to_dict() for i in items], "\n".join(lines))
 
 def cmd_add(args):
     state = load_state()
     if not state: return
-    data = load_data(state["json_path"])
-    item = create_item_dict(args.title, args.status, "manual")
-    data["items"].append(item)
-    save_data(data, state["json_path"])
-    print(f"Added item: {item['id']}")
+    item = open_store(state).add(args.title, args.status, "manual")
+    _emit(args, item.to_dict(), f"Added item: {item.id}")
 
 def cmd_next(args):
     state = load_state()
     if not state: return
-    data = load_data(state["json_path"])
-    
-    # 1. Check if we are already working on something
-    in_progress = [i for i in data["items"] if i["status"] == "in_progress"]
-    if in_progress:
-        print(f"Already working on: {in_progress[0]['title']} ({in_progress[0]['id']})")
-        print("Finish this first with: python improvements_manager.py resolve <id>")
-        return
-
-    # 2. Find next suggestion
-    suggestions = [i for i in data["items"] if i["status"] == "suggestion"]
-    if not suggestions:
-        print("No suggestions pending. Good job!")
-        return
-        
-    next_item = suggestions[0]
-    next_item["status"] = "in_progress"
-    next_item["updated_at"] = datetime.now().isoformat()
-    
-    save_data(data, state["json_path"])
-    print(f"Picked up: {next_item['title']} ({next_item['id']})")
+    result = open_store(state).next()
+    text = result.message
+    if not result.ok and result.item:
+        text += "\nFinish this first with: python improvements_manager.py resolve <id>"
+    _emit(args, result.to_dict(), text)
 
 def cmd_resolve(args):
     state = load_state()
     if not state: return
-    data = load_data(state["json_path"])
-    
-    target_id = args.id
-    # If no ID and one item is in progress, resolve that one
-    if not target_id:
-        in_progress = [i for i in data["items"] if i["status"] == "in_progress"]
-        if len(in_progress) == 1:
-            target_id = in_progress[0]["id"]
-            
-    if not target_id:
-        print("Please specify ID or have exactly one item in progress.")
-        return
-
-    for item in data["items"]:
-        if item["id"] == target_id:
-            item["status"] = args.status
-            item["updated_at"] = datetime.now().isoformat()
-            save_data(data, state["json_path"])
-            print(f"Item {target_id} marked as {args.status}")
-            return
-            
-    print(f"Item {target_id} not found.")
+    result = open_store(state).resolve(args.id, args.status)
+    _emit(args, result.to_dict(), result.message)
 
 def cmd_scan(args):
     state = load_state()
     if not state: return
-    data = load_data(state["json_path"])
-    codebase = CodebaseUtils(state["root"])
-    
-    added_count = 0
-    
-    # Built-in scanners
-    print("Scanning for TODOs...")
-    # Exclude scripts directory and common hidden/build dirs
-    todos = [
-        t for t in codebase.grep(r"TODO[:\s]?.+") 
-        if "scripts" not in t['file'] and ".git" not in t['file']
-    ]
-    
-    for hit in todos:
-        # Avoid dupes roughly
-        title = f"TODO: {hit['content'].strip()}"
-        if not any(i['title'] == title for i in data['items']):
-            data["items"].append(create_item_dict(title, "suggestion", "scan"))
-            added_count += 1
-            
-    save_data(data, state["json_path"])
-    print(f"Scan complete. Added {added_count} new items.")
+    if not args.json:
+        print("Scanning for TODOs...")
+    added = open_store(state).scan(workers=args.workers, use_cache=not args.full)
+    _emit(args, [i.to_dict() for i in added], f"Scan complete. Added {len(added)} new items.")
 
 def cmd_prune(args):
     state = load_state()
     if not state: return
-    data = load_data(state["json_path"])
-    codebase = CodebaseUtils(state["root"])
-    
-    print("Pruning stale scan results...")
-    
-    # Only prune items that were automatically scanned
-    scan_items = [i for i in data["items"] if i.get("source") == "scan" and i["status"] == "suggestion"]
-    removed_count = 0
-    
-    for item in scan_items:
-        # Extract content from title "TODO: <content>"
-        if item["title"].startswith("TODO: "):
-            content_to_find = item["title"][6:].strip() # len("TODO: ") == 6
-            
-            # Simple check: does this string exist anywhere?
-            # We escape regex special chars to treat it as literal
-            escaped_content = re.escape(content_to_find)
-            hits = codebase.grep(escaped_content)
-            
-            # If nothing found, or only found in scripts (if we want to be strict), remove it
-            # But codebase.grep doesn't filter scripts by default, so we filter results
-            valid_hits = [h for h in hits if "scripts" not in h['file']]
-            
-            if not valid_hits:
-                print(f"Removing stale: {item['title'][:50]}...")
-                data["items"].remove(item)
-                removed_count += 1
+    if not args.json:
+        print("Pruning stale scan results...")
+    removed = open_store(state).prune(verbose=not args.json)
+    _emit(args, [i.to_dict() for i in removed], f"Pruned {len(removed)} stale items.")
+
+def cmd_export(args):
+    state = load_state()
+    if not state: return
+    data = open_store(state).export_data()
+    save_data(data, args.path)
+    _emit(args, {"path": args.path, "items": len(data["items"])}, f"Exported {len(data['items'])} items to {args.path}")
 
-    if removed_count > 0:
-        save_data(data, state["json_path"])
-    print(f"Pruned {removed_count} stale items.")
+def cmd_import(args):
+    state = load_state()
+    if not state: return
+    data = load_data(args.path)
+    open_store(state).import_data(data, replace=args.replace)
+    _emit(args, {"path": args.path, "items": len(data["items"])}, f"Imported {len(data['items'])} items from {args.path}")
+
+def _item_key(item):
+    return json.dumps(item, sort_keys=True, default=str)
 
 def cmd_exec(args):
     state = load_state()
@@ -322,14 +1200,19 @@ def cmd_exec(args):
         print("Not initialized. Run 'init <path>' first.")
         return
 
-    data = load_data(state["json_path"])
+    store = open_store(state)
+    # The script edits a copy; afterwards only the items it changed are written
+    data = copy.deepcopy(store.export_data())
+    before = {i["id"]: _item_key(i) for i in data["items"]}
     root = state["root"]
+    titles = {i['title'] for i in data['items']}
     
     # helper for adding items within script
     def add_item(title, status="suggestion", source="script"):
         # Check for duplicates
-        if any(i['title'] == title for i in data['items']):
+        if title in titles:
             return None
+        titles.add(title)
         item = create_item_dict(title, status, source)
         data["items"].append(item)
         print(f"[Script] Added: {title}")
@@ -362,8 +1245,12 @@ def cmd_exec(args):
     except Exception:
         traceback.print_exc(file=stderr_buf)
     
-    # Save changes to JSON
-    save_data(data, state["json_path"])
+    # Save changes back to the tracker
+    after = {i["id"]: i for i in data["items"]}
+    store.apply_changes(
+        upsert=[i for item_id, i in after.items() if before.get(item_id) != _item_key(i)],
+        delete=[item_id for item_id in before if item_id not in after],
+    )
     
     # Persist globals (exclude system stuff)
     to_persist = {k: v for k, v in env.items() 
@@ -380,33 +1267,48 @@ def main():
     parser = argparse.ArgumentParser(description="Improvements Manager (RLM-style)")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
+    # Shared by every command with structured output
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--json", action="store_true", help="Print machine-readable JSON instead of text")
+
     # INIT
-    init_parser = subparsers.add_parser("init", help="Initialize for a codebase")
+    init_parser = subparsers.add_parser("init", help="Initialize for a codebase", parents=[common])
     init_parser.add_argument("path", help="Path to codebase root")
+    init_parser.add_argument("--backend", choices=["json", "sqlite"], default="json",
+                             help="Store items in improvements.json or an indexed improvements.db")
 
     # LIST
-    list_parser = subparsers.add_parser("list", help="List improvements")
+    list_parser = subparsers.add_parser("list", help="List improvements", parents=[common])
     list_parser.add_argument("--status", choices=["suggestion", "in_progress", "completed"])
     list_parser.add_argument("--search", "-q")
 
     # ADD
-    add_parser = subparsers.add_parser("add", help="Add improvement manually")
+    add_parser = subparsers.add_parser("add", help="Add improvement manually", parents=[common])
     add_parser.add_argument("title")
     add_parser.add_argument("--status", default="suggestion")
 
     # NEXT
-    subparsers.add_parser("next", help="Pick next suggestion to work on")
+    subparsers.add_parser("next", help="Pick next suggestion to work on", parents=[common])
 
     # RESOLVE
-    resolve_parser = subparsers.add_parser("resolve", help="Resolve an item (completed/suggestion)")
+    resolve_parser = subparsers.add_parser("resolve", help="Resolve an item (completed/suggestion)", parents=[common])
     resolve_parser.add_argument("id", nargs="?", help="ID of item (optional if only 1 in progress)")
     resolve_parser.add_argument("--status", choices=["completed", "suggestion", "rejected"], default="completed")
 
     # SCAN
-    subparsers.add_parser("scan", help="Scan codebase for new improvements (TODOs etc)")
+    scan_parser = subparsers.add_parser("scan", help="Scan codebase for new improvements (TODOs etc)", parents=[common])
+    scan_parser.add_argument("--workers", type=int, help="Processes for scanning changed files (default: CPU count)")
+    scan_parser.add_argument("--full", action="store_true", help="Ignore the scan cache and rescan every file")
 
     # PRUNE
-    subparsers.add_parser("prune", help="Remove scanned items that no longer exist")
+    subparsers.add_parser("prune", help="Remove scanned items that no longer exist", parents=[common])
+
+    # EXPORT / IMPORT
+    export_parser = subparsers.add_parser("export", help="Write all items to a JSON file", parents=[common])
+    export_parser.add_argument("path")
+    import_parser = subparsers.add_parser("import", help="Merge items from a JSON file", parents=[common])
+    import_parser.add_argument("path")
+    import_parser.add_argument("--replace", action="store_true", help="Replace all items instead of merging")
 
     # EXEC
     exec_parser = subparsers.add_parser("exec", help="Run python script against codebase and improvements")
@@ -414,14 +1316,20 @@ def main():
 
     args = parser.parse_args()
 
-    if args.command == "init": cmd_init(args)
-    elif args.command == "list": cmd_list(args)
-    elif args.command == "add": cmd_add(args)
-    elif args.command == "next": cmd_next(args)
-    elif args.command == "resolve": cmd_resolve(args)
-    elif args.command == "scan": cmd_scan(args)
-    elif args.command == "prune": cmd_prune(args)
-    elif args.command == "exec": cmd_exec(args)
+    try:
+        if args.command == "init": cmd_init(args)
+        elif args.command == "list": cmd_list(args)
+        elif args.command == "add": cmd_add(args)
+        elif args.command == "next": cmd_next(args)
+        elif args.command == "resolve": cmd_resolve(args)
+        elif args.command == "scan": cmd_scan(args)
+        elif args.command == "prune": cmd_prune(args)
+        elif args.command == "export": cmd_export(args)
+        elif args.command == "import": cmd_import(args)
+        elif args.command == "exec": cmd_exec(args)
+    except TrackerError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
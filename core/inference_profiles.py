@@ -0,0 +1,111 @@
+"""Named generation settings per call site.
+
+A profile fixes the Ollama `options` for one kind of call: context size,
+reply cap (`num_predict`), temperature, stop sequences and seed. Profiles are
+named after the router's call sites ("cli_interaction", "decide", ...), so a
+keystroke answer is capped at a few dozen tokens while a subagent plan gets
+room for code.
+
+Defaults live here; `inference_profiles.json` in the repository root (or the
+file named by `RLM_INFERENCE_PROFILES`) overrides them field by field:
+
+    {"cli_interaction": {"num_predict": 24, "stop": ["\\n"]},
+     "decide": {"temperature": 0.1, "seed": 7, "top_k": 20}}
+
+Keys that are not profile fields are passed through as extra Ollama options.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass, field, fields, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from core.prompt_registry import DEFAULT_RESPONSE_RESERVE, context_window
+
+
+# Absolute (by default next to main.py), so batch workers running in their own
+# directories still find it
+PROFILES_FILE = Path(os.environ.get("RLM_INFERENCE_PROFILES")
+                     or Path(__file__).resolve().parent.parent / "inference_profiles.json").resolve()
+DEFAULT_PROFILE = "default"
+
+
+@dataclass
+class InferenceProfile:
+    name: str
+    num_ctx: Optional[int] = None
+    num_predict: Optional[int] = None
+    temperature: Optional[float] = None
+    stop: Optional[List[str]] = None
+    seed: Optional[int] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    def context_size(self, model: Optional[str]) -> int:
+        return self.num_ctx or context_window(model)
+
+    def prompt_budget(self, model: Optional[str]) -> int:
+        """Tokens left for the prompt once the reply cap is reserved."""
+        reserve = self.num_predict if self.num_predict and self.num_predict > 0 else DEFAULT_RESPONSE_RESERVE
+        return max(0, self.context_size(model) - reserve)
+
+    def options(self, model: Optional[str]) -> Dict[str, Any]:
+        """Ollama `options` for a call to `model` (unset fields are left to the server)."""
+        opts: Dict[str, Any] = dict(self.extra)
+        opts["num_ctx"] = self.context_size(model)
+        for key in ("num_predict", "temperature", "stop", "seed"):
+            value = getattr(self, key)
+            if value is not None:
+                opts[key] = value
+        return opts
+
+
+def default_profiles() -> Dict[str, InferenceProfile]:
+    return {
+        DEFAULT_PROFILE: InferenceProfile(DEFAULT_PROFILE),
+        # One line of input; a blank line means the model started explaining.
+        "cli_interaction": InferenceProfile("cli_interaction", num_predict=48, temperature=0.2, stop=["\n\n"]),
+        "decide": InferenceProfile("decide", num_predict=512, temperature=0.2),
+        "subagent": InferenceProfile("subagent", num_predict=1024, temperature=0.2),
+        # ~250 words
+        "summarize": InferenceProfile("summarize", num_predict=400, temperature=0.3),
+        "assess": InferenceProfile("assess", num_predict=256, temperature=0.0),
+    }
+
+
+_FIELD_NAMES = {f.name for f in fields(InferenceProfile)} - {"name", "extra"}
+
+
+def _apply_overrides(base: InferenceProfile, overrides: Dict[str, Any]) -> InferenceProfile:
+    if not isinstance(overrides, dict):
+        raise ValueError(f"Profile '{base.name}' must be a JSON object")
+    known = {k: v for k, v in overrides.items() if k in _FIELD_NAMES}
+    extra = dict(base.extra)
+    extra.update({k: v for k, v in overrides.items() if k not in _FIELD_NAMES})
+    if isinstance(known.get("stop"), str):
+        known["stop"] = [known["stop"]]
+    return replace(base, extra=extra, **known)
+
+
+class InferenceProfiles:
+    """Profile lookup by name, with defaults overridden from a JSON file."""
+
+    def __init__(self, path: Optional[Union[str, Path]] = PROFILES_FILE):
+        self.path = Path(path) if path else None
+        self.profiles = default_profiles()
+        if self.path and self.path.exists():
+            self.load(self.path)
+
+    def load(self, path: Union[str, Path]) -> None:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError(f"{path}: expected an object mapping profile names to settings")
+        for name, overrides in data.items():
+            base = self.profiles.get(name, InferenceProfile(name))
+            self.profiles[name] = _apply_overrides(base, overrides)
+
+    def get(self, name: Optional[str]) -> InferenceProfile:
+        return self.profiles.get(name or DEFAULT_PROFILE) or self.profiles[DEFAULT_PROFILE]
@@ -0,0 +1,312 @@
+"""Content-addressed on-disk cache for LLM responses.
+
+Responses are keyed by a SHA-256 of the canonical JSON encoding of
+(model, messages, options) and stored one file per entry under
+``.flexi/llm_cache``. The cache is bounded by entry count and total bytes
+(least-recently-used entries are evicted first) and entries expire after a TTL.
+The bounds apply to the directory, not just this process: the index is rebuilt
+from the directory before evicting and once it is `rescan_seconds` old, so batch
+workers sharing one cache directory stay within them together (give or take
+what the others stored since the last rebuild).
+
+Modes:
+  - off:       no caching, every call goes to the model.
+  - readwrite: serve hits from disk, store misses.
+  - record:    like readwrite, and additionally append every response to a
+               session file so the whole run can be replayed later.
+  - replay:    serve responses only from a recorded session file, in the order
+               they were recorded. Never touches the network.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+
+DEFAULT_CACHE_DIR = Path(".flexi/llm_cache")
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 24 * 3600
+# How stale the in-memory index may get before a store rescans the directory
+DEFAULT_RESCAN_SECONDS = 30.0
+CACHE_MODES = ("off", "readwrite", "record", "replay")
+
+
+class CacheError(RuntimeError):
+    pass
+
+
+def cache_key(model: str, messages: List[Dict[str, Any]], options: Optional[Dict[str, Any]] = None) -> str:
+    """Stable hash of everything that influences the model's answer."""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "options": options or {}},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """LRU + TTL response cache with an optional record/replay session file."""
+
+    def __init__(
+        self,
+        cache_dir: str | os.PathLike = DEFAULT_CACHE_DIR,
+        mode: str = "readwrite",
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        session_path: str | os.PathLike | None = None,
+        rescan_seconds: float = DEFAULT_RESCAN_SECONDS,
+    ):
+        if mode not in CACHE_MODES:
+            raise CacheError(f"Unknown cache mode '{mode}'. Expected one of {CACHE_MODES}.")
+        if mode in ("record", "replay") and not session_path:
+            raise CacheError(f"Cache mode '{mode}' needs a session file.")
+
+        self.cache_dir = Path(cache_dir)
+        self.mode = mode
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.rescan_seconds = rescan_seconds
+        self.session_path = Path(session_path) if session_path else None
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # key -> (size in bytes); ordered from least to most recently used.
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._scanned_at = float("-inf")
+        self._replay: Dict[str, Deque[str]] = {}
+        self._replay_last: Dict[str, str] = {}
+
+        if mode in ("readwrite", "record"):
+            self._load_index()
+        if mode == "replay":
+            self._load_session()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    # --- public API ---
+
+    def fetch(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        options: Optional[Dict[str, Any]],
+        compute: Callable[[], str],
+    ) -> Tuple[str, bool]:
+        """Return (response, was_cached). `compute` is only called on a miss.
+
+        Empty responses are treated as failures and never stored.
+        """
+        if self.mode == "off":
+            return compute(), False
+        key, response = self._lookup(model, messages, options)
+        cached = response is not None
+        if not cached:
+            response = compute()
+        self._finish(key, model, response, cached)
+        return response, cached
+
+    async def afetch(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        options: Optional[Dict[str, Any]],
+        compute: Callable[[], Awaitable[str]],
+    ) -> Tuple[str, bool]:
+        """Awaitable variant of `fetch` for coroutine-based callers."""
+        if self.mode == "off":
+            return await compute(), False
+        key, response = self._lookup(model, messages, options)
+        cached = response is not None
+        if not cached:
+            response = await compute()
+        self._finish(key, model, response, cached)
+        return response, cached
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._entry_path(key)
+        with self._lock:
+            if key not in self._index:
+                # Possibly stored by another process sharing the directory
+                try:
+                    self._index[key] = path.stat().st_size
+                    self._total_bytes += self._index[key]
+                except OSError:
+                    self.misses += 1
+                    return None
+            try:
+                entry = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                self._forget(key)
+                self.misses += 1
+                return None
+            if self.ttl_seconds and time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            try:
+                # mtime doubles as the last-access time when the index is rebuilt.
+                os.utime(path, None)
+            except OSError:
+                pass
+            self.hits += 1
+            return entry.get("response")
+
+    def put(self, key: str, model: str, response: str) -> None:
+        path = self._entry_path(key)
+        body = json.dumps(
+            {"key": key, "model": model, "created_at": time.time(), "response": response},
+            ensure_ascii=False,
+        ).encode("utf-8")
+        with self._lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # pid-qualified: batch workers in other processes share the directory
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_bytes(body)
+            tmp_path.replace(path)
+            self._forget(key)
+            self._index[key] = len(body)
+            self._total_bytes += len(body)
+            if self._over_bounds() or time.monotonic() - self._scanned_at > self.rescan_seconds:
+                # Other processes sharing the directory add entries too; count
+                # them (and their access order) before deciding what to evict.
+                self._scan_index()
+                self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "entries": len(self._index),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    # --- internals ---
+
+    def _lookup(self, model: str, messages: List[Dict[str, Any]], options: Optional[Dict[str, Any]]) -> Tuple[str, Optional[str]]:
+        key = cache_key(model, messages, options)
+        if self.mode == "replay":
+            response = self._replay_next(key)
+            if response is None:
+                raise CacheError(f"Replay miss for key {key[:12]} (model {model}).")
+            return key, response
+        return key, self.get(key)
+
+    def _finish(self, key: str, model: str, response: str, cached: bool) -> None:
+        if self.mode == "replay" or not response:
+            return
+        if not cached:
+            self.put(key, model, response)
+        if self.mode == "record":
+            self._record(key, model, response)
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _load_index(self) -> None:
+        with self._lock:
+            self._scan_index()
+            self._evict()
+
+    def _scan_index(self) -> None:
+        """Rebuild the LRU index from the directory (entry mtime is the last access)."""
+        entries = []
+        if self.cache_dir.exists():
+            for shard in os.scandir(self.cache_dir):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    if not entry.name.endswith(".json"):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue  # evicted by another process meanwhile
+                    entries.append((st.st_mtime, entry.name[:-5], st.st_size))
+        self._index.clear()
+        self._total_bytes = 0
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+        self._scanned_at = time.monotonic()
+
+    def _forget(self, key: str) -> None:
+        size = self._index.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _remove(self, key: str) -> None:
+        self._forget(key)
+        try:
+            self._entry_path(key).unlink()
+        except OSError:
+            pass
+
+    def _over_bounds(self) -> bool:
+        return len(self._index) > self.max_entries or self._total_bytes > self.max_bytes
+
+    def _evict(self) -> None:
+        if not self._over_bounds():
+            return
+        # Trim a tenth below the bounds so a full cache does not rescan on every store.
+        max_entries = self.max_entries - self.max_entries // 10
+        max_bytes = self.max_bytes - self.max_bytes // 10
+        while self._index and (len(self._index) > max_entries or self._total_bytes > max_bytes):
+            oldest = next(iter(self._index))
+            self._remove(oldest)
+
+    def _record(self, key: str, model: str, response: str) -> None:
+        line = json.dumps({"key": key, "model": model, "response": response}, ensure_ascii=False)
+        with self._lock:
+            self.session_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.session_path.open("a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def _load_session(self) -> None:
+        if not self.session_path.exists():
+            raise CacheError(f"Session file not found: {self.session_path}")
+        with self.session_path.open("r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                self._replay.setdefault(record["key"], deque()).append(record["response"])
+
+    def _replay_next(self, key: str) -> Optional[str]:
+        with self._lock:
+            queue = self._replay.get(key)
+            if queue:
+                # Identical prompts are answered in recorded order; once a key is
+                # exhausted its last answer keeps being served.
+                self._replay_last[key] = queue.popleft()
+                self.hits += 1
+                return self._replay_last[key]
+            if key in self._replay_last:
+                self.hits += 1
+                return self._replay_last[key]
+            self.misses += 1
+            return None
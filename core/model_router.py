@@ -0,0 +1,149 @@
+"""Per-call-site model routing with escalation.
+
+Each call site ("cli_interaction", "decide", "subagent", ...) has a primary
+model and an optional escalation model. `ModelRouter.call` runs the primary
+and, if the caller's `accept` check rejects the result (unparseable JSON, low
+confidence, chatty keystrokes), retries once on the escalation model. Latency,
+call and escalation counts are kept per route.
+
+Tiers come from the environment so deployments can swap models without code
+changes:
+  RLM_MODEL_SMALL  (default gemma3:1b)  keystrokes, summaries, assessments
+  RLM_MODEL_MEDIUM (default gemma3:4b)  decisions and subagent planning
+  RLM_MODEL_LARGE  (default gemma3:12b) escalation target for hard steps
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+SMALL_MODEL = os.environ.get("RLM_MODEL_SMALL", "gemma3:1b")
+MEDIUM_MODEL = os.environ.get("RLM_MODEL_MEDIUM", "gemma3:4b")
+LARGE_MODEL = os.environ.get("RLM_MODEL_LARGE", "gemma3:12b")
+
+
+@dataclass
+class Route:
+    model: str
+    escalate_to: Optional[str] = None
+
+
+@dataclass
+class RouteStats:
+    calls: int = 0
+    escalations: int = 0
+    rejected: int = 0
+    total_s: float = 0.0
+    by_model: Dict[str, List[float]] = field(default_factory=dict)
+
+    def record(self, model: str, seconds: float) -> None:
+        self.calls += 1
+        self.total_s += seconds
+        self.by_model.setdefault(model, []).append(seconds)
+
+
+def default_routes() -> Dict[str, Route]:
+    return {
+        "cli_interaction": Route(SMALL_MODEL, escalate_to=MEDIUM_MODEL),
+        "decide": Route(MEDIUM_MODEL, escalate_to=LARGE_MODEL),
+        "subagent": Route(MEDIUM_MODEL, escalate_to=LARGE_MODEL),
+        "summarize": Route(SMALL_MODEL),
+        "assess": Route(SMALL_MODEL),
+    }
+
+
+class ModelRouter:
+    """Chooses a model per call site and escalates rejected results."""
+
+    def __init__(self, routes: Optional[Dict[str, Route]] = None, default_model: str = MEDIUM_MODEL):
+        self.routes = routes if routes is not None else default_routes()
+        self.default_model = default_model
+        self._stats: Dict[str, RouteStats] = {}
+        self._lock = threading.Lock()
+
+    def model_for(self, site: str) -> str:
+        route = self.routes.get(site)
+        return route.model if route else self.default_model
+
+    def escalation_for(self, site: str) -> Optional[str]:
+        route = self.routes.get(site)
+        if route and route.escalate_to and route.escalate_to != route.model:
+            return route.escalate_to
+        return None
+
+    def _record(self, site: str, model: str, seconds: float, accepted: bool, escalated: bool) -> None:
+        with self._lock:
+            st = self._stats.setdefault(site, RouteStats())
+            st.record(model, seconds)
+            if not accepted:
+                st.rejected += 1
+            if escalated:
+                st.escalations += 1
+
+    def call(self, site: str, fn: Callable[[str], T], accept: Optional[Callable[[T], bool]] = None) -> T:
+        """Run `fn(model)` for the route, escalating once if `accept` rejects it."""
+        model = self.model_for(site)
+        t0 = time.perf_counter()
+        result = fn(model)
+        ok = accept(result) if accept else True
+        self._record(site, model, time.perf_counter() - t0, ok, escalated=False)
+
+        escalation = self.escalation_for(site)
+        if ok or not escalation:
+            return result
+        t0 = time.perf_counter()
+        retry = fn(escalation)
+        retry_ok = accept(retry)
+        self._record(site, escalation, time.perf_counter() - t0, retry_ok, escalated=True)
+        return retry if retry_ok else result
+
+    async def acall(self, site: str, fn: Callable[[str], Awaitable[T]], accept: Optional[Callable[[T], bool]] = None) -> T:
+        """Awaitable variant of `call`."""
+        model = self.model_for(site)
+        t0 = time.perf_counter()
+        result = await fn(model)
+        ok = accept(result) if accept else True
+        self._record(site, model, time.perf_counter() - t0, ok, escalated=False)
+
+        escalation = self.escalation_for(site)
+        if ok or not escalation:
+            return result
+        t0 = time.perf_counter()
+        retry = await fn(escalation)
+        retry_ok = accept(retry)
+        self._record(site, escalation, time.perf_counter() - t0, retry_ok, escalated=True)
+        return retry if retry_ok else result
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            out = {}
+            for site, st in self._stats.items():
+                out[site] = {
+                    "calls": st.calls,
+                    "escalations": st.escalations,
+                    "rejected": st.rejected,
+                    "mean_s": st.total_s / st.calls if st.calls else 0.0,
+                    "models": {m: {"calls": len(v), "mean_s": sum(v) / len(v)} for m, v in st.by_model.items()},
+                }
+            return out
+
+    def summary(self) -> str:
+        stats = self.stats()
+        if not stats:
+            return "No routed calls."
+        header = f"{'ROUTE':<16} {'MODEL':<18} {'CALLS':>6} {'MEAN s':>8} {'ESCALATED':>9} {'REJECTED':>8}"
+        lines = [header, "-" * len(header)]
+        for site, st in sorted(stats.items()):
+            for model, ms in st["models"].items():
+                lines.append(
+                    f"{site[:16]:<16} {model[:18]:<18} {ms['calls']:>6} {ms['mean_s']:>8.2f} "
+                    f"{st['escalations']:>9} {st['rejected']:>8}"
+                )
+        return "\n".join(lines)
@@ -0,0 +1,173 @@
+"""Prompt template registry with token-budgeted field filling.
+
+Templates in `prompts/` are parsed once into literal/field segments and only
+re-read when the file's mtime changes. Rendering can be given a token budget
+(derived from the model's context window); the variable fields named in
+`trim` are then shortened, smallest-first fair share, so the filled prompt fits
+instead of being silently truncated by the server.
+
+Token counts use a cheap character-based estimate, which is close enough for
+budgeting and avoids shipping a tokenizer.
+"""
+
+from __future__ import annotations
+
+import os
+import string
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+
+# Effective context windows (Ollama `num_ctx`) per model.
+MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+    "gemma3:1b": 8192,
+    "gemma3:4b": 8192,
+    "gemma3:12b": 8192,
+    "llama3.2:3b": 8192,
+    "qwen2.5-coder:7b": 8192,
+}
+DEFAULT_CONTEXT_WINDOW = 4096
+# Tokens kept free for the model's reply when budgeting a prompt.
+DEFAULT_RESPONSE_RESERVE = 1024
+CHARS_PER_TOKEN = 4
+# Approximate cost of the "[trimmed N chars]" marker plus line snapping.
+TRIM_MARKER_TOKENS = 12
+
+
+def context_window(model: Optional[str]) -> int:
+    if not model:
+        return DEFAULT_CONTEXT_WINDOW
+    return MODEL_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (~4 chars per token for English and code)."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def trim_to_tokens(text: str, max_tokens: int, keep: str = "tail") -> str:
+    """Shorten `text` to roughly `max_tokens`, keeping its head or its tail.
+
+    Cuts are snapped to line boundaries where possible and marked inline so the
+    model knows content was elided.
+    """
+    max_chars = max(0, max_tokens) * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    dropped = len(text) - max_chars
+    marker = f"... [trimmed {dropped} chars] ...\n"
+    if keep == "head":
+        kept = text[:max_chars]
+        cut = kept.rfind("\n")
+        if cut > max_chars // 2:
+            kept = kept[:cut + 1]
+        return kept + "\n" + marker
+    kept = text[-max_chars:] if max_chars else ""
+    cut = kept.find("\n")
+    if 0 <= cut < max_chars // 2:
+        kept = kept[cut + 1:]
+    return marker + kept
+
+
+class PromptTemplate:
+    """A `str.format`-style template compiled into literal and field segments."""
+
+    def __init__(self, name: str, text: str, mtime: float = 0.0):
+        self.name = name
+        self.text = text
+        self.mtime = mtime
+        self._segments: List[Tuple[str, Optional[str], str, Optional[str]]] = []
+        literal_chars = 0
+        for literal, field, spec, conversion in string.Formatter().parse(text):
+            self._segments.append((literal, field, spec or "", conversion))
+            literal_chars += len(literal)
+        self.fields = tuple(dict.fromkeys(s[1] for s in self._segments if s[1] is not None))
+        self.static_tokens = (literal_chars + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+    def render(self, values: Mapping[str, Any]) -> str:
+        out: List[str] = []
+        for literal, field, spec, conversion in self._segments:
+            out.append(literal)
+            if field is None:
+                continue
+            value = values[field]
+            if conversion == "r":
+                value = repr(value)
+            elif conversion == "s":
+                value = str(value)
+            out.append(format(value, spec))
+        return "".join(out)
+
+    def render_budgeted(
+        self,
+        values: Mapping[str, Any],
+        budget_tokens: int,
+        trim: Mapping[str, str],
+    ) -> str:
+        """Render with the fields in `trim` (field -> 'head'|'tail') fitted to the budget."""
+        texts = {k: str(v) for k, v in values.items()}
+        # Fields appearing several times in the template cost that many times.
+        counts = {f: 0 for f in self.fields}
+        for _, field, _, _ in self._segments:
+            if field is not None:
+                counts[field] += 1
+
+        trimmable = [f for f in trim if f in counts and f in texts]
+        fixed = sum(estimate_tokens(texts[f]) * counts[f] for f in counts if f not in trimmable and f in texts)
+        available = budget_tokens - self.static_tokens - fixed
+
+        sizes = {f: estimate_tokens(texts[f]) * counts[f] for f in trimmable}
+        if sum(sizes.values()) > available:
+            # Water-filling: small fields keep everything, large ones share the rest.
+            remaining = max(0, available)
+            ordered = sorted(trimmable, key=lambda f: sizes[f])
+            for i, field in enumerate(ordered):
+                share = remaining // (len(ordered) - i)
+                alloc = min(sizes[field], share)
+                remaining -= alloc
+                if alloc < sizes[field]:
+                    per_use = alloc // counts[field] - TRIM_MARKER_TOKENS
+                    texts[field] = trim_to_tokens(texts[field], per_use, trim[field])
+        return self.render(texts)
+
+
+class PromptRegistry:
+    """Loads templates from a directory once and reloads them when they change."""
+
+    def __init__(self, prompts_dir: str | os.PathLike = "prompts"):
+        self.prompts_dir = Path(prompts_dir)
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[PromptTemplate]:
+        path = self.prompts_dir / name
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            return None
+        with self._lock:
+            tpl = self._templates.get(name)
+            if tpl is None or tpl.mtime != mtime:
+                tpl = PromptTemplate(name, path.read_text(encoding="utf-8"), mtime)
+                self._templates[name] = tpl
+            return tpl
+
+    def render(
+        self,
+        name: str,
+        values: Mapping[str, Any],
+        model: Optional[str] = None,
+        trim: Optional[Mapping[str, str]] = None,
+        reserve_tokens: int = DEFAULT_RESPONSE_RESERVE,
+        budget_tokens: Optional[int] = None,
+    ) -> Optional[str]:
+        """Fill template `name`; returns None if the template does not exist."""
+        tpl = self.get(name)
+        if tpl is None:
+            return None
+        if not trim:
+            return tpl.render(values)
+        if budget_tokens is None:
+            budget_tokens = context_window(model) - reserve_tokens
+        return tpl.render_budgeted(values, budget_tokens, trim)
@@ -0,0 +1,220 @@
+"""JSON schemas for structured model output, plus a tolerant parser.
+
+The schemas are sent as Ollama's `format` field so the server constrains
+generation to valid JSON of the right shape. `parse_json_response` is the
+fallback for servers/models that ignore `format` or replies cut off by
+`num_predict`: it strips code fences, extracts the first JSON object, and
+repairs common damage (trailing commas, Python literals, unterminated strings
+and brackets) before giving up.
+
+Parse outcomes are counted per kind ("decision", "plan", ...) so failures show
+up in metrics instead of silently burning loop steps.
+"""
+
+from __future__ import annotations
+
+import ast
+import json
+import re
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from core import tracing
+
+
+DECISION_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "analysis": {"type": "string"},
+        "system_prompt": {"type": "string"},
+        "user_prompt": {"type": "string"},
+        "expected_output_format": {"type": "string"},
+        "confidence": {"type": "string", "enum": ["high", "medium", "low"]},
+        "action": {"type": "string", "enum": ["cli_interaction", "delegate_to_subagent"]},
+        "subagent_task": {"type": "string"},
+    },
+    "required": ["analysis", "confidence", "action"],
+}
+
+SUBAGENT_PLAN_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "thought": {"type": "string"},
+        "python_code": {"type": ["string", "null"]},
+        "is_complete": {"type": "boolean"},
+        "final_answer": {"type": ["string", "null"]},
+    },
+    "required": ["thought", "is_complete"],
+}
+
+GOAL_ASSESSMENT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "completed": {"type": "boolean"},
+        "explanation": {"type": "string"},
+        "next_step": {"type": "string"},
+    },
+    "required": ["completed", "explanation"],
+}
+
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL)
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+def _count(kind: str, outcome: str) -> None:
+    with _stats_lock:
+        bucket = _stats.setdefault(kind, {"ok": 0, "repaired": 0, "failed": 0})
+        bucket[outcome] += 1
+    tracing.annotate(**{f"parse_{kind}": outcome})
+
+
+def parse_stats() -> Dict[str, Dict[str, int]]:
+    with _stats_lock:
+        return {k: dict(v) for k, v in _stats.items()}
+
+
+def parse_summary() -> str:
+    stats = parse_stats()
+    if not stats:
+        return "No structured replies parsed."
+    return "JSON parsing: " + ", ".join(
+        f"{kind} ok={s['ok']} repaired={s['repaired']} failed={s['failed']}"
+        for kind, s in sorted(stats.items())
+    )
+
+
+def _extract_object(text: str) -> Tuple[Optional[str], bool]:
+    """Return the first top-level {...} span, closing it if the text is cut off.
+
+    The flag is False when the span had to be closed.
+    """
+    start = text.find("{")
+    if start < 0:
+        return None, True
+    stack = []
+    in_string = False
+    escaped = False
+    prev = ""       # last character outside strings, ignoring whitespace
+    key_at = None   # start of an object key whose value has not begun yet
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+                prev = ch
+            continue
+        if ch.isspace():
+            continue
+        if ch != ":":
+            key_at = i if ch == '"' and prev in "{," and stack and stack[-1] == "}" else None
+        prev = ch
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                return text[start:i + 1], True
+    # Truncated reply: terminate the open string and close open brackets.
+    if key_at is not None:
+        # Cut off after a key: drop it, it has no value.
+        tail = text[start:key_at]
+    else:
+        tail = text[start:]
+        if escaped:
+            tail = tail[:-1]
+        if in_string:
+            tail += '"'
+    tail = tail.rstrip().rstrip(",:")
+    return tail + "".join(reversed(stack)), False
+
+
+def _replace_outside_strings(text: str) -> str:
+    out = []
+    i = 0
+    in_string = False
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            out.append(ch)
+            if ch == "\\" and i + 1 < len(text):
+                out.append(text[i + 1])
+                i += 2
+                continue
+            if ch == '"':
+                in_string = False
+            i += 1
+            continue
+        if ch == '"':
+            in_string = True
+            out.append(ch)
+            i += 1
+            continue
+        for py, js in _PY_LITERALS.items():
+            if text.startswith(py, i) and not (i and (text[i - 1].isalnum() or text[i - 1] == "_")):
+                end = i + len(py)
+                if end >= len(text) or not (text[end].isalnum() or text[end] == "_"):
+                    out.append(js)
+                    i = end
+                    break
+        else:
+            out.append(ch)
+            i += 1
+    return "".join(out)
+
+
+def _repair(candidate: str) -> Optional[Any]:
+    fixed = _TRAILING_COMMA_RE.sub(r"\1", _replace_outside_strings(candidate))
+    try:
+        return json.loads(fixed, strict=False)
+    except json.JSONDecodeError:
+        pass
+    try:
+        # Single-quoted, Python-style dicts.
+        value = ast.literal_eval(candidate)
+        return value if isinstance(value, dict) else None
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+
+
+def parse_json_response(text: str, kind: str = "json") -> Optional[Dict[str, Any]]:
+    """Parse a model reply into a dict, repairing it if needed; None on failure."""
+    text = (text or "").strip()
+    try:
+        value = json.loads(text)
+        if isinstance(value, dict):
+            _count(kind, "ok")
+            return value
+    except json.JSONDecodeError:
+        pass
+
+    fence = _FENCE_RE.search(text)
+    sources = [fence.group(1), text] if fence else [text]
+    for source in sources:
+        candidate, complete = _extract_object(source)
+        if not candidate:
+            continue
+        # A complete object that only needed unwrapping (code fence, prose
+        # around it) is compliant; "repaired" is kept for actual fixes.
+        repaired = not complete
+        try:
+            value = json.loads(candidate)
+        except json.JSONDecodeError:
+            value = _repair(candidate)
+            repaired = True
+        if isinstance(value, dict):
+            _count(kind, "repaired" if repaired else "ok")
+            return value
+
+    _count(kind, "failed")
+    return None
@@ -0,0 +1,183 @@
+"""Lightweight span tracing for the agent loop.
+
+Spans record wall time plus arbitrary attributes (model, cache hit, token
+counts) and are written one JSON object per line to a trace file. The current
+span lives in a ContextVar, so nesting works across threads and asyncio tasks.
+At the end of a run `Tracer.summary()` renders a per-span-name table.
+
+Usage:
+    with tracing.span("decide", model="gemma3:4b") as s:
+        ...
+        s.set(eval_count=123)
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+DEFAULT_TRACE_DIR = Path(".flexi/traces")
+
+_ids = itertools.count(1)
+
+
+class Span:
+    def __init__(self, name: str, parent_id: Optional[int], attrs: Dict[str, Any]):
+        self.id = next(_ids)
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = dict(attrs)
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.duration = 0.0
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span_id": self.id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_s": round(self.duration, 6),
+            **self.attrs,
+        }
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("rlm_current_span", default=None)
+
+
+def llm_metrics(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract token counts and throughput from an Ollama /api/chat response."""
+    metrics: Dict[str, Any] = {}
+    for key in ("prompt_eval_count", "eval_count"):
+        if key in result:
+            metrics[key] = result[key]
+    for key in ("total_duration", "load_duration", "prompt_eval_duration", "eval_duration"):
+        if key in result:
+            metrics[key.replace("_duration", "_s")] = result[key] / 1e9
+    if result.get("eval_count") and result.get("eval_duration"):
+        metrics["eval_tokens_per_s"] = result["eval_count"] / (result["eval_duration"] / 1e9)
+    if result.get("prompt_eval_count") and result.get("prompt_eval_duration"):
+        metrics["prompt_tokens_per_s"] = result["prompt_eval_count"] / (result["prompt_eval_duration"] / 1e9)
+    return metrics
+
+
+class Tracer:
+    """Collects finished spans, optionally appending them to a JSONL file."""
+
+    def __init__(self, path: str | os.PathLike | None = None):
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._file = None
+        self.spans: List[Dict[str, Any]] = []
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("a", encoding="utf-8")
+
+    @classmethod
+    def for_run(cls, trace_dir: str | os.PathLike = DEFAULT_TRACE_DIR, prefix: str = "trace") -> "Tracer":
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        return cls(Path(trace_dir) / f"{prefix}_{stamp}_{os.getpid()}.jsonl")
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Span]:
+        parent = _current.get()
+        s = Span(name, parent.id if parent else None, attrs)
+        token = _current.set(s)
+        try:
+            yield s
+        except BaseException as e:
+            s.set(error=type(e).__name__)
+            raise
+        finally:
+            s.duration = time.perf_counter() - s._t0
+            _current.reset(token)
+            self._finish(s)
+
+    def _finish(self, s: Span) -> None:
+        record = s.to_dict()
+        with self._lock:
+            self.spans.append(record)
+            if self._file:
+                self._file.write(json.dumps(record, default=str) + "\n")
+                self._file.flush()
+
+    def aggregate(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            spans = list(self.spans)
+        stats: Dict[str, Dict[str, float]] = {}
+        for rec in spans:
+            st = stats.setdefault(rec["name"], {
+                "count": 0, "total_s": 0.0, "max_s": 0.0,
+                "prompt_tokens": 0, "eval_tokens": 0, "eval_s": 0.0, "cached": 0,
+            })
+            st["count"] += 1
+            st["total_s"] += rec["duration_s"]
+            st["max_s"] = max(st["max_s"], rec["duration_s"])
+            st["prompt_tokens"] += rec.get("prompt_eval_count", 0) or 0
+            st["eval_tokens"] += rec.get("eval_count", 0) or 0
+            st["eval_s"] += rec.get("eval_s", 0.0) or 0.0
+            st["cached"] += 1 if rec.get("cached") else 0
+        return stats
+
+    def summary(self) -> str:
+        stats = self.aggregate()
+        if not stats:
+            return "No spans recorded."
+        header = f"{'SPAN':<22} {'COUNT':>6} {'TOTAL s':>9} {'MEAN s':>8} {'MAX s':>8} {'PROMPT TOK':>10} {'EVAL TOK':>9} {'TOK/S':>7}"
+        lines = [header, "-" * len(header)]
+        for name, st in sorted(stats.items(), key=lambda kv: -kv[1]["total_s"]):
+            tps = st["eval_tokens"] / st["eval_s"] if st["eval_s"] else 0.0
+            lines.append(
+                f"{name[:22]:<22} {st['count']:>6} {st['total_s']:>9.2f} "
+                f"{st['total_s'] / st['count']:>8.2f} {st['max_s']:>8.2f} "
+                f"{int(st['prompt_tokens']):>10} {int(st['eval_tokens']):>9} {tps:>7.1f}"
+            )
+        if self.path:
+            lines.append(f"Trace written to {self.path}")
+        return "\n".join(lines)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def set_tracer(tracer: Tracer) -> Tracer:
+    """Install `tracer` as the process-wide tracer and return the previous one."""
+    global _tracer
+    previous, _tracer = _tracer, tracer
+    return previous
+
+
+def span(name: str, **attrs: Any):
+    return _tracer.span(name, **attrs)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def annotate(**attrs: Any) -> None:
+    """Attach attributes to the innermost active span, if any."""
+    s = _current.get()
+    if s is not None:
+        s.set(**attrs)
@@ -1,22 +1,67 @@
 import sys
 import os
 import time
+import asyncio
+import argparse
 import json
 import threading
 import subprocess
 import itertools
 import urllib.request
 from pathlib import Path
+from concurrent.futures import Future
 from typing import List, Dict, Optional
 
 # Add core to sys.path to ensure imports work
 sys.path.append(os.path.join(os.path.dirname(__file__), 'core'))
 
 from core.context_agent import ContextAgent
+from core import improvements_manager as improvements
+from core.llm_cache import ResponseCache, CacheError
+from core.prompt_registry import PromptRegistry
+from core.inference_profiles import InferenceProfiles
+from core.async_runtime import AsyncIOManager, post_json
+from core.history import RollingHistory, make_llm_summarizer
+from core import tracing
+from core.dispatcher import InferenceDispatcher, PRIORITY_INTERACTIVE, PRIORITY_PLANNING, PRIORITY_BACKGROUND
+from core.model_router import ModelRouter
+from core.structured_output import DECISION_SCHEMA, GOAL_ASSESSMENT_SCHEMA, parse_json_response, parse_summary
+from core.goal_monitor import GoalMonitor, Verdict
+from core.checkpoint import Checkpoint, GoalJournal, load_checkpoint, latest_checkpoint
 
 # --- CONFIGURATION ---
+ROOT_DIR = Path(__file__).resolve().parent
+# Absolute, so batch workers running in their own directories still find them
+PROMPTS_DIR = ROOT_DIR / "prompts"
+GUI_SCRIPT = ROOT_DIR / "core" / "html_terminal.py"
+# Extra arguments for the terminal script, e.g. "--persistent" to keep cd/exports
+# between commands (its commands get no stdin, so interactive programs cannot run)
+TERMINAL_ARGS = os.environ.get("RLM_TERMINAL_ARGS", "").split()
+# Fallback model for calls without a route (see core/model_router.py for tiers)
 MODEL_NAME = "gemma3:4b"
-OLLAMA_URL = "http://localhost:11434/api/chat"
+OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://localhost:11434/api/chat")
+
+# Response cache: off | readwrite | record | replay. Off unless asked for: decisions
+# and keystrokes are sampled, and replaying them across runs repeats old actions.
+LLM_CACHE_MODE = os.environ.get("RLM_LLM_CACHE", "off")
+# JSONL session recording used by the record/replay modes
+LLM_SESSION_FILE = os.environ.get("RLM_LLM_SESSION")
+# Batch mode records/replays one session per goal, in the goal's directory
+BATCH_SESSION_FILE = "llm_session.jsonl"
+
+# Inference dispatcher: worker threads, and parallel requests allowed per model
+# (match the server's OLLAMA_NUM_PARALLEL)
+INFERENCE_WORKERS = int(os.environ.get("RLM_INFERENCE_WORKERS", "2"))
+MODEL_PARALLEL_DEFAULT = int(os.environ.get("OLLAMA_NUM_PARALLEL", "1"))
+MODEL_CONCURRENCY: Dict[str, int] = {}
+
+# How long the server keeps each model loaded after a call. Unloading drops the
+# prompt cache too, so the next step re-evaluates the whole static prefix.
+MODEL_KEEP_ALIVE_DEFAULT = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+MODEL_KEEP_ALIVE: Dict[str, str] = {}
+
+# Improvements tracker backend: json | sqlite (unset = sqlite if improvements.db exists)
+IMPROVEMENTS_BACKEND = os.environ.get("RLM_IMPROVEMENTS_BACKEND") or None
 
 # --- UTILS ---
 
@@ -47,46 +92,45 @@ class Spinner:
             time.sleep(0.1)
 
 class TaskManager:
-    """Interface for the improvements_manager.py script."""
-    def __init__(self, script_path: str, project_root: str):
-        self.script_path = script_path
+    """In-process interface to the improvements tracker (core/improvements_manager.py)."""
+    def __init__(self, project_root: str):
         self.project_root = project_root
-        self.db_path = Path(project_root) / "improvements.json"
+        root = Path(project_root)
+        backend = IMPROVEMENTS_BACKEND or ("sqlite" if (root / improvements.IMPROVEMENTS_DB).exists() else "json")
+        self.db_path = root / (improvements.IMPROVEMENTS_DB if backend == "sqlite" else improvements.IMPROVEMENTS_FILE)
         
-        # Auto-init if needed
+        # Auto-init if needed (a new SQLite tracker imports improvements.json)
         if not self.db_path.exists():
-            self._run("init", self.project_root)
-
-    def _run(self, *args) -> str:
-        cmd = [sys.executable, self.script_path] + list(args)
-        try:
-            res = subprocess.run(cmd, capture_output=True, text=True, cwd=self.project_root)
-            return res.stdout.strip()
-        except Exception as e:
-            return f"Error running improvements manager: {e}"
+            improvements.init_project(self.project_root, root / improvements.STATE_FILE, backend=backend)
+        self.store = improvements.store_for(root, backend)
 
-    def list_tasks(self, status=None, search=None):
-        args = ["list"]
-        if status: args.extend(["--status", status])
-        if search: args.extend(["--search", search])
-        return self._run(*args)
+    def list_tasks(self, status=None, search=None) -> List[improvements.Item]:
+        with tracing.span("tasks.list", status=status):
+            return self.store.list(status=status, search=search)
     
-    def add_task(self, title):
-        return self._run("add", title)
+    def add_task(self, title) -> improvements.Item:
+        with tracing.span("tasks.add"):
+            return self.store.add(title)
         
-    def pick_next(self):
-        return self._run("next")
+    def pick_next(self, item_id=None) -> improvements.Result:
+        with tracing.span("tasks.next"):
+            return self.store.next(item_id)
         
-    def resolve_current(self):
-        return self._run("resolve")
+    def resolve_current(self, item_id=None) -> improvements.Result:
+        with tracing.span("tasks.resolve"):
+            return self.store.resolve(item_id)
     
-    def scan(self):
-        return self._run("scan")
+    def scan(self) -> List[improvements.Item]:
+        with tracing.span("tasks.scan") as span:
+            added = self.store.scan()
+            span.set(added=len(added))
+            return added
 
     def get_progress_summary(self):
-        output = self.list_tasks(status="in_progress")
-        if "in_progress" in output:
-            return f"Current Tracked Improvement:\n{output}\n"
+        in_progress = self.list_tasks(status="in_progress")
+        if in_progress:
+            lines = "\n".join(f"{i.id} {i.status} {i.title}" for i in in_progress)
+            return f"Current Tracked Improvement:\n{lines}\n"
         return "No specific task currently tracked in improvements_manager."
 
 class IOManager:
@@ -145,6 +189,16 @@ class IOManager:
             with self._buffer_lock:
                 self.stdout_buffer.append(char)
 
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    @property
+    def output_offset(self) -> int:
+        """Characters of child output read so far."""
+        with self._buffer_lock:
+            return len(self.stdout_buffer)
+
     def get_snapshot(self, last_chars: int = 2000) -> str:
         with self._buffer_lock:
             full_text = "".join(self.stdout_buffer)
@@ -174,32 +228,148 @@ class IOManager:
 
 class MetaBrain:
     """Handles prompt loading and LLM Inference."""
-    def __init__(self, model: str = MODEL_NAME):
+    def __init__(self, model: str = MODEL_NAME, cache: Optional[ResponseCache] = None,
+                 dispatcher: Optional[InferenceDispatcher] = None, router: Optional[ModelRouter] = None,
+                 profiles: Optional[InferenceProfiles] = None):
         self.model = model
-        self.prompts_dir = Path("prompts")
+        self.router = router if router is not None else ModelRouter(default_model=model)
+        self.profiles = profiles if profiles is not None else InferenceProfiles()
+        self.prompts_dir = PROMPTS_DIR
+        self.prompts = PromptRegistry(self.prompts_dir)
+        if cache is None:
+            cache = ResponseCache(mode=LLM_CACHE_MODE, session_path=LLM_SESSION_FILE)
+        self.cache = cache
+        if dispatcher is None:
+            dispatcher = InferenceDispatcher(
+                max_workers=INFERENCE_WORKERS,
+                model_limits=MODEL_CONCURRENCY,
+                default_model_limit=MODEL_PARALLEL_DEFAULT,
+            )
+        self.dispatcher = dispatcher
 
     def _load_prompt(self, filename: str) -> str:
         try:
-            # Check local 'prompts' folder
-            p = self.prompts_dir / filename
-            if p.exists():
-                return p.read_text(encoding="utf-8")
+            # Check local 'prompts' folder (cached until the file changes)
+            tpl = self.prompts.get(filename)
+            if tpl:
+                return tpl.text
         except Exception:
             pass
         return ""
 
-    def query_ollama(self, messages: List[Dict], system_prompt: str = None, model: str = None) -> str:
+    @staticmethod
+    def keep_alive_for(model: str) -> str:
+        return MODEL_KEEP_ALIVE.get(model, MODEL_KEEP_ALIVE_DEFAULT)
+
+    def warm_up(self) -> List[Future]:
+        """Load each routed model in the background so the first step skips the load.
+
+        Skipped in replay mode, which never touches the network.
+        """
+        if self.cache.mode == "replay":
+            return []
+        # One warm-up per model, with the profile of the first site routed to it
+        sites: Dict[str, str] = {}
+        for site, route in self.router.routes.items():
+            sites.setdefault(route.model, site)
+        return [
+            self.dispatcher.submit(self._warm_model, m, site, model=m, priority=PRIORITY_BACKGROUND)
+            for m, site in sorted(sites.items())
+        ]
+
+    def _warm_model(self, model: str, profile: str) -> None:
+        # An empty chat loads the model without generating. num_ctx must match
+        # the real calls, otherwise the server reloads the model on first use.
+        with tracing.span("llm.warmup", model=model):
+            self._post_chat({
+                "model": model,
+                "messages": [],
+                "options": {"num_ctx": self.profiles.get(profile).context_size(model)},
+                "keep_alive": self.keep_alive_for(model),
+                "stream": False,
+            })
+
+    def _prepare_chat(self, messages: List[Dict], system_prompt: str = None, model: str = None,
+                      schema: Optional[Dict] = None, profile: Optional[str] = None):
         if system_prompt:
             messages = [{"role": "system", "content": system_prompt}] + messages
         
         use_model = model if model else self.model
         
+        # Generation limits come from the call site's profile. num_ctx is always
+        # sent: the prompt was budgeted against it, and the server's smaller
+        # default would silently truncate the prompt.
+        options = self.profiles.get(profile).options(use_model)
+
         data = {
             "model": use_model,
             "messages": messages,
+            "options": options,
+            "keep_alive": self.keep_alive_for(use_model),
             "stream": False
         }
-        
+        if schema:
+            # Structured output: the server constrains generation to the schema.
+            # It changes the reply, so it is part of the cache key too.
+            data["format"] = schema
+            options = dict(options, format=schema)
+        return use_model, messages, options, data
+
+    def query_ollama(self, messages: List[Dict], system_prompt: str = None, model: str = None,
+                     priority: int = PRIORITY_PLANNING, schema: Optional[Dict] = None,
+                     profile: Optional[str] = None) -> str:
+        return self.submit_query(messages, system_prompt, model, priority, schema, profile).result()
+
+    def submit_query(self, messages: List[Dict], system_prompt: str = None, model: str = None,
+                     priority: int = PRIORITY_PLANNING, schema: Optional[Dict] = None,
+                     profile: Optional[str] = None) -> Future:
+        """Queue a query on the dispatcher; returns a Future with the response text."""
+        use_model = model if model else self.model
+        return self.dispatcher.submit(
+            self._query, messages, system_prompt, use_model, time.perf_counter(), schema, profile,
+            model=use_model, priority=priority
+        )
+
+    def query_batch(self, requests: List[Dict]) -> List[Future]:
+        """Submit several queries at once (dicts of submit_query kwargs)."""
+        return [self.submit_query(**req) for req in requests]
+
+    def _query(self, messages: List[Dict], system_prompt: str, model: str, submitted_at: float,
+               schema: Optional[Dict] = None, profile: Optional[str] = None) -> str:
+        use_model, messages, options, data = self._prepare_chat(messages, system_prompt, model, schema, profile)
+        with tracing.span("llm", model=use_model, queue_wait_s=time.perf_counter() - submitted_at) as span:
+            try:
+                response, cached = self.cache.fetch(use_model, messages, options, lambda: self._post_chat(data))
+                span.set(cached=cached, response_chars=len(response))
+                return response
+            except CacheError as e:
+                print(f"[Brain] Cache Error: {e}")
+                return ""
+
+    async def aquery_ollama(self, messages: List[Dict], system_prompt: str = None, model: str = None,
+                            priority: int = PRIORITY_PLANNING, schema: Optional[Dict] = None,
+                            profile: Optional[str] = None) -> str:
+        """Awaitable query_ollama. Cancelling the caller drops the HTTP request.
+
+        The request itself runs on the event loop, but it queues for a model
+        slot on the dispatcher like every other call.
+        """
+        use_model, messages, options, data = self._prepare_chat(messages, system_prompt, model, schema, profile)
+        with tracing.span("llm", model=use_model) as span:
+            async def compute():
+                submitted_at = time.perf_counter()
+                async with self.dispatcher.slot(use_model, priority):
+                    span.set(queue_wait_s=time.perf_counter() - submitted_at)
+                    return await self._apost_chat(data)
+            try:
+                response, cached = await self.cache.afetch(use_model, messages, options, compute)
+                span.set(cached=cached, response_chars=len(response))
+                return response
+            except CacheError as e:
+                print(f"[Brain] Cache Error: {e}")
+                return ""
+
+    def _post_chat(self, data: Dict) -> str:
         req = urllib.request.Request(
             OLLAMA_URL,
             data=json.dumps(data).encode("utf-8"),
@@ -211,175 +381,436 @@ class MetaBrain:
             # Removed timeout as requested by user
             with urllib.request.urlopen(req) as response:
                 result = json.loads(response.read().decode("utf-8"))
+                tracing.annotate(**tracing.llm_metrics(result))
                 return result.get("message", {}).get("content", "")
         except Exception as e:
             print(f"[Brain] Inference Error: {e}")
             return ""
 
+    async def _apost_chat(self, data: Dict) -> str:
+        try:
+            result = await post_json(OLLAMA_URL, data)
+            tracing.annotate(**tracing.llm_metrics(result))
+            return result.get("message", {}).get("content", "")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[Brain] Inference Error: {e}")
+            return ""
+
+    def _decision_prompt(self, state_snapshot: str, goal: str, history: List[Dict], progress_summary: str) -> Optional[str]:
+        # Volatile fields are trimmed to fit the profile's context window minus
+        # its reply cap; the screen and conversation keep their most recent lines.
+        model = self.router.model_for("decide")
+        return self.prompts.render(
+            "meta_prompt.md",
+            {
+                "stdout_snapshot": state_snapshot,
+                "user_goal": goal,
+                "progress_summary": progress_summary,
+                "recent_conversation": json.dumps(self._recent(history), indent=2),
+            },
+            trim={"stdout_snapshot": "tail", "recent_conversation": "tail", "progress_summary": "head"},
+            budget_tokens=self.profiles.get("decide").prompt_budget(model),
+        )
+
+    @staticmethod
+    def _recent(history: List[Dict], n: int = 3) -> List[Dict]:
+        # Keep the running summary (first message) alongside the last few turns.
+        recent = list(history[-n:])
+        if len(history) > n and str(history[0].get("content", "")).startswith("Summary of"):
+            recent = [history[0]] + recent
+        return recent
+
+    def _parse_decision(self, response: str) -> Dict:
+        decision = parse_json_response(response, kind="decision")
+        if decision is None:
+            print(f"[Brain] Failed to parse JSON decisions: {response[:100]}...")
+            return {"action": "wait", "confidence": "low", "parse_error": True}
+        return decision
+
+    @staticmethod
+    def _decision_ok(decision: Dict) -> bool:
+        """Escalate unparseable or low-confidence decisions to the larger model."""
+        return not decision.get("parse_error") and str(decision.get("confidence", "")).lower() != "low"
+
+    @staticmethod
+    def _keystrokes_ok(text: str) -> bool:
+        """A usable CLI reply is short, non-empty and a single line (no chatter)."""
+        text = text.strip().strip('"\'')
+        return bool(text) and "\n" not in text and len(text) <= 200
+
     def decide_next_action(self, state_snapshot: str, goal: str, history: List[Dict], progress_summary: str = "N/A") -> Dict:
-        template = self._load_prompt("meta_prompt.md")
-        if not template:
+        filled_prompt = self._decision_prompt(state_snapshot, goal, history, progress_summary)
+        if not filled_prompt:
             return {"confidence": "low", "error": "Prompt missing"}
 
-        filled_prompt = template.format(
-            stdout_snapshot=state_snapshot,
-            user_goal=goal,
-            progress_summary=progress_summary,
-            recent_conversation=json.dumps(history[-3:], indent=2)
+        messages = [{"role": "user", "content": filled_prompt}]
+        return self.router.call(
+            "decide",
+            lambda m: self._parse_decision(self.query_ollama(messages, model=m, schema=DECISION_SCHEMA, profile="decide")),
+            accept=self._decision_ok,
         )
 
-        response = self.query_ollama([{"role": "user", "content": filled_prompt}])
-        
-        try:
-            import re
-            json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response, re.DOTALL)
-            json_str = json_match.group(1) if json_match else response
-            return json.loads(json_str)
-        except:
-            print(f"[Brain] Failed to parse JSON decisions: {response[:100]}...")
-            return {"action": "wait", "confidence": "low"}
+    async def adecide_next_action(self, state_snapshot: str, goal: str, history: List[Dict], progress_summary: str = "N/A") -> Dict:
+        filled_prompt = self._decision_prompt(state_snapshot, goal, history, progress_summary)
+        if not filled_prompt:
+            return {"confidence": "low", "error": "Prompt missing"}
+
+        messages = [{"role": "user", "content": filled_prompt}]
+
+        async def attempt(m):
+            return self._parse_decision(await self.aquery_ollama(messages, model=m, schema=DECISION_SCHEMA, profile="decide"))
+        return await self.router.acall("decide", attempt, accept=self._decision_ok)
+
+    def _assessment_messages(self, goal: str, progress_summary: str, history: List[Dict],
+                             state_snapshot: str) -> Optional[List[Dict]]:
+        model = self.router.model_for("assess")
+        prompt = self.prompts.render(
+            "goal_assessment_prompt.md",
+            {
+                "user_goal": goal,
+                "progress_summary": progress_summary,
+                "conversation_history": json.dumps(self._recent(history, n=6), indent=2),
+                "stdout_snapshot": state_snapshot,
+            },
+            trim={"stdout_snapshot": "tail", "conversation_history": "tail", "progress_summary": "head"},
+            budget_tokens=self.profiles.get("assess").prompt_budget(model),
+        )
+        return [{"role": "user", "content": prompt}] if prompt else None
+
+    def assess_goal(self, goal: str, progress_summary: str, history: List[Dict], state_snapshot: str) -> Optional[Dict]:
+        """Ask the small model whether the goal is complete; None if it gave no usable answer."""
+        messages = self._assessment_messages(goal, progress_summary, history, state_snapshot)
+        if not messages:
+            return None
+        return self.router.call(
+            "assess",
+            lambda m: parse_json_response(
+                self.query_ollama(messages, model=m, schema=GOAL_ASSESSMENT_SCHEMA, profile="assess"),
+                kind="assessment"),
+            accept=lambda a: a is not None,
+        )
+
+    async def aassess_goal(self, goal: str, progress_summary: str, history: List[Dict], state_snapshot: str) -> Optional[Dict]:
+        messages = self._assessment_messages(goal, progress_summary, history, state_snapshot)
+        if not messages:
+            return None
+
+        async def attempt(m):
+            return parse_json_response(
+                await self.aquery_ollama(messages, model=m, schema=GOAL_ASSESSMENT_SCHEMA, profile="assess"),
+                kind="assessment")
+        return await self.router.acall("assess", attempt, accept=lambda a: a is not None)
+
+    def _keystroke_messages(self, history: List[Dict], user_prompt: str, system_prompt: str) -> List[Dict]:
+        # The per-step persona goes into the final user turn rather than the
+        # system slot, so the static system prompt + history stay a stable
+        # prefix the server can reuse from the previous step.
+        base = self._load_prompt("base_system_prompt.md").strip()
+        head = [{"role": "system", "content": base}] if base else []
+        return head + list(history) + [{"role": "user", "content": f"{system_prompt}\n\n{user_prompt}"}]
+
+    def cli_keystrokes(self, history: List[Dict], user_prompt: str, system_prompt: str) -> str:
+        """Ask the (small) CLI-operator model for the exact input to type."""
+        messages = self._keystroke_messages(history, user_prompt, system_prompt)
+        return self.router.call(
+            "cli_interaction",
+            lambda m: self.query_ollama(messages, model=m, priority=PRIORITY_INTERACTIVE,
+                                        profile="cli_interaction").strip(),
+            accept=self._keystrokes_ok,
+        )
+
+    async def acli_keystrokes(self, history: List[Dict], user_prompt: str, system_prompt: str) -> str:
+        messages = self._keystroke_messages(history, user_prompt, system_prompt)
+
+        async def attempt(m):
+            return (await self.aquery_ollama(messages, model=m, priority=PRIORITY_INTERACTIVE,
+                                             profile="cli_interaction")).strip()
+        return await self.router.acall("cli_interaction", attempt, accept=self._keystrokes_ok)
 
 
 # --- CORE ORCHESTRATOR ---
 
 class Orchestrator:
-    def __init__(self, gui_script_path: str):
-        self.cli = IOManager([sys.executable, gui_script_path])
-        self.brain = MetaBrain()
+    def __init__(self, gui_script_path: str, project_root: Optional[str] = None,
+                 brain: Optional[MetaBrain] = None):
+        self.cli = IOManager([sys.executable, gui_script_path, *TERMINAL_ARGS])
+        self.brain = brain if brain is not None else MetaBrain()
+        self.tracer = tracing.Tracer.for_run()
+        # Several orchestrators can be built in one process (batch workers,
+        # the benchmark); the replaced tracer's file is done with.
+        tracing.set_tracer(self.tracer).close()
+        # Load the routed models while the CLI starts up
+        self.brain.warm_up()
         
         # Paths
         script_dir = Path(__file__).parent
-        self.project_root = script_dir
+        self.project_root = Path(project_root) if project_root else script_dir
         
-        repl_path = self.project_root / "core" / "rlm_repl.py"
-        imp_script = self.project_root / "core" / "improvements_manager.py"
+        repl_path = script_dir / "core" / "rlm_repl.py"
         
-        self.tasks = TaskManager(str(imp_script), str(self.project_root))
+        self.tasks = TaskManager(str(self.project_root))
         
         inference_adapter = self.brain.query_ollama
-        self.subagent = ContextAgent(inference_adapter, str(repl_path))
-        self.history = []
+        self.subagent = ContextAgent(inference_adapter, str(repl_path), prompts=self.brain.prompts,
+                                     router=self.brain.router, profiles=self.brain.profiles)
+        # Last turns verbatim, older ones folded into a model-written summary
+        summarize_model = self.brain.router.model_for("summarize")
+        self.history = RollingHistory(
+            keep_last=8,
+            max_entry_chars=2000,
+            summarizer=make_llm_summarizer(self.brain.query_ollama, self.brain.prompts,
+                                           model=summarize_model,
+                                           budget_tokens=self.brain.profiles.get("summarize").prompt_budget(summarize_model),
+                                           priority=PRIORITY_BACKGROUND, profile="summarize"),
+        )
+
+        # Loop pacing (seconds); the benchmark turns these down to measure overhead
+        self.max_steps = 20
+        self.startup_delay = 1
+        self.step_delay = 1
+        self.wait_delay = 2
+        self.confirm_timeout = 300
+        # Per-goal checkpoint journal (see --resume)
+        self.journal: Optional[GoalJournal] = None
+        # Early stop: completion/stuck rules every step, model check every few
+        self.monitor = GoalMonitor()
+
+    def _goal_result(self, user_goal: str, status: str, steps: int, started: float,
+                     error: Optional[str] = None, reason: str = "") -> Dict:
+        return {
+            "goal": user_goal,
+            "status": status,
+            "steps": steps,
+            "elapsed_s": round(time.perf_counter() - started, 3),
+            "error": error,
+            "reason": reason,
+            "trace": str(self.tracer.path.resolve()) if self.tracer.path else None,
+        }
+
+    # --- checkpointing ---
+
+    def _open_journal(self, user_goal: str, resume: Optional[Checkpoint]) -> int:
+        """Start (or continue) the goal's journal; returns the first step index to run."""
+        if resume is None:
+            self.journal = GoalJournal.create(user_goal)
+            return 0
+        self.journal = GoalJournal(resume.path)
+        self.journal.record_resume(resume.step)
+        self.history.load_dict(resume.history)
+        # The terminal session itself cannot be restored, so tell the model.
+        self.history.append({
+            "role": "system",
+            "content": f"Session resumed after an interruption at step {resume.step}. The terminal was "
+                       f"restarted; before the interruption the screen ended with:\n{resume.snapshot_tail[-1000:]}",
+        }, compact=False)
+        print(f"[Resume] Continuing from step {resume.step} ({resume.path})")
+        return resume.step
+
+    def _rerun_pending(self, task: str) -> None:
+        print(f"[Resume] Re-running interrupted subagent task: {task}")
+        with tracing.span("subagent", resumed=True):
+            result = self.subagent.execute_task(task)
+        self.history.append({"role": "system", "content": f"Subagent Output: {result}"}, compact=False)
+
+    def _compact_history(self) -> None:
+        # Summarize old turns on the dispatcher while the next step runs; the
+        # result is swapped in between steps, never between observe and decide.
+        self.history.apply_compaction()
+        self.history.compact_in_background(
+            lambda fn: self.brain.dispatcher.submit(fn, model=self.brain.router.model_for("summarize"),
+                                                    priority=PRIORITY_BACKGROUND))
+
+    def _checkpoint(self, step: int) -> None:
+        if self.journal:
+            self.journal.record_step(step, self.history.to_dict(), self.cli.output_offset, self.cli.get_snapshot())
+
+    # --- completion checks ---
+
+    def _apply_assessment(self, assessment: Optional[Dict]) -> Verdict:
+        verdict = self.monitor.apply_assessment(assessment)
+        if not verdict.done and verdict.next_step:
+            self.history.append({
+                "role": "system",
+                "content": f"Progress check: goal not complete yet. {verdict.reason} "
+                           f"Suggested next step: {verdict.next_step}",
+            }, compact=False)
+        return verdict
+
+    def _report_verdict(self, verdict: Verdict, span) -> Verdict:
+        span.set(status=verdict.status)
+        if verdict.done:
+            print(f"\n[Goal] Stopping ({verdict.status}): {verdict.reason}")
+        return verdict
 
-    def run_goal(self, user_goal: str):
+    def _check_goal(self, user_goal: str, step: int) -> Verdict:
+        with tracing.span("goal_check", step=step) as span:
+            snapshot = self.cli.get_snapshot()
+            verdict = self.monitor.observe(snapshot, self.cli.alive, self.cli.output_offset)
+            if not verdict.done and self.monitor.should_assess(step):
+                assessment = self.brain.assess_goal(
+                    user_goal, self.tasks.get_progress_summary(), self.history.messages(), snapshot)
+                verdict = self._apply_assessment(assessment)
+            return self._report_verdict(verdict, span)
+
+    def _close_journal(self, status: str) -> None:
+        if not self.journal:
+            return
+        # Interrupted or crashed goals stay open so --resume can pick them up.
+        if status not in ("interrupted", "error"):
+            self.journal.finish(status)
+        self.journal.close()
+        self.journal = None
+
+    def run_goal(self, user_goal: str, resume: Optional[Checkpoint] = None) -> Dict:
+        """Drive the CLI towards `user_goal`; returns a result dict (status, steps, timing).
+
+        With `resume`, history and step count are restored from that checkpoint.
+        """
         print(f"\n{'='*50}\nSTARTING GOAL: {user_goal}\n{'='*50}")
+        started = time.perf_counter()
+        status, error, steps, reason = "max_steps", None, 0, ""
+        self.monitor.reset()
         
         try:
-            self.cli.start()
-            time.sleep(1)
-
-            max_steps = 20
-            for i in range(max_steps):
-                print(f"\n[Loop {i+1}] Observing...")
-                
-                snapshot = self.cli.get_snapshot()
-                progress = self.tasks.get_progress_summary()
-                
-                spinner = Spinner("Thinking...")
-                spinner.start()
-                try:
-                    decision = self.brain.decide_next_action(
-                        state_snapshot=snapshot,
-                        goal=user_goal,
-                        history=self.history,
-                        progress_summary=progress
-                    )
-                finally:
-                    spinner.stop()
-                
-                action = decision.get("action", "cli_interaction")
-                confidence = decision.get("confidence", "low")
-                print(f"[Decision] {action} (Conf: {confidence})")
-
-                if action == 'delegate_to_subagent':
-                    task = decision.get("subagent_task", "Analyze situation")
-                    print(f"[Action] Delegating to Subagent: {task}")
-                    
-                    spinner = Spinner("Subagent working...")
-                    spinner.start()
-                    try:
-                        result = self.subagent.execute_task(task)
-                    finally:
-                        spinner.stop()
-                    
-                    self.history.append({
-                        "role": "system",
-                        "content": f"Subagent Output: {result}"
-                    })
-                    print(f"[Result] {result[:100]}...")
-
-                elif action == 'cli_interaction':
-                    sys_p = decision.get("system_prompt", "You are a CLI operator.")
-                    user_p = decision.get("user_prompt", "What input?")
-                    
-                    spinner = Spinner("typing...")
-                    spinner.start()
-                    try:
-                        input_str = self.brain.query_ollama(
-                            messages=self.history + [{"role": "user", "content": user_p}],
-                            system_prompt=sys_p
-                        ).strip()
-                    finally:
-                        spinner.stop()
-                    
-                    clean_input = input_str.strip('"\' \n')
-                    print(f"[Action] Sending Input: '{clean_input}'")
-                    self.cli.send_input(clean_input)
-                    
-                    self.history.append({"role": "user", "content": user_p})
-                    self.history.append({"role": "assistant", "content": clean_input})
-                
-                else:
-                    print("[Action] Waiting...")
-                    time.sleep(2)
+            with tracing.span("goal", goal=user_goal[:200], resumed=resume is not None):
+                first_step = steps = self._open_journal(user_goal, resume)
+                self.cli.start()
+                with tracing.span("sleep"):
+                    time.sleep(self.startup_delay)
+                if resume and resume.pending_task:
+                    self._rerun_pending(resume.pending_task)
 
-                time.sleep(1)
+                for i in range(first_step, self.max_steps):
+                    with tracing.span("step", index=i + 1) as step_span:
+                        self._run_step(user_goal, i, step_span)
+                    steps = i + 1
+                    verdict = self._check_goal(user_goal, steps)
+                    self._checkpoint(steps)
+                    if verdict.done:
+                        status, reason = verdict.status, verdict.reason
+                        break
+                    self._compact_history()
 
         except KeyboardInterrupt:
             print("\n\n[!] User interrupted session.")
+            status = "interrupted"
         except Exception as e:
             print(f"\n[!] Unexpected Error: {e}")
+            status, error = "error", str(e)
         finally:
             print("\nShutting down CLI...")
             self.cli.cleanup()
+            self._close_journal(status)
+            print("\n" + self.tracer.summary())
+            print("\n" + self.brain.router.summary())
+            print(parse_summary())
+        return self._goal_result(user_goal, status, steps, started, error, reason)
+
+    def _run_step(self, user_goal: str, i: int, step_span):
+        print(f"\n[Loop {i+1}] Observing...")
+        
+        with tracing.span("observe"):
+            snapshot = self.cli.get_snapshot()
+            progress = self.tasks.get_progress_summary()
+        
+        spinner = Spinner("Thinking...")
+        spinner.start()
+        try:
+            with tracing.span("decide"):
+                decision = self.brain.decide_next_action(
+                    state_snapshot=snapshot,
+                    goal=user_goal,
+                    history=self.history.messages(),
+                    progress_summary=progress
+                )
+        finally:
+            spinner.stop()
+        
+        action = decision.get("action", "cli_interaction")
+        confidence = decision.get("confidence", "low")
+        step_span.set(action=action, confidence=confidence)
+        print(f"[Decision] {action} (Conf: {confidence})")
+
+        if action == 'delegate_to_subagent':
+            task = decision.get("subagent_task", "Analyze situation")
+            print(f"[Action] Delegating to Subagent: {task}")
+            if self.journal:
+                self.journal.record_pending(i + 1, task)
+            
+            spinner = Spinner("Subagent working...")
+            spinner.start()
+            try:
+                with tracing.span("subagent"):
+                    result = self.subagent.execute_task(task)
+            finally:
+                spinner.stop()
+            
+            self.history.append({
+                "role": "system",
+                "content": f"Subagent Output: {result}"
+            }, compact=False)
+            print(f"[Result] {result[:100]}...")
+
+        elif action == 'cli_interaction':
+            sys_p = decision.get("system_prompt", "You are a CLI operator.")
+            user_p = decision.get("user_prompt", "What input?")
+            
+            spinner = Spinner("typing...")
+            spinner.start()
+            try:
+                with tracing.span("cli_operator"):
+                    input_str = self.brain.cli_keystrokes(self.history.messages(), user_p, sys_p)
+            finally:
+                spinner.stop()
+            
+            clean_input = input_str.strip('"\' \n')
+            print(f"[Action] Sending Input: '{clean_input}'")
+            self.cli.send_input(clean_input)
+            self.monitor.record_input(clean_input)
+            
+            self.history.append({"role": "user", "content": user_p}, compact=False)
+            self.history.append({"role": "assistant", "content": clean_input}, compact=False)
+        
+        else:
+            print("[Action] Waiting...")
+            with tracing.span("sleep"):
+                time.sleep(self.wait_delay)
+
+        with tracing.span("sleep"):
+            time.sleep(self.step_delay)
 
     def run_auto_improvement(self):
         print("\n--- Running Auto-Improvement Scanner ---")
         self.tasks.scan()
-        suggestions_raw = self.tasks.list_tasks(status="suggestion")
-        
-        # Simple parsing of the CLI output to find IDs
-        lines = suggestions_raw.splitlines()
-        suggestion_ids = []
-        for line in lines:
-            if "💡" in line:
-                parts = line.split()
-                if parts:
-                    suggestion_ids.append(parts[0]) # ID is first column
-
-        if not suggestion_ids:
+        suggestions = self.tasks.list_tasks(status="suggestion")
+
+        if not suggestions:
             print("No new suggestions found.")
             return
 
-        print(f"\nFound {len(suggestion_ids)} suggestions.")
-        target_id = suggestion_ids[0]
-        print(f"Proposed Improvement ID: {target_id}")
+        print(f"\nFound {len(suggestions)} suggestions.")
+        target = suggestions[0]
+        print(f"Proposed Improvement ID: {target.id}")
+        print(f"  {target.title}")
         
         # Timeout Input Logic
-        print("\nDo you want to implement this improvement now? (y/n)")
-        print("Auto-accepting in 5 minutes (300s)...")
-        
         user_response = [None]
-        
-        def input_thread():
-            try:
-                user_response[0] = input("Response > ").strip().lower()
-            except:
-                pass
+        if self.confirm_timeout > 0:
+            print("\nDo you want to implement this improvement now? (y/n)")
+            print(f"Auto-accepting in {self.confirm_timeout // 60} minutes ({self.confirm_timeout}s)...")
+            
+            def input_thread():
+                try:
+                    user_response[0] = input("Response > ").strip().lower()
+                except:
+                    pass
 
-        t = threading.Thread(target=input_thread, daemon=True)
-        t.start()
-        
-        t.join(timeout=300) # 5 minutes
+            t = threading.Thread(target=input_thread, daemon=True)
+            t.start()
+            
+            t.join(timeout=self.confirm_timeout) # 5 minutes by default
         
         should_run = False
         if user_response[0] is None:
@@ -392,44 +823,374 @@ class Orchestrator:
             return
 
         if should_run:
-            print(f"Implementing Task {target_id}...")
-            # Pick it
-            self.tasks.pick_next() # Assumes simple stack or logic
+            print(f"Implementing Task {target.id}...")
+            picked = self.tasks.pick_next(target.id)
+            if not picked.ok:
+                print(picked.message)
+                return
             
             # Delegate to Subagent
-            # We need to get the title to tell subagent what to do
-            # Ideally improvements_manager would return structured data, but we are parsing CLI output
-            # For now, let's just ask Subagent to "Resolve the currently valid task in improvements.json"
-            
             print("Delegating implementation to Agent...")
             spinner = Spinner("Agent Coding...")
             spinner.start()
             try:
                 res = self.subagent.execute_task(
-                    "Read improvements.json, find the 'in_progress' item, and write code to implement the task described in its title. If it is a TODO, find the file and fix it."
+                    f"Implement this tracked improvement (id {target.id}): {target.title}\n"
+                    "If it is a TODO, find the file containing it and fix it."
                 )
                 print(f"\nResult: {res}")
                 
                 # Mark resolved
-                self.tasks.resolve_current()
+                self.tasks.resolve_current(target.id)
             finally:
                 spinner.stop()
 
 
+class Speculation:
+    """A decision being computed for a specific version of the screen."""
+    def __init__(self, version: int, task: "asyncio.Task"):
+        self.version = version
+        self.task = task
+
+    def cancel(self):
+        if not self.task.done():
+            self.task.cancel()
+
+
+class AsyncOrchestrator(Orchestrator):
+    """Orchestrator variant that overlaps observation, inference and actions.
+
+    Child output is consumed by an async reader, model calls are awaitable and
+    cancellable, and while a command is still producing output the next
+    decision is speculatively computed. A speculation is discarded (and its
+    request cancelled) as soon as the screen changes underneath it.
+    """
+    def __init__(self, gui_script_path: str, project_root: Optional[str] = None,
+                 brain: Optional[MetaBrain] = None):
+        super().__init__(gui_script_path, project_root, brain)
+        self.cli = AsyncIOManager([sys.executable, gui_script_path, *TERMINAL_ARGS])
+        self.quiet_period = 1.0   # seconds without output before the screen counts as settled
+        self.settle_timeout = 10.0
+        self.wait_timeout = 2.0
+
+    def run_goal(self, user_goal: str, resume: Optional[Checkpoint] = None) -> Dict:
+        return asyncio.run(self.run_goal_async(user_goal, resume))
+
+    async def _decide(self, user_goal: str) -> Dict:
+        with tracing.span("decide", speculative=True):
+            snapshot = self.cli.get_snapshot()
+            progress = await asyncio.to_thread(self.tasks.get_progress_summary)
+            return await self.brain.adecide_next_action(
+                state_snapshot=snapshot,
+                goal=user_goal,
+                history=self.history.messages(),
+                progress_summary=progress
+            )
+
+    def _speculate(self, user_goal: str) -> Speculation:
+        return Speculation(self.cli.version, asyncio.create_task(self._decide(user_goal)))
+
+    async def _settle(self, user_goal: str, speculation: Optional[Speculation]) -> Speculation:
+        """Wait for the screen to go quiet, re-speculating whenever it changes."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.settle_timeout
+        with tracing.span("settle") as span:
+            restarts = 0
+            while loop.time() < deadline:
+                if speculation is None or speculation.version != self.cli.version:
+                    if speculation:
+                        speculation.cancel()
+                        restarts += 1
+                    speculation = self._speculate(user_goal)
+                changed = await self.cli.wait_for_change(self.quiet_period, since=speculation.version)
+                if not changed or not self.cli.alive:
+                    break
+            span.set(cancelled_speculations=restarts)
+        return speculation
+
+    async def run_goal_async(self, user_goal: str, resume: Optional[Checkpoint] = None) -> Dict:
+        print(f"\n{'='*50}\nSTARTING GOAL (async): {user_goal}\n{'='*50}")
+        started = time.perf_counter()
+        status, error, steps, reason = "max_steps", None, 0, ""
+        self.monitor.reset()
+
+        speculation: Optional[Speculation] = None
+        try:
+            with tracing.span("goal", goal=user_goal[:200], mode="async", resumed=resume is not None):
+                first_step = steps = self._open_journal(user_goal, resume)
+                await self.cli.start()
+                if resume and resume.pending_task:
+                    await asyncio.to_thread(self._rerun_pending, resume.pending_task)
+                speculation = await self._settle(user_goal, None)
+
+                for i in range(first_step, self.max_steps):
+                    with tracing.span("step", index=i + 1) as step_span:
+                        speculation = await self._run_step_async(user_goal, i, speculation, step_span)
+                    steps = i + 1
+                    verdict = await self._acheck_goal(user_goal, steps)
+                    self._checkpoint(steps)
+                    if verdict.done:
+                        status, reason = verdict.status, verdict.reason
+                        break
+
+        except KeyboardInterrupt:
+            print("\n\n[!] User interrupted session.")
+            status = "interrupted"
+        except Exception as e:
+            print(f"\n[!] Unexpected Error: {e}")
+            status, error = "error", str(e)
+        finally:
+            if speculation:
+                speculation.cancel()
+            print("\nShutting down CLI...")
+            await self.cli.cleanup()
+            self._close_journal(status)
+            print("\n" + self.tracer.summary())
+            print("\n" + self.brain.router.summary())
+            print(parse_summary())
+        return self._goal_result(user_goal, status, steps, started, error, reason)
+
+    async def _acheck_goal(self, user_goal: str, step: int) -> Verdict:
+        with tracing.span("goal_check", step=step) as span:
+            snapshot = self.cli.get_snapshot()
+            verdict = self.monitor.observe(snapshot, self.cli.alive, self.cli.output_offset)
+            if not verdict.done and self.monitor.should_assess(step):
+                progress = await asyncio.to_thread(self.tasks.get_progress_summary)
+                assessment = await self.brain.aassess_goal(user_goal, progress, self.history.messages(), snapshot)
+                verdict = self._apply_assessment(assessment)
+            return self._report_verdict(verdict, span)
+
+    async def _run_step_async(self, user_goal: str, i: int, speculation: Optional[Speculation], step_span) -> Speculation:
+        print(f"\n[Loop {i+1}] Observing...")
+
+        if speculation and speculation.version == self.cli.version:
+            step_span.set(speculation_hit=True)
+            decision = await speculation.task
+        else:
+            if speculation:
+                speculation.cancel()
+            step_span.set(speculation_hit=False)
+            decision = await self._decide(user_goal)
+
+        action = decision.get("action", "cli_interaction")
+        confidence = decision.get("confidence", "low")
+        step_span.set(action=action, confidence=confidence)
+        print(f"[Decision] {action} (Conf: {confidence})")
+
+        if action == 'delegate_to_subagent':
+            task = decision.get("subagent_task", "Analyze situation")
+            print(f"[Action] Delegating to Subagent: {task}")
+            if self.journal:
+                self.journal.record_pending(i + 1, task)
+
+            with tracing.span("subagent"):
+                result = await asyncio.to_thread(self.subagent.execute_task, task)
+
+            self.history.append({
+                "role": "system",
+                "content": f"Subagent Output: {result}"
+            }, compact=False)
+            print(f"[Result] {result[:100]}...")
+
+        elif action == 'cli_interaction':
+            sys_p = decision.get("system_prompt", "You are a CLI operator.")
+            user_p = decision.get("user_prompt", "What input?")
+
+            with tracing.span("cli_operator"):
+                input_str = await self.brain.acli_keystrokes(self.history.messages(), user_p, sys_p)
+
+            clean_input = input_str.strip('"\' \n')
+            print(f"[Action] Sending Input: '{clean_input}'")
+            self.history.append({"role": "user", "content": user_p}, compact=False)
+            self.history.append({"role": "assistant", "content": clean_input}, compact=False)
+            await self.cli.send_input(clean_input)
+            self.monitor.record_input(clean_input)
+
+        else:
+            print("[Action] Waiting...")
+            with tracing.span("sleep"):
+                await self.cli.wait_for_change(self.wait_timeout)
+
+        # Summarize old turns on the dispatcher, then prepare the next
+        # decision while the command is still running.
+        self._compact_history()
+        return await self._settle(user_goal, None)
+
+
+# --- HEADLESS BATCH MODE ---
+
+def read_goals(path: str) -> List[str]:
+    """One goal per line; blank lines and '#' comments are skipped."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def _run_batch_goal(index: int, goal: str, workdir: str, use_async: bool, max_steps: int,
+                    cache_dir: str) -> Dict:
+    """Run one goal in its own directory (worker process entry point).
+
+    The terminal log, REPL state, task list and traces all live under
+    `workdir`; only the response cache is shared across goals. In the
+    record/replay cache modes each goal has its own session file there too.
+    """
+    import contextlib
+
+    started_at = time.time()
+    workdir_path = Path(workdir)
+    workdir_path.mkdir(parents=True, exist_ok=True)
+    os.chdir(workdir_path)
+    log_path = workdir_path / "orchestrator.log"
+    with open(log_path, "w", encoding="utf-8", buffering=1) as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        brain = orchestrator = None
+        try:
+            brain = MetaBrain(cache=ResponseCache(cache_dir, mode=LLM_CACHE_MODE,
+                                                  session_path=workdir_path / BATCH_SESSION_FILE))
+            cls = AsyncOrchestrator if use_async else Orchestrator
+            orchestrator = cls(str(GUI_SCRIPT), project_root=str(workdir_path), brain=brain)
+            orchestrator.max_steps = max_steps
+            orchestrator.confirm_timeout = 0
+            result = orchestrator.run_goal(goal)
+        except Exception as e:
+            print(f"[Batch] Goal failed to start: {e}")
+            result = {"goal": goal, "status": "error", "steps": 0, "elapsed_s": 0.0, "error": str(e),
+                      "reason": "", "trace": None}
+        finally:
+            # Pool workers run many goals; leave no dispatcher threads or open traces behind
+            if brain is not None:
+                brain.dispatcher.shutdown(wait=False, cancel_pending=True)
+            if orchestrator is not None:
+                orchestrator.tracer.close()
+
+    result.update({
+        "index": index,
+        "workdir": str(workdir_path),
+        "log": str(log_path),
+        "started_at": started_at,
+        "finished_at": time.time(),
+    })
+    with open(workdir_path / "result.json", "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    return result
+
+
+def run_batch(goals_file: str, workers: int = 2, out_dir: Optional[str] = None,
+              use_async: bool = False, max_steps: int = 20) -> List[Dict]:
+    """Run every goal in `goals_file` headlessly across a process pool.
+
+    Each goal gets `<out_dir>/goal_NNN/` as its working directory. Per-goal
+    results are written there as they finish, and all of them are collected
+    in `<out_dir>/results.json`, which is rewritten after each completion.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    goals = read_goals(goals_file)
+    if not goals:
+        print(f"[Batch] No goals in {goals_file}")
+        return []
+
+    batch_dir = Path(out_dir or Path("batch_runs") / time.strftime("%Y%m%d-%H%M%S")).resolve()
+    batch_dir.mkdir(parents=True, exist_ok=True)
+    cache_dir = str(Path(".flexi/llm_cache").resolve())
+    if LLM_CACHE_MODE == "replay":
+        # Replays the sessions recorded by an earlier run into the same --batch-dir
+        missing = [i for i in range(1, len(goals) + 1)
+                   if not (batch_dir / f"goal_{i:03d}" / BATCH_SESSION_FILE).exists()]
+        if missing:
+            print(f"[Batch] Replay needs a recorded session per goal; missing for goals {missing}")
+            return []
+    results_path = batch_dir / "results.json"
+    print(f"[Batch] {len(goals)} goals, {workers} workers -> {batch_dir}")
+
+    results: List[Dict] = []
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {
+            pool.submit(_run_batch_goal, i, goal, str(batch_dir / f"goal_{i:03d}"),
+                        use_async, max_steps, cache_dir): (i, goal)
+            for i, goal in enumerate(goals, 1)
+        }
+        try:
+            for fut in as_completed(futures):
+                i, goal = futures[fut]
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    result = {"index": i, "goal": goal, "status": "error", "steps": 0,
+                              "elapsed_s": 0.0, "error": f"worker crashed: {e}", "reason": "", "trace": None}
+                results.append(result)
+                print(f"[Batch] #{i:03d} {result['status']:<12} {result['steps']:>3} steps "
+                      f"{result['elapsed_s']:>8.1f}s  {goal[:60]}")
+                results.sort(key=lambda r: r["index"])
+                results_path.write_text(json.dumps({
+                    "goals_file": str(Path(goals_file).resolve()),
+                    "workers": workers,
+                    "elapsed_s": round(time.perf_counter() - t0, 3),
+                    "results": results,
+                }, indent=2), encoding="utf-8")
+        except KeyboardInterrupt:
+            print("\n[Batch] Interrupted; cancelling queued goals.")
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    done = sum(1 for r in results if r["status"] != "error")
+    print(f"[Batch] Finished {done}/{len(goals)} goals in {time.perf_counter() - t0:.1f}s. Results: {results_path}")
+    return results
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RLM Workspace Manager")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Use the asyncio orchestrator (overlaps inference with command execution)")
+    parser.add_argument("--batch", metavar="GOALS_FILE",
+                        help="Run every goal in this file (one per line) headlessly, then exit")
+    parser.add_argument("--workers", type=int, default=2, help="Parallel goals in batch mode")
+    parser.add_argument("--batch-dir", help="Output directory for batch mode (default: batch_runs/<timestamp>)")
+    parser.add_argument("--max-steps", type=int, default=20, help="Loop steps per goal")
+    parser.add_argument("--resume", nargs="?", const="latest", metavar="JOURNAL",
+                        help="Continue an interrupted goal from its checkpoint journal "
+                             "(default: the most recent unfinished one in .flexi/checkpoints)")
+    cli_args = parser.parse_args()
+
+    if cli_args.batch:
+        try:
+            run_batch(cli_args.batch, cli_args.workers, cli_args.batch_dir,
+                      cli_args.use_async, cli_args.max_steps)
+        except KeyboardInterrupt:
+            print("\nExiting.")
+        sys.exit(0)
+
+    checkpoint = None
+    if cli_args.resume:
+        # Checked before the terminal starts: a finished goal has nothing to continue
+        try:
+            checkpoint = (latest_checkpoint() if cli_args.resume == "latest"
+                          else load_checkpoint(cli_args.resume))
+        except (OSError, ValueError) as e:
+            sys.exit(f"Cannot resume: {e}")
+        if checkpoint is not None and checkpoint.finished:
+            sys.exit(f"Cannot resume: the goal in {checkpoint.path} already finished "
+                     f"({checkpoint.status}).")
+
     # Default to the internal one
-    script = os.path.join("core", "html_terminal.py")
+    script = str(GUI_SCRIPT)
         
-    orchestrator = Orchestrator(script)
+    orchestrator = AsyncOrchestrator(script) if cli_args.use_async else Orchestrator(script)
+    orchestrator.max_steps = cli_args.max_steps
     
     try:
         # Task Selection Interface
         print("\n--- RLM Workspace Manager ---")
         
-        goal = input("Enter your goal (or press Enter to skip to improvements): ").strip()
-        
-        if goal:
-            orchestrator.run_goal(goal)
+        if cli_args.resume:
+            if checkpoint is None:
+                print("No unfinished goal to resume.")
+            else:
+                orchestrator.run_goal(checkpoint.goal, resume=checkpoint)
+        else:
+            goal = input("Enter your goal (or press Enter to skip to improvements): ").strip()
+            if goal:
+                orchestrator.run_goal(goal)
             
         # Post-Run Improvement Cycle
         orchestrator.run_auto_improvement()
@@ -0,0 +1,16 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The repo is not installed as a package; tests import `core.*` from the checkout.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.html_terminal import HtmlLogger  # noqa: E402
+
+
+@pytest.fixture
+def logger(tmp_path):
+    log = HtmlLogger(str(tmp_path / "terminal_log.html"), flush_interval=60)
+    yield log
+    log.close()
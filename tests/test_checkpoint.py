@@ -0,0 +1,104 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from core.checkpoint import GoalJournal, latest_checkpoint, load_checkpoint
+
+
+def journal(tmp_path, goal="build it"):
+    return GoalJournal.create(goal, tmp_path)
+
+
+def test_load_replays_to_the_latest_step(tmp_path):
+    j = journal(tmp_path)
+    j.record_step(1, {"entries": ["one"]}, 10, "screen 1")
+    j.record_pending(2, "inspect files")
+    j.record_step(2, {"entries": ["one", "two"]}, 25, "screen 2")
+    j.record_pending(3, "run tests")
+    j.close()
+
+    cp = load_checkpoint(j.path)
+    assert cp.goal == "build it"
+    assert (cp.step, cp.history, cp.snapshot_offset, cp.snapshot_tail) == (2, {"entries": ["one", "two"]}, 25, "screen 2")
+    assert cp.pending_task == "run tests"      # started after the last finished step
+    assert not cp.finished and cp.status is None
+
+
+def test_torn_final_line_is_ignored(tmp_path):
+    j = journal(tmp_path)
+    j.record_step(1, {"entries": []}, 5, "tail")
+    j.close()
+    with open(j.path, "a", encoding="utf-8") as f:
+        f.write('{"type": "step", "step": 2, "hist')
+    cp = load_checkpoint(j.path)
+    assert cp.step == 1
+
+
+def test_finished_journal(tmp_path):
+    j = journal(tmp_path)
+    j.record_step(1, {}, 0, "")
+    j.finish("completed")
+    j.close()
+    cp = load_checkpoint(j.path)
+    assert cp.finished and cp.status == "completed"
+
+
+def test_resumed_journal_continues_in_the_same_file(tmp_path):
+    j = journal(tmp_path)
+    j.record_step(3, {"entries": ["x"]}, 7, "before crash")
+    j.close()
+
+    cp = load_checkpoint(j.path)
+    resumed = GoalJournal(cp.path)
+    resumed.record_resume(cp.step)
+    resumed.record_step(4, {"entries": ["x", "y"]}, 9, "after resume")
+    resumed.close()
+
+    again = load_checkpoint(j.path)
+    assert (again.goal, again.step, again.snapshot_tail) == ("build it", 4, "after resume")
+    assert not again.finished
+
+
+def test_not_a_journal(tmp_path):
+    path = tmp_path / "other.jsonl"
+    path.write_text('{"type": "step", "step": 1}\n', encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_checkpoint(path)
+
+
+def test_latest_checkpoint_skips_finished_and_broken_journals(tmp_path):
+    assert latest_checkpoint(tmp_path / "missing") is None
+
+    older = GoalJournal(tmp_path / "goal_a.jsonl")
+    older._write({"type": "start", "goal": "older unfinished"})
+    older.close()
+    newer = GoalJournal(tmp_path / "goal_b.jsonl")
+    newer._write({"type": "start", "goal": "newer finished"})
+    newer.finish("completed")
+    newer.close()
+    (tmp_path / "goal_c.jsonl").write_text("garbage\n", encoding="utf-8")
+    for age, name in enumerate(["goal_c.jsonl", "goal_b.jsonl", "goal_a.jsonl"]):
+        t = 1_700_000_000 - age * 60
+        os.utime(tmp_path / name, (t, t))
+
+    cp = latest_checkpoint(tmp_path)
+    assert cp is not None and cp.goal == "older unfinished"
+
+    older = GoalJournal(tmp_path / "goal_a.jsonl")
+    older.finish("completed")
+    older.close()
+    assert latest_checkpoint(tmp_path) is None
+
+
+def test_main_refuses_to_resume_a_finished_goal(tmp_path):
+    j = journal(tmp_path)
+    j.finish("completed")
+    j.close()
+    main = Path(__file__).resolve().parent.parent / "main.py"
+    proc = subprocess.run([sys.executable, str(main), "--resume", str(j.path)], cwd=tmp_path,
+                          stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=60)
+    assert proc.returncode == 1
+    assert "already finished (completed)" in proc.stderr
@@ -0,0 +1,57 @@
+import os
+import sys
+
+import pytest
+
+from core.html_terminal import CommandStats, main, read_events, run_builtin, run_command
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="uses POSIX shell commands")
+
+
+def command_events(logger):
+    logger.flush()
+    return [e for e in read_events(logger.events_file) if e["kind"] == "command"]
+
+
+def test_run_command_records_exit_bytes_and_usage(logger):
+    burn = f"{sys.executable} -c \"sum(range(3_000_000)); print('done')\""
+    assert run_command(burn, logger) == 0
+    assert run_command("echo oops >&2; exit 3", logger) == 3
+
+    ok, failed = command_events(logger)
+    assert (ok["exit"], ok["stdout_bytes"], ok["stderr_bytes"]) == (0, 5, 0)
+    assert (failed["exit"], failed["stdout_bytes"], failed["stderr_bytes"]) == (3, 0, 5)
+    assert ok["duration_s"] > 0
+    if hasattr(os, "wait4"):
+        assert ok["user_s"] + ok["sys_s"] > 0
+        assert ok["max_rss_kb"] > 1024      # includes the python child, not just the shell
+    assert [r["cmd"] for r in logger.stats.records] == [burn, "echo oops >&2; exit 3"]
+
+
+def test_summary_orders_by_wall_time_and_groups_by_program():
+    stats = CommandStats()
+    assert stats.summary() == "no commands recorded"
+    stats.add({"cmd": "make test", "exit": 0, "duration_s": 3.0, "user_s": 2.0, "sys_s": 0.5, "max_rss_kb": 2048})
+    stats.add({"cmd": "make lint", "exit": 1, "duration_s": 1.0, "user_s": None, "sys_s": None})
+    stats.add({"cmd": "ls", "exit": 0, "duration_s": 0.5, "job": 2})
+    lines = stats.summary(top=2).splitlines()
+    assert lines[0] == "3 commands, 4.5s wall, 2.0s user, 0.5s sys, 1 failed"
+    assert lines[1] == "Slowest 2:"
+    assert lines[3].endswith("make test") and "2.0M" in lines[3]
+    assert lines[4].endswith("make lint") and " - " in lines[4]
+    assert lines[5] == "By program:"
+    assert lines[6].split() == ["4.000s", "88.9%", "2x", "make"]
+    assert lines[7].split() == ["0.500s", "11.1%", "1x", "ls"]
+
+
+def test_stats_builtin_and_cli(logger, capsys):
+    run_command("true", logger)
+    run_command("false", logger)
+    assert run_builtin("stats 1", None, logger) is True
+    out = capsys.readouterr().out
+    assert "2 commands" in out and "Slowest 1:" in out
+    logger.close()
+
+    main(["stats", logger.events_file])
+    out = capsys.readouterr().out
+    assert "2 commands" in out and "1 failed" in out
@@ -0,0 +1,180 @@
+import asyncio
+import contextvars
+import threading
+import time
+
+import pytest
+
+from core.dispatcher import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, PRIORITY_PLANNING, InferenceDispatcher
+
+TIMEOUT = 5
+
+
+@pytest.fixture
+def make():
+    dispatchers = []
+
+    def make(**kwargs):
+        d = InferenceDispatcher(**kwargs)
+        dispatchers.append(d)
+        return d
+    yield make
+    for d in dispatchers:
+        d.shutdown(wait=True, cancel_pending=True)
+
+
+def blocker(dispatcher, model="m"):
+    """Occupy one of `model`'s slots until the returned event is set."""
+    started, gate = threading.Event(), threading.Event()
+
+    def hold():
+        started.set()
+        gate.wait(TIMEOUT)
+    future = dispatcher.submit(hold, model=model)
+    assert started.wait(TIMEOUT)
+    return gate, future
+
+
+def test_priority_then_fifo_order(make):
+    d = make(max_workers=1)
+    gate, first = blocker(d)
+    order = []
+    futures = [d.submit(order.append, name, model="m", priority=prio) for name, prio in [
+        ("background", PRIORITY_BACKGROUND), ("planning-1", PRIORITY_PLANNING),
+        ("interactive", PRIORITY_INTERACTIVE), ("planning-2", PRIORITY_PLANNING),
+    ]]
+    gate.set()
+    for f in [first, *futures]:
+        f.result(TIMEOUT)
+    assert order == ["interactive", "planning-1", "planning-2", "background"]
+
+
+def test_busy_model_does_not_block_other_models(make):
+    d = make(max_workers=2)
+    gate, held = blocker(d, "slow")
+    queued = d.submit(lambda: "slow done", model="slow")
+    assert d.submit(lambda: "fast done", model="fast").result(TIMEOUT) == "fast done"
+    assert not queued.done()
+    gate.set()
+    assert queued.result(TIMEOUT) == "slow done"
+
+
+def test_model_limit_caps_concurrency(make):
+    d = make(max_workers=4, model_limits={"m": 2})
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    def job():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+    for f in [d.submit(job, model="m") for _ in range(6)]:
+        f.result(TIMEOUT)
+    assert peak[0] == 2
+    assert d.stats()["completed"] == 6
+
+
+def test_nested_submit_runs_inline(make):
+    d = make(max_workers=1)
+    outer = d.submit(lambda: d.submit(lambda: "inner", model="m").result(TIMEOUT), model="m")
+    assert outer.result(TIMEOUT) == "inner"
+
+
+def test_exceptions_reach_the_future(make):
+    d = make()
+    with pytest.raises(ZeroDivisionError):
+        d.run(lambda: 1 / 0, model="m")
+    assert d.run(lambda: "still working", model="m") == "still working"
+
+
+def test_context_is_carried_into_workers(make):
+    var = contextvars.ContextVar("var", default="unset")
+    var.set("caller")
+    assert make().run(var.get, model="m") == "caller"
+
+
+def test_reserved_slot_holds_the_model_until_released(make):
+    d = make(max_workers=2)
+    release = d.reserve("m").result(TIMEOUT)
+    job = d.submit(lambda: "ran", model="m")
+    time.sleep(0.05)
+    assert not job.done()
+    assert d.stats()["running"] == {"m": 1}
+    release()
+    release()   # idempotent
+    assert job.result(TIMEOUT) == "ran"
+    assert d.stats()["running"] == {}
+
+
+def test_cancelled_claim_is_withdrawn(make):
+    d = make(max_workers=1)
+    gate, held = blocker(d)
+    claim = d.reserve("m")
+    assert claim.cancel()
+    after = d.submit(lambda: "ran", model="m")
+    gate.set()
+    assert after.result(TIMEOUT) == "ran"
+    assert d.stats()["running"] == {}
+
+
+def test_claims_and_jobs_share_priority_order(make):
+    d = make(max_workers=1)
+    gate, held = blocker(d)
+    order = []
+    job = d.submit(order.append, "job", model="m", priority=PRIORITY_BACKGROUND)
+    claim = d.reserve("m", PRIORITY_INTERACTIVE)
+    claim.add_done_callback(lambda f: order.append("claim"))
+    gate.set()
+    claim.result(TIMEOUT)()
+    job.result(TIMEOUT)
+    assert order == ["claim", "job"]
+
+
+def test_async_slots_respect_the_model_limit(make):
+    d = make(max_workers=1, model_limits={"m": 2})
+    running, peak = [0], [0]
+
+    async def call():
+        async with d.slot("m"):
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            await asyncio.sleep(0.02)
+            running[0] -= 1
+
+    async def main():
+        await asyncio.gather(*(call() for _ in range(6)))
+    asyncio.run(main())
+    assert peak[0] == 2
+    assert d.stats()["running"] == {}
+
+
+def test_cancelled_slot_waiter_leaks_nothing(make):
+    d = make(max_workers=1)
+
+    async def main():
+        async with d.slot("m"):
+            waiter = asyncio.ensure_future(d.slot("m").__aenter__())
+            await asyncio.sleep(0.02)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+        async with d.slot("m"):
+            return "reacquired"
+    assert asyncio.run(asyncio.wait_for(main(), TIMEOUT)) == "reacquired"
+    time.sleep(0.05)
+    assert d.stats()["running"] == {}
+
+
+def test_shutdown_cancels_pending_and_refuses_new_work(make):
+    d = make(max_workers=1)
+    gate, held = blocker(d)
+    pending = d.submit(lambda: None, model="m")
+    d.shutdown(wait=False, cancel_pending=True)
+    assert pending.cancelled()
+    with pytest.raises(RuntimeError):
+        d.submit(lambda: None, model="m")
+    gate.set()
+    held.result(TIMEOUT)
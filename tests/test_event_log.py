@@ -0,0 +1,104 @@
+import json
+import os
+
+from core.html_terminal import EventLog, event_count, index_event_log, read_events
+
+
+def write_log(path, n, start=0):
+    log = EventLog(path)
+    for i in range(start, start + n):
+        log.append("output", n=i)
+    log.close()
+
+
+def numbers(path, *args):
+    return [e["n"] for e in read_events(path, *args)]
+
+
+def offsets(path):
+    out, offset = [], 0
+    with open(path, "rb") as f:
+        for line in f:
+            if line.endswith(b"\n"):
+                out.append(offset)
+            offset += len(line)
+    return out
+
+
+def index_offsets(path):
+    with open(path + ".idx", "rb") as f:
+        data = f.read()
+    return [int.from_bytes(data[i:i + 8], "little") for i in range(0, len(data) - 7, 8)]
+
+
+def test_append_and_read_slices(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    write_log(path, 10)
+    write_log(path, 5, start=10)        # a later session appends to the same log
+    assert event_count(path) == 15
+    assert numbers(path) == list(range(15))
+    assert numbers(path, 3, 6) == [3, 4, 5]
+    assert numbers(path, -2) == [13, 14]
+    assert numbers(path, 20) == []
+    assert index_offsets(path) == offsets(path)
+
+
+def test_unflushed_events_are_not_indexed(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    log = EventLog(path)
+    log.append("output", n=0)
+    log.flush()
+    log.append("output", n=1)
+    assert numbers(path) == [0]
+    log.close()
+    assert numbers(path) == [0, 1]
+
+
+def test_missing_index_is_rebuilt(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    write_log(path, 4)
+    os.remove(path + ".idx")
+    assert event_count(path) == 4
+    assert numbers(path) == [0, 1, 2, 3]
+
+
+def test_index_catches_up_with_events_written_after_it(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    write_log(path, 3)
+    with open(path, "ab") as f:      # crash between writing events and their offsets
+        for i in (3, 4):
+            f.write((json.dumps({"kind": "output", "n": i}) + "\n").encode())
+    assert index_event_log(path) == 5
+    assert index_offsets(path) == offsets(path)
+
+
+def test_torn_index_entry_is_dropped(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    write_log(path, 3)
+    with open(path + ".idx", "ab") as f:
+        f.write(b"\x01\x02\x03")
+    assert index_event_log(path) == 3
+    assert os.path.getsize(path + ".idx") == 3 * 8
+
+
+def test_index_that_does_not_match_the_log_is_rebuilt(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    write_log(path, 6)
+    write_log(str(tmp_path / "short.jsonl"), 2)
+    os.replace(str(tmp_path / "short.jsonl"), path)   # log replaced, stale index left behind
+    assert index_event_log(path) == 2
+    assert index_offsets(path) == offsets(path)
+
+
+def test_torn_final_line_is_repaired_on_open(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    write_log(path, 2)
+    with open(path, "ab") as f:
+        f.write(b'{"kind": "output", "n": 99, "te')
+    # Readers skip the torn line without touching the file
+    assert numbers(path) == [0, 1]
+    assert (tmp_path / "log.jsonl").read_bytes().endswith(b'"te')
+
+    write_log(path, 2, start=2)        # the next session cuts it off and appends cleanly
+    assert numbers(path) == [0, 1, 2, 3]
+    assert index_offsets(path) == offsets(path)
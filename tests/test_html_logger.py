@@ -0,0 +1,112 @@
+import os
+
+from core.html_terminal import HTML_FOOTER, HtmlLogger, StreamLog, read_events
+
+
+def make(tmp_path, **kwargs):
+    kwargs.setdefault("flush_interval", 60)
+    return HtmlLogger(str(tmp_path / "log.html"), **kwargs)
+
+
+def segments(tmp_path):
+    return sorted(int(name.split(".")[1]) for name in os.listdir(tmp_path)
+                  if name.startswith("log.") and name.endswith(".html") and name.split(".")[1].isdigit())
+
+
+def kinds(tmp_path):
+    return [e["kind"] for e in read_events(str(tmp_path / "log.jsonl"))]
+
+
+def test_entries_are_buffered_until_flush(tmp_path):
+    log = make(tmp_path)
+    log.log_input("echo buffered")
+    assert "echo buffered" not in (tmp_path / "log.html").read_text(encoding="utf-8")
+    log.flush()
+    assert "echo buffered" in (tmp_path / "log.html").read_text(encoding="utf-8")
+    log.close()
+    assert (tmp_path / "log.html").read_text(encoding="utf-8").endswith(HTML_FOOTER)
+
+
+def test_buffer_is_written_once_flush_bytes_are_pending(tmp_path):
+    log = make(tmp_path, flush_bytes=500)
+    log.log_output("x" * 600)
+    assert "x" * 600 in (tmp_path / "log.html").read_text(encoding="utf-8")
+    log.close()
+
+
+def test_rotates_by_size_and_links_segments(tmp_path):
+    log = make(tmp_path, flush_bytes=1, segment_bytes=2000)
+    for i in range(20):
+        log.log_output(f"line {i} " + "y" * 400)
+    log.close()
+    numbers = segments(tmp_path)
+    assert numbers == list(range(1, len(numbers) + 1)) and len(numbers) >= 3
+    for n in numbers:
+        text = (tmp_path / f"log.{n}.html").read_text(encoding="utf-8")
+        assert text.endswith(HTML_FOOTER)
+        assert (f'href="log.{n - 1}.html"' in text) == (n > 1)
+    active = (tmp_path / "log.html").read_text(encoding="utf-8")
+    assert f'href="log.{numbers[-1]}.html"' in active
+    # Every entry is in exactly one segment
+    every = "".join((tmp_path / f"log.{n}.html").read_text(encoding="utf-8") for n in numbers) + active
+    assert all(every.count(f"line {i} ") == 1 for i in range(20))
+    # The event log is not rotated
+    assert kinds(tmp_path).count("output") == 20
+
+
+def test_previous_session_is_archived_not_truncated(tmp_path):
+    first = make(tmp_path)
+    first.log_input("from the first session")
+    first.close()
+    second = make(tmp_path)
+    second.log_input("from the second session")
+    second.close()
+    assert segments(tmp_path) == [1]
+    assert "from the first session" in (tmp_path / "log.1.html").read_text(encoding="utf-8")
+    assert "from the first session" not in (tmp_path / "log.html").read_text(encoding="utf-8")
+    assert kinds(tmp_path).count("session") == 2
+
+
+def test_long_output_spills_to_a_linked_file(tmp_path):
+    log = make(tmp_path, max_entry_chars=100)
+    text = "head" + "z" * 1000 + "tail"
+    log.log_output(text)
+    log.close()
+    spilled = tmp_path / "log_spill" / "seg1_1.txt"
+    assert spilled.read_text(encoding="utf-8") == text
+    page = (tmp_path / "log.html").read_text(encoding="utf-8")
+    assert "head" in page and "tail" in page and "[908 chars omitted]" in page
+    assert 'href="log_spill/seg1_1.txt"' in page
+    assert [e for e in read_events(str(tmp_path / "log.jsonl")) if e["kind"] == "spill"][0]["path"] == "log_spill/seg1_1.txt"
+
+
+def test_pruning_removes_old_segments_and_their_spills(tmp_path):
+    log = make(tmp_path, flush_bytes=1, segment_bytes=1500, keep_segments=2, max_entry_chars=300)
+    for i in range(12):
+        log.log_output(f"out {i} " + "w" * 600)
+    log.close()
+    numbers = segments(tmp_path)
+    assert len(numbers) == 2 and numbers[-1] == log.segment - 1
+    spill_segments = {int(name[3:].split("_")[0]) for name in os.listdir(tmp_path / "log_spill")}
+    assert min(spill_segments) >= log.segment - 2
+
+
+def test_stream_log_batches_and_spills_past_the_cap(tmp_path):
+    log = make(tmp_path, max_entry_chars=60)
+    stream = StreamLog(log, batch_chars=1000, batch_seconds=60)
+    for _ in range(5):
+        stream.add("0123456789")
+    stream.add("err", is_error=True)        # a stream switch ends the batch
+    for _ in range(10):
+        stream.add("abcdefghij")
+    stream.close()
+    log.close()
+    events = [e for e in read_events(str(tmp_path / "log.jsonl")) if e["kind"] in ("output", "spill")]
+    assert [(e["kind"], e.get("stream"), e.get("text")) for e in events[:3]] == [
+        ("output", "stdout", "0123456789" * 5),
+        ("output", "stderr", "err"),
+        ("output", "stdout", "abcdefg"),        # up to the cap, the rest is spilled
+    ]
+    assert events[3]["kind"] == "spill" and len(events) == 4
+    assert (tmp_path / events[3]["path"]).read_text(encoding="utf-8") == ("abcdefghij" * 10)[7:]
+    assert stream.bytes == {False: 150, True: 3}
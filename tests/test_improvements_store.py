@@ -0,0 +1,176 @@
+import pytest
+
+from core.improvements_manager import (
+    ImprovementsStore, SqliteImprovementsStore, TrackerError, load_data, save_data,
+)
+
+
+def make_store(backend, root):
+    if backend == "json":
+        return ImprovementsStore(root / "improvements.json", root)
+    return SqliteImprovementsStore(root / "improvements.db", root)
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def store(request, tmp_path):
+    s = make_store(request.param, tmp_path)
+    yield s
+    if hasattr(s, "close"):
+        s.close()
+
+
+def summary(items):
+    return [(i.title, i.status, i.source) for i in items]
+
+
+def drive(store):
+    """The same sequence of calls against either backend; returns what was observed."""
+    seen = []
+    a = store.add("alpha")
+    b = store.add("beta")
+    store.add("gamma", status="completed")
+    seen.append(summary(store.list()))
+    seen.append(summary(store.list(status="suggestion")))
+    seen.append(summary(store.list(search="ET")))
+    seen.append(store.get(b.id).title)
+    seen.append(store.get("missing"))
+    r = store.next()
+    seen.append((r.ok, r.item.title, r.item.status))
+    r = store.next()
+    seen.append((r.ok, r.message.split(":")[0]))
+    r = store.resolve()
+    seen.append((r.ok, r.item.status))
+    r = store.next(b.id)
+    seen.append((r.ok, r.item.title))
+    seen.append(store.next(a.id).ok)
+    r = store.resolve(b.id, status="rejected")
+    seen.append((r.ok, r.item.status))
+    seen.append(store.resolve().ok)
+    seen.append(store.resolve("missing").message)
+    seen.append(summary(store.list()))
+    return seen
+
+
+def test_backends_behave_the_same(tmp_path):
+    (tmp_path / "j").mkdir()
+    (tmp_path / "s").mkdir()
+    json_store = make_store("json", tmp_path / "j")
+    sqlite_store = make_store("sqlite", tmp_path / "s")
+    try:
+        assert drive(json_store) == drive(sqlite_store)
+    finally:
+        sqlite_store.close()
+
+
+def test_scan_and_prune_agree(tmp_path):
+    results = []
+    for backend in ("json", "sqlite"):
+        root = tmp_path / backend
+        root.mkdir()
+        src = root / "mod.py"
+        src.write_text("# TODO: first\n# TODO: second\n", encoding="utf-8")
+        store = make_store(backend, root)
+        added = store.scan(use_cache=False)
+        again = store.scan(use_cache=False)
+        src.write_text("# TODO: second\n", encoding="utf-8")
+        removed = store.prune()
+        results.append((summary(added), again, summary(removed), summary(store.list()),
+                        [(i.extra.get("source_file"), i.extra.get("source_line")) for i in store.list()]))
+        if hasattr(store, "close"):
+            store.close()
+    assert results[0] == results[1]
+    added, again, removed, remaining, provenance = results[0]
+    assert [t for t, _, _ in added] == ["TODO: # TODO: first", "TODO: # TODO: second"]
+    assert again == []
+    assert [t for t, _, _ in removed] == ["TODO: # TODO: first"]
+    assert provenance == [("mod.py", 2)]
+
+
+def test_export_import_round_trip(tmp_path):
+    json_store = make_store("json", tmp_path)
+    json_store.add("one")
+    json_store.add("two")
+    json_store.next()
+    data = json_store.export_data()
+    data["items"][1]["custom"] = {"nested": [1, 2]}
+
+    sqlite_store = make_store("sqlite", tmp_path)
+    try:
+        sqlite_store.import_data(data)
+        exported = sqlite_store.export_data()
+        assert exported["items"] == data["items"]
+        assert exported["meta"]["version"] == data["meta"]["version"]
+
+        sqlite_store.import_data({"items": data["items"][:1]}, replace=True)
+        assert [i.title for i in sqlite_store.list()] == ["one"]
+    finally:
+        sqlite_store.close()
+
+
+def test_apply_changes_leaves_other_items_alone(store, tmp_path):
+    a = store.add("a")
+    b = store.add("b")
+    c = store.add("c")
+    snapshot = {i["id"]: dict(i) for i in store.export_data()["items"]}
+
+    # Another writer picks up `a` after the snapshot was taken
+    other = make_store("sqlite" if isinstance(store, SqliteImprovementsStore) else "json", tmp_path)
+    assert other.next(a.id).ok
+    if hasattr(other, "close"):
+        other.close()
+
+    edited = dict(snapshot[b.id], title="b edited")
+    new = dict(snapshot[c.id], id="newid", title="d")
+    store.apply_changes(upsert=[edited, new], delete=[c.id])
+
+    assert summary(store.list()) == [
+        ("a", "in_progress", "manual"), ("b edited", "suggestion", "manual"), ("d", "suggestion", "manual"),
+    ]
+
+
+def test_sqlite_writes_are_transactional(tmp_path):
+    store = make_store("sqlite", tmp_path)
+    try:
+        store.add("kept")
+        with pytest.raises(RuntimeError):
+            with store._transaction() as conn:
+                conn.execute("DELETE FROM items")
+                raise RuntimeError("boom")
+        assert [i.title for i in store.list()] == ["kept"]
+    finally:
+        store.close()
+
+
+def test_sqlite_next_is_exclusive_across_connections(tmp_path):
+    first = make_store("sqlite", tmp_path)
+    second = make_store("sqlite", tmp_path)
+    try:
+        first.add("one")
+        first.add("two")
+        assert first.next().ok
+        r = second.next()
+        assert not r.ok and r.item.title == "one"
+    finally:
+        first.close()
+        second.close()
+
+
+def test_unparseable_json_is_never_overwritten(tmp_path):
+    path = tmp_path / "improvements.json"
+    path.write_text('{"items": [', encoding="utf-8")
+    store = make_store("json", tmp_path)
+    with pytest.raises(TrackerError):
+        store.add("x")
+    with pytest.raises(TrackerError):
+        load_data(str(path))
+    assert path.read_text(encoding="utf-8") == '{"items": ['
+
+
+def test_json_store_rereads_external_changes(tmp_path):
+    store = make_store("json", tmp_path)
+    store.add("mine")
+    data = load_data(str(tmp_path / "improvements.json"))
+    data["items"].append({"id": "ext", "title": "theirs", "status": "suggestion",
+                          "created_at": "", "updated_at": "", "source": "manual"})
+    save_data(data, str(tmp_path / "improvements.json"))
+    assert [i.title for i in store.list()] == ["mine", "theirs"]
@@ -0,0 +1,117 @@
+import os
+import time
+
+import pytest
+
+from core.html_terminal import JobTable, read_events, run_builtin, split_background
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="uses POSIX shell commands")
+
+
+@pytest.fixture
+def jobs(logger):
+    table = JobTable(logger=logger)
+    yield table
+    table.close()
+
+
+def wait_done(job, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not job.done and time.monotonic() < deadline:
+        job.wait(0.1)
+    assert job.done
+
+
+@pytest.mark.parametrize("cmd, expected", [
+    ("sleep 1 &", ("sleep 1", True)),
+    ("sleep 1&", ("sleep 1", True)),
+    ("make && make install", ("make && make install", False)),
+    ("true &&", ("true &&", False)),
+    ("echo \\&", ("echo \\&", False)),
+    ("echo hi", ("echo hi", False)),
+])
+def test_split_background(cmd, expected):
+    assert split_background(cmd) == expected
+
+
+def test_unknown_commands_are_left_to_the_shell(jobs, logger):
+    assert run_builtin("ls -l", jobs, logger) is False
+    assert run_builtin("kill 1234", jobs, logger) is False
+    assert run_builtin("output file.txt", jobs, logger) is False
+    assert run_builtin("echo 'unbalanced", jobs, logger) is False
+
+
+def test_jobs_lists_running_and_empty(jobs, logger, capsys):
+    assert run_builtin("jobs", jobs, logger)
+    assert "no background jobs" in capsys.readouterr().out
+    jobs.start("sleep 5")
+    run_builtin("jobs", jobs, logger)
+    assert "[1] Running" in capsys.readouterr().out
+
+
+def test_wait_streams_output_and_forgets_the_job(jobs, logger, capsys):
+    jobs.start("echo one; sleep 0.2; echo two >&2; exit 4")
+    assert run_builtin("wait %1", jobs, logger)
+    out = capsys.readouterr().out
+    assert out.index("one") < out.index("two")
+    assert "[1] Exit 4" in out
+    assert jobs.jobs == {}
+
+
+def test_output_shows_only_unread_text(jobs, logger, capsys):
+    job = jobs.start("echo first")
+    wait_done(job)
+    run_builtin("output %1", jobs, logger)
+    assert capsys.readouterr().out == "first\n"
+    run_builtin("output %1", jobs, logger)
+    assert capsys.readouterr().out == ""
+
+
+def test_kill_reaches_the_whole_process_group(jobs, logger, tmp_path):
+    marker = tmp_path / "survived"
+    job = jobs.start(f"sleep 1 && touch {marker} | cat")
+    assert run_builtin("kill %1", jobs, logger)
+    wait_done(job)
+    assert job.returncode < 0
+    time.sleep(1.5)
+    assert not marker.exists()
+
+
+def test_unknown_job_is_reported(jobs, logger, capsys):
+    assert run_builtin("wait %7", jobs, logger)
+    assert "no such job: %7" in capsys.readouterr().out
+
+
+def test_buffer_drops_oldest_unread_output(logger, capsys):
+    table = JobTable(buffer_chars=100, logger=logger)
+    job = table.start("for i in $(seq 200); do echo line$i; sleep 0.001; done")
+    wait_done(job)
+    time.sleep(0.1)
+    dropped, chunks = job.take_output()
+    text = "".join(t for _, t in chunks)
+    assert dropped > 0
+    assert text.endswith("line200\n")
+    assert dropped + len(text) == job.total_chars
+
+
+def test_completion_notice_then_forgotten(jobs, logger):
+    job = jobs.start("echo done")
+    wait_done(job)
+    time.sleep(0.1)
+    notices = jobs.completion_notices()
+    assert len(notices) == 1 and "[1] Done" in notices[0] and "chars of output" in notices[0]
+    job.take_output()
+    assert jobs.completion_notices() == []
+    assert jobs.jobs == {}
+
+
+def test_finished_job_is_logged_as_command(jobs, logger):
+    job = jobs.start("echo logged")
+    wait_done(job)
+    time.sleep(0.1)
+    logger.close()
+    commands = [e for e in read_events(logger.events_file) if e["kind"] == "command"]
+    assert commands[-1]["cmd"] == "echo logged"
+    assert commands[-1]["job"] == 1
+    assert commands[-1]["exit"] == 0
+    assert commands[-1]["stdout_bytes"] == len("logged\n")
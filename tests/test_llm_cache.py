@@ -0,0 +1,171 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from core.llm_cache import CacheError, ResponseCache, cache_key
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def entries_on_disk(cache_dir):
+    return sorted(name[:-5] for _, _, files in os.walk(cache_dir) for name in files if name.endswith(".json"))
+
+
+class Model:
+    """Stands in for the HTTP call; counts how often it is reached."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.replies.pop(0)
+
+
+def test_cache_key_depends_on_model_messages_and_options():
+    base = cache_key("m", MESSAGES, {"temperature": 0})
+    assert base == cache_key("m", [dict(MESSAGES[0])], {"temperature": 0})
+    assert base != cache_key("other", MESSAGES, {"temperature": 0})
+    assert base != cache_key("m", [{"role": "user", "content": "hello"}], {"temperature": 0})
+    assert base != cache_key("m", MESSAGES, {"temperature": 1})
+
+
+def test_readwrite_serves_hits_from_disk_across_instances(tmp_path):
+    model = Model("first", "second")
+    cache = ResponseCache(tmp_path / "c")
+    assert cache.fetch("m", MESSAGES, None, model) == ("first", False)
+    assert cache.fetch("m", MESSAGES, None, model) == ("first", True)
+    assert model.calls == 1
+
+    reopened = ResponseCache(tmp_path / "c")
+    assert reopened.fetch("m", MESSAGES, None, model) == ("first", True)
+    assert reopened.stats()["entries"] == 1
+
+
+def test_empty_responses_are_not_stored(tmp_path):
+    model = Model("", "real")
+    cache = ResponseCache(tmp_path / "c")
+    assert cache.fetch("m", MESSAGES, None, model) == ("", False)
+    assert cache.fetch("m", MESSAGES, None, model) == ("real", False)
+    assert entries_on_disk(tmp_path / "c") == [cache_key("m", MESSAGES, None)]
+
+
+def test_off_mode_never_touches_disk(tmp_path):
+    model = Model("a", "b")
+    cache = ResponseCache(tmp_path / "c", mode="off")
+    assert cache.fetch("m", MESSAGES, None, model) == ("a", False)
+    assert cache.fetch("m", MESSAGES, None, model) == ("b", False)
+    assert not (tmp_path / "c").exists()
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = ResponseCache(tmp_path / "c", ttl_seconds=60)
+    key = cache_key("m", MESSAGES, None)
+    cache.put(key, "m", "old")
+    path = tmp_path / "c" / key[:2] / f"{key}.json"
+    entry = json.loads(path.read_text(encoding="utf-8"))
+    entry["created_at"] -= 120
+    path.write_text(json.dumps(entry), encoding="utf-8")
+    assert cache.get(key) is None
+    assert not path.exists()
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache = ResponseCache(tmp_path / "c", max_entries=3)
+    for key in ["a" * 64, "b" * 64, "c" * 64]:
+        cache.put(key, "m", key[0])
+    assert cache.get("a" * 64) == "a"      # now most recently used
+    cache.put("d" * 64, "m", "d")
+    assert entries_on_disk(tmp_path / "c") == ["a" * 64, "c" * 64, "d" * 64]
+    assert cache.stats()["entries"] == 3
+
+
+def test_eviction_by_bytes(tmp_path):
+    cache = ResponseCache(tmp_path / "c", max_bytes=1000)
+    for i in range(10):
+        cache.put(f"{i:064d}", "m", "x" * 200)
+    assert cache.stats()["bytes"] <= 1000
+    assert sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(tmp_path / "c") for f in fs) <= 1000
+    assert entries_on_disk(tmp_path / "c")[-1] == f"{9:064d}"
+
+
+def test_stores_count_entries_written_by_other_instances(tmp_path):
+    first = ResponseCache(tmp_path / "c", max_entries=10, rescan_seconds=0)
+    second = ResponseCache(tmp_path / "c", max_entries=10, rescan_seconds=0)
+    for i in range(8):
+        first.put(f"a{i:063d}", "m", "x")
+        second.put(f"b{i:063d}", "m", "x")
+    assert len(entries_on_disk(tmp_path / "c")) <= 10
+    # Entries stored by another instance are served too
+    assert first.get(f"b{7:063d}") == "x"
+
+
+def test_stores_rescan_only_when_evicting_or_stale(tmp_path, monkeypatch):
+    cache = ResponseCache(tmp_path / "c", max_entries=20, rescan_seconds=3600)
+    scans = []
+    real = cache._scan_index
+    monkeypatch.setattr(cache, "_scan_index", lambda: scans.append(1) or real())
+    for i in range(20):
+        cache.put(f"{i:064d}", "m", "x")
+    assert scans == []
+    cache.put(f"{20:064d}", "m", "x")       # over the bound: recount, then trim a tenth below it
+    assert len(scans) == 1
+    assert len(entries_on_disk(tmp_path / "c")) == 18
+    cache.put(f"{21:064d}", "m", "x")
+    assert len(scans) == 1
+
+
+def test_record_then_replay_in_order(tmp_path):
+    session = tmp_path / "session.jsonl"
+    recorder = ResponseCache(tmp_path / "c", mode="record", session_path=session)
+    model = Model("one", "two")
+    assert recorder.fetch("m", MESSAGES, None, model)[0] == "one"
+    other = [{"role": "user", "content": "again"}]
+    assert recorder.fetch("m", other, None, model)[0] == "two"
+    assert recorder.fetch("m", MESSAGES, None, model) == ("one", True)   # a hit is recorded too
+    assert len(session.read_text(encoding="utf-8").splitlines()) == 3
+
+    replay = ResponseCache(tmp_path / "unused", mode="replay", session_path=session)
+    unreachable = Model()
+    assert replay.fetch("m", MESSAGES, None, unreachable) == ("one", True)
+    assert replay.fetch("m", other, None, unreachable) == ("two", True)
+    assert replay.fetch("m", MESSAGES, None, unreachable) == ("one", True)
+    assert replay.fetch("m", MESSAGES, None, unreachable) == ("one", True)  # exhausted: last answer again
+    assert unreachable.calls == 0
+    assert not (tmp_path / "unused").exists()
+
+
+def test_replay_answers_identical_prompts_in_recorded_order(tmp_path):
+    session = tmp_path / "session.jsonl"
+    key = cache_key("m", MESSAGES, None)
+    session.write_text("".join(json.dumps({"key": key, "model": "m", "response": r}) + "\n"
+                               for r in ["first", "second"]), encoding="utf-8")
+    replay = ResponseCache(tmp_path / "c", mode="replay", session_path=session)
+    assert [replay.fetch("m", MESSAGES, None, Model())[0] for _ in range(3)] == ["first", "second", "second"]
+
+
+def test_replay_miss_raises(tmp_path):
+    session = tmp_path / "session.jsonl"
+    session.write_text("", encoding="utf-8")
+    replay = ResponseCache(tmp_path / "c", mode="replay", session_path=session)
+    with pytest.raises(CacheError):
+        replay.fetch("m", MESSAGES, None, Model("never"))
+
+
+def test_afetch_matches_fetch(tmp_path):
+    cache = ResponseCache(tmp_path / "c")
+
+    async def compute():
+        return "async"
+
+    assert asyncio.run(cache.afetch("m", MESSAGES, None, compute)) == ("async", False)
+    assert asyncio.run(cache.afetch("m", MESSAGES, None, compute)) == ("async", True)
+
+
+@pytest.mark.parametrize("mode, session", [("bogus", None), ("record", None), ("replay", None)])
+def test_bad_configuration_is_rejected(tmp_path, mode, session):
+    with pytest.raises(CacheError):
+        ResponseCache(tmp_path / "c", mode=mode, session_path=session)
@@ -0,0 +1,89 @@
+import asyncio
+
+from core.model_router import ModelRouter, Route
+
+
+def router():
+    return ModelRouter({
+        "decide": Route("medium", escalate_to="large"),
+        "keys": Route("small", escalate_to="small"),   # escalating to itself means no escalation
+        "summarize": Route("small"),
+    }, default_model="fallback")
+
+
+class Model:
+    """Replies per model name and records which models were called."""
+
+    def __init__(self, replies):
+        self.replies = replies
+        self.calls = []
+
+    def __call__(self, model):
+        self.calls.append(model)
+        return self.replies[model]
+
+
+def test_models_per_site():
+    r = router()
+    assert r.model_for("decide") == "medium"
+    assert r.model_for("unknown") == "fallback"
+    assert r.escalation_for("decide") == "large"
+    assert r.escalation_for("keys") is None
+    assert r.escalation_for("summarize") is None
+    assert r.escalation_for("unknown") is None
+
+
+def test_accepted_result_is_not_escalated():
+    r, model = router(), Model({"medium": "good", "large": "better"})
+    assert r.call("decide", model, accept=lambda x: x == "good") == "good"
+    assert model.calls == ["medium"]
+    assert r.stats()["decide"]["escalations"] == 0
+
+
+def test_rejected_result_escalates_once():
+    r, model = router(), Model({"medium": "bad", "large": "good"})
+    assert r.call("decide", model, accept=lambda x: x == "good") == "good"
+    assert model.calls == ["medium", "large"]
+    stats = r.stats()["decide"]
+    assert (stats["calls"], stats["escalations"], stats["rejected"]) == (2, 1, 1)
+    assert set(stats["models"]) == {"medium", "large"}
+
+
+def test_rejected_escalation_falls_back_to_the_first_result():
+    r, model = router(), Model({"medium": "bad", "large": "worse"})
+    assert r.call("decide", model, accept=lambda x: False) == "bad"
+    assert model.calls == ["medium", "large"]
+    assert r.stats()["decide"]["rejected"] == 2
+
+
+def test_no_escalation_target_returns_the_rejected_result():
+    r, model = router(), Model({"small": "chatty"})
+    assert r.call("keys", model, accept=lambda x: False) == "chatty"
+    assert r.call("summarize", model, accept=lambda x: False) == "chatty"
+    assert model.calls == ["small", "small"]
+    assert r.stats()["keys"]["escalations"] == 0
+
+
+def test_without_accept_everything_is_accepted():
+    r, model = router(), Model({"fallback": "anything"})
+    assert r.call("unknown", model) == "anything"
+    assert model.calls == ["fallback"]
+
+
+def test_acall_escalates_like_call():
+    r, model = router(), Model({"medium": "bad", "large": "good"})
+
+    async def fn(m):
+        return model(m)
+    assert asyncio.run(r.acall("decide", fn, accept=lambda x: x == "good")) == "good"
+    assert model.calls == ["medium", "large"]
+    assert r.stats()["decide"]["escalations"] == 1
+
+
+def test_summary_lists_each_model_per_route():
+    r = router()
+    assert r.summary() == "No routed calls."
+    r.call("decide", Model({"medium": "bad", "large": "good"}), accept=lambda x: x == "good")
+    lines = r.summary().splitlines()
+    assert lines[0].split() == ["ROUTE", "MODEL", "CALLS", "MEAN", "s", "ESCALATED", "REJECTED"]
+    assert [line.split()[:3] for line in lines[2:]] == [["decide", "medium", "1"], ["decide", "large", "1"]]
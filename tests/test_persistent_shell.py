@@ -0,0 +1,93 @@
+import os
+
+import pytest
+
+from core.html_terminal import PersistentShell, _partial_suffix, _parse_times, read_events
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="PersistentShell needs a POSIX shell")
+
+
+@pytest.fixture
+def shell(tmp_path):
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    sh = PersistentShell()
+    yield sh
+    sh.close()
+    os.chdir(cwd)
+
+
+def run(shell, logger, capsys, cmd):
+    rc = shell.run(cmd, logger)
+    return rc, capsys.readouterr().out
+
+
+def test_state_persists_between_commands(shell, logger, capsys, tmp_path):
+    (tmp_path / "sub").mkdir()
+    assert run(shell, logger, capsys, "cd sub && export HT_VAR=42")[0] == 0
+    rc, out = run(shell, logger, capsys, 'echo "$HT_VAR $PWD"')
+    assert rc == 0
+    assert out == f"42 {tmp_path / 'sub'}\n"
+    assert shell.cwd == str(tmp_path / "sub")
+
+
+def test_exit_code_and_both_streams(shell, logger, capsys):
+    rc, out = run(shell, logger, capsys, "echo out; echo err >&2; false")
+    assert rc == 1
+    assert "out\n" in out and "err\n" in out
+    assert "__HTML_TERM_" not in out
+
+
+def test_output_without_trailing_newline(shell, logger, capsys):
+    rc, out = run(shell, logger, capsys, "printf abc")
+    assert rc == 0
+    assert out == "abc\n"  # the echo ends the line; the frame is not shown
+
+
+def test_text_resembling_the_sentinel_is_passed_through(shell, logger, capsys):
+    rc, out = run(shell, logger, capsys, "printf '__HTML_TERM_deadbeef\\n__HTML_TERM_'")
+    assert rc == 0
+    assert out == "__HTML_TERM_deadbeef\n__HTML_TERM_\n"
+
+
+def test_syntax_error_does_not_break_framing(shell, logger, capsys):
+    rc, _ = run(shell, logger, capsys, "if then fi (")
+    assert rc != 0
+    assert run(shell, logger, capsys, "echo still-here") == (0, "still-here\n")
+
+
+def test_command_cannot_read_the_framing_from_stdin(shell, logger, capsys):
+    rc, out = run(shell, logger, capsys, "cat; echo after")
+    assert (rc, out) == (0, "after\n")
+
+
+def test_shell_exit_restarts_in_last_directory(shell, logger, capsys, tmp_path):
+    (tmp_path / "keep").mkdir()
+    run(shell, logger, capsys, "cd keep")
+    rc, out = run(shell, logger, capsys, "exit 3")
+    assert rc == 3
+    assert "restarted" in out
+    assert run(shell, logger, capsys, "pwd") == (0, f"{tmp_path / 'keep'}\n")
+
+
+def test_commands_are_logged_with_cwd_and_cpu(shell, logger, capsys, tmp_path):
+    run(shell, logger, capsys, "true")
+    logger.close()
+    commands = [e for e in read_events(logger.events_file) if e["kind"] == "command"]
+    assert commands[-1]["cmd"] == "true"
+    assert commands[-1]["exit"] == 0
+    assert commands[-1]["cwd"] == str(tmp_path)
+    assert commands[-1]["user_s"] >= 0 and commands[-1]["sys_s"] >= 0
+
+
+def test_partial_suffix():
+    assert _partial_suffix("abc__HT", "__HTML__") == 4
+    assert _partial_suffix("abc", "__HTML__") == 0
+    # At most one character short of the marker; a complete one is found by the caller
+    assert _partial_suffix("out__HTML_", "__HTML__") == 7
+
+
+def test_parse_times():
+    assert _parse_times("0m1.500s") == 1.5
+    assert _parse_times("2m0,25s") == 120.25
+    assert _parse_times("garbage") is None
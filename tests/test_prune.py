@@ -0,0 +1,116 @@
+import random
+import re
+
+import pytest
+
+from core.improvements_manager import (
+    DEFAULT_IGNORED_DIRS, SCAN_EXCLUDED_DIRS, AhoCorasick, CodebaseUtils, create_item_dict, stale_scan_items,
+)
+
+
+def stale_by_grep(root, candidates):
+    """The pre-single-pass prune: one literal grep over the codebase per item."""
+    codebase = CodebaseUtils(root, DEFAULT_IGNORED_DIRS | SCAN_EXCLUDED_DIRS)
+    return [item for item in candidates
+            if item["title"].startswith("TODO: ") and not codebase.grep(re.escape(item["title"][6:].strip()))]
+
+
+def item(title, source_file=None):
+    d = create_item_dict(title, "suggestion", "scan")
+    if source_file:
+        d["source_file"] = source_file
+    return d
+
+
+def ids(items):
+    return sorted(i["id"] for i in items)
+
+
+def write(root, rel, text):
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def test_matches_per_item_grep_on_edge_cases(tmp_path):
+    write(tmp_path, "a.py", "# TODO: in its own file\nx = 1  # TODO: moved here later\n")
+    write(tmp_path, "b.py", "# TODO: handle a.b (x|y) [z]* + $1\n# TODO: naïve ünïcode\n")
+    write(tmp_path, "c.py", "call()  # TODO: part of a longer line, with a tail\n")
+    write(tmp_path, "d.py", "plain text that mentions fix the widget\n")
+    write(tmp_path, "scripts/s.py", "# TODO: only in scripts\n")
+    write(tmp_path, "node_modules/m.py", "# TODO: only in node_modules\n")
+    write(tmp_path, "notes.txt", "# TODO: only in a text file\n")
+    (tmp_path / "bin.py").write_bytes(b"\x00\x01# TODO: only in a binary file\n")
+    write(tmp_path, ".gitignore", "ignored.py\n")
+    write(tmp_path, "ignored.py", "# TODO: only in a gitignored file\n")
+
+    candidates = [
+        item("TODO: # TODO: in its own file", "a.py"),
+        item("TODO: x = 1  # TODO: moved here later", "gone.py"),
+        item("TODO: # TODO: handle a.b (x|y) [z]* + $1", "b.py"),
+        item("TODO: # TODO: naïve ünïcode", "b.py"),
+        item("TODO: # TODO: part of a longer line", "c.py"),
+        item("TODO: fix the widget"),                      # hand-edited, no TODO in the text
+        item("TODO: fix the gadget"),
+        item("TODO: # TODO: only in scripts", "scripts/s.py"),
+        item("TODO: # TODO: only in node_modules"),
+        item("TODO: # TODO: only in a text file"),
+        item("TODO: # TODO: only in a binary file", "bin.py"),
+        item("TODO: # TODO: only in a gitignored file", "ignored.py"),
+        item("TODO: # TODO: deleted"),
+        item("TODO: # TODO: deleted"),                     # duplicate title
+        item("Manual title without the prefix"),
+    ]
+    expected = stale_by_grep(tmp_path, candidates)
+    assert ids(stale_scan_items(tmp_path, candidates)) == ids(expected)
+    assert sorted({i["title"] for i in expected}) == [
+        "TODO: # TODO: deleted",
+        "TODO: # TODO: only in a binary file",
+        "TODO: # TODO: only in a gitignored file",
+        "TODO: # TODO: only in a text file",
+        "TODO: # TODO: only in node_modules",
+        "TODO: # TODO: only in scripts",
+        "TODO: fix the gadget",
+    ]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_per_item_grep_on_random_trees(tmp_path, seed):
+    rng = random.Random(seed)
+    words = ["alpha", "beta", "gamma", "x.y", "(z)", "TODO", "TODO:", "fix", "a+b", "ü"]
+
+    def phrase(n):
+        return " ".join(rng.choice(words) for _ in range(n))
+
+    lines_by_file = {}
+    for f in range(12):
+        rel = rng.choice(["", "pkg/", "scripts/"]) + f"f{f}.py"
+        lines_by_file[rel] = [f"# TODO: {phrase(rng.randint(1, 4))}" if rng.random() < 0.6 else phrase(3)
+                              for _ in range(rng.randint(1, 8))]
+        write(tmp_path, rel, "\n".join(lines_by_file[rel]) + "\n")
+
+    all_lines = [(rel, line) for rel, lines in lines_by_file.items() for line in lines]
+    candidates = []
+    for _ in range(60):
+        kind = rng.random()
+        rel, line = rng.choice(all_lines)
+        if kind < 0.4:
+            text = line.strip()                              # still present (maybe in scripts/)
+        elif kind < 0.6:
+            text = line.strip()[: rng.randint(1, len(line.strip()))]  # a prefix of a line
+        elif kind < 0.8:
+            text = f"# TODO: {phrase(rng.randint(1, 4))}"   # probably absent
+        else:
+            text = phrase(rng.randint(1, 3))                 # hand-edited style
+        candidates.append(item(f"TODO: {text}", rng.choice([rel, None, "elsewhere.py"])))
+
+    assert ids(stale_scan_items(tmp_path, candidates)) == ids(stale_by_grep(tmp_path, candidates))
+
+
+def test_aho_corasick_reports_every_occurring_pattern():
+    patterns = ["he", "she", "his", "hers", "x.y", "ü"]
+    matcher = AhoCorasick(patterns)
+    for text in ["ushers", "this", "x.y and ü", "nothing", "", "hehe"]:
+        found = set()
+        matcher.occurring(text, found)
+        assert {patterns[i] for i in found} == {p for p in patterns if p in text}, text
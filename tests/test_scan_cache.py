@@ -0,0 +1,120 @@
+import json
+import os
+import time
+
+import pytest
+
+import core.improvements_manager as im
+from core.improvements_manager import SCAN_CACHE_FILE, ScanCache, scan_todos
+
+OLD_NS = 1_000_000_000_000_000_000  # 2001: well outside the racy-mtime window
+
+
+def hits(root, **kwargs):
+    return sorted((os.path.relpath(h["file"], root), h["line"], h["column"], h["content"])
+                  for h in scan_todos(root, **kwargs))
+
+
+def write(path, text, mtime_ns=OLD_NS):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def tree(tmp_path):
+    write(tmp_path / "a.py", "x = 1\n# TODO: alpha\n")
+    write(tmp_path / "pkg" / "b.py", "    y = 2  # TODO beta\n")
+    write(tmp_path / "notes.txt", "TODO: not python\n")
+    write(tmp_path / "node_modules" / "c.py", "# TODO: ignored dir\n")
+    return tmp_path
+
+
+@pytest.fixture
+def scanned_files(monkeypatch):
+    """Relative paths that the scan actually read in this test."""
+    seen = []
+    real = im._scan_file
+
+    def spy(path, pattern, known_sha1=None):
+        seen.append(os.path.basename(path))
+        return real(path, pattern, known_sha1)
+    monkeypatch.setattr(im, "_scan_file", spy)
+    return seen
+
+
+def test_cached_scan_matches_full_scan(tree):
+    full = hits(tree, use_cache=False)
+    # Columns are 1-based and count the leading whitespace that content drops
+    assert full == [("a.py", 2, 3, "# TODO: alpha"), (os.path.join("pkg", "b.py"), 1, 14, "y = 2  # TODO beta")]
+    assert hits(tree) == full
+    assert hits(tree) == full
+    assert (tree / SCAN_CACHE_FILE).exists()
+
+
+def test_unchanged_files_are_not_read_again(tree, scanned_files):
+    hits(tree)
+    assert sorted(scanned_files) == ["a.py", "b.py"]
+    scanned_files.clear()
+    hits(tree)
+    assert scanned_files == []
+
+
+def test_changed_file_is_rescanned(tree, scanned_files):
+    hits(tree)
+    scanned_files.clear()
+    write(tree / "a.py", "# TODO: alpha changed\n", mtime_ns=OLD_NS + 10**9)
+    assert ("a.py", 1, 3, "# TODO: alpha changed") in hits(tree)
+    assert scanned_files == ["a.py"]
+
+
+def test_same_size_same_mtime_edit_inside_racy_window(tmp_path):
+    now = time.time_ns()
+    write(tmp_path / "a.py", "# TODO: aaaa\n", mtime_ns=now)
+    assert hits(tmp_path)[0][3] == "# TODO: aaaa"
+    # Same length and mtime, as a second edit within one timestamp tick would leave it
+    write(tmp_path / "a.py", "# TODO: bbbb\n", mtime_ns=now)
+    assert hits(tmp_path)[0][3] == "# TODO: bbbb"
+
+
+def test_touched_but_identical_file_keeps_its_hits(tree):
+    before = hits(tree)
+    os.utime(tree / "a.py", ns=(OLD_NS + 5 * 10**9, OLD_NS + 5 * 10**9))
+    assert hits(tree) == before
+    entry = ScanCache(tree).files["a.py"]
+    assert entry["mtime_ns"] == OLD_NS + 5 * 10**9
+
+
+def test_deleted_and_new_files(tree):
+    hits(tree)
+    (tree / "a.py").unlink()
+    write(tree / "new.py", "# TODO: gamma\n")
+    assert [h[0] for h in hits(tree)] == ["new.py", os.path.join("pkg", "b.py")]
+    assert set(ScanCache(tree).files) == {os.path.join("pkg", "b.py"), "new.py"}
+
+
+def test_cache_from_another_version_or_pattern_is_ignored(tree):
+    hits(tree)
+    path = tree / SCAN_CACHE_FILE
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["version"] = ScanCache.VERSION - 1
+    path.write_text(json.dumps(data), encoding="utf-8")
+    assert ScanCache(tree).files == {}
+    assert ScanCache(tree, pattern="FIXME").files == {}
+
+
+def test_corrupt_cache_is_rebuilt(tree):
+    full = hits(tree, use_cache=False)
+    (tree / SCAN_CACHE_FILE).parent.mkdir(parents=True, exist_ok=True)
+    (tree / SCAN_CACHE_FILE).write_text("{not json", encoding="utf-8")
+    assert hits(tree) == full
+    assert ScanCache(tree).files
+
+
+def test_parallel_scan_matches_serial(tmp_path):
+    for n in range(im.SCAN_PARALLEL_MIN_FILES + 6):
+        write(tmp_path / f"m{n:03d}.py", f"v = {n}\n# TODO: item {n}\n" + "pass\n" * (n % 7))
+    serial = hits(tmp_path, workers=1, use_cache=False)
+    assert len(serial) == im.SCAN_PARALLEL_MIN_FILES + 6
+    assert hits(tmp_path, workers=2, use_cache=False) == serial
+    assert hits(tmp_path, workers=2) == serial
@@ -0,0 +1,57 @@
+import itertools
+
+import pytest
+
+from core.structured_output import parse_json_response, parse_stats
+
+_kinds = itertools.count()
+
+
+def parse(text):
+    """Parse under a fresh kind; returns (value, outcome)."""
+    kind = f"test{next(_kinds)}"
+    value = parse_json_response(text, kind)
+    (outcome,) = [name for name, n in parse_stats()[kind].items() if n]
+    return value, outcome
+
+
+@pytest.mark.parametrize("text", [
+    '{"action": "cli_interaction", "confidence": "high"}',
+    '  {"a": [1, 2, {"b": null}]}\n',
+    'Here you go:\n```json\n{"a": 1}\n```\nDone.',
+    'Sure! {"a": "text with } and { inside"} trailing prose',
+])
+def test_well_formed_objects_are_ok(text):
+    value, outcome = parse(text)
+    assert isinstance(value, dict)
+    assert outcome == "ok"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 1, "b": [1, 2,],}', {"a": 1, "b": [1, 2]}),
+    ('{"done": True, "answer": None, "flag": False}', {"done": True, "answer": None, "flag": False}),
+    ('{"text": "True stays a string", "v": True}', {"text": "True stays a string", "v": True}),
+    ("{'a': 'single', 'b': [1, 2]}", {"a": "single", "b": [1, 2]}),
+    ('{"code": "line one\nline two"}', {"code": "line one\nline two"}),
+])
+def test_damaged_objects_are_repaired(text, expected):
+    assert parse(text) == (expected, "repaired")
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"analysis": "cut off mid-sent', {"analysis": "cut off mid-sent"}),
+    ('{"a": {"b": [1, 2', {"a": {"b": [1, 2]}}),
+    ('{"a": 1, "b": ', {"a": 1}),
+    ('{"a": 1, "partial_ke', {"a": 1}),
+    ('{"a": {"k": ', {"a": {}}),
+    ('{"a": "foo, "', {"a": "foo, "}),
+    ('{"a": "ends on an escape \\', {"a": "ends on an escape "}),
+    ('```json\n{"thought": "x", "is_complete": false,', {"thought": "x", "is_complete": False}),
+])
+def test_truncated_replies_are_closed(text, expected):
+    assert parse(text) == (expected, "repaired")
+
+
+@pytest.mark.parametrize("text", ["", "no json here", "[1, 2, 3]", '{"a": ]'])
+def test_unparseable_replies_fail(text):
+    assert parse(text) == (None, "failed")
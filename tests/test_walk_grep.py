@@ -0,0 +1,140 @@
+import re
+
+import pytest
+
+from core.improvements_manager import CodebaseUtils, GitIgnore, MultiMatcher, walk_files
+
+
+def grep_by_lines(text, patterns):
+    """The pre-single-pass grep: every pattern against every splitlines() line."""
+    results = []
+    for lineno, line in enumerate(text.splitlines(), 1):
+        for index, pattern in enumerate(patterns):
+            hit = re.search(pattern, line)
+            if hit:
+                results.append((lineno, hit.start() + 1, index, line))
+    return results
+
+
+def write(root, rel, text):
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+TEXTS = [
+    "a.b\naéb\nab\n",
+    "x = 1  # TODO.fix\ny = 2  # TODO€fix\n# TODO: plain\n",
+    "foo\r\nbar foo\r\nfoo bar\r\n",
+    "old\rmac\rfoo\r",
+    "form\x0cfeed foo\vtab foo sep foo\x85nel\n",
+    "bb\nbob\nooh\nxyx\n",
+    "trailing newline\n\n\n",
+    "no trailing newline foo",
+    "",
+    "über straße\nÜBER\n",
+]
+
+PATTERNS = [
+    ["a.b"],
+    ["TODO.fix", "TODO[:\\s]?.+"],
+    ["foo$", "^foo"],
+    ["[^a]oo", "\\w+ foo"],
+    ["(b)\\1", "(o)\\1"],
+    ["(?P<w>o)", "(?P<w>b)"],
+    ["foo(?!\\s)", "(?<=r) foo"],
+    ["\\Afoo", "foo\\Z"],
+    ["(?i)über", "STRASSE|straße"],
+    ["^$", "x"],
+]
+
+
+@pytest.mark.parametrize("patterns", PATTERNS, ids=lambda p: "|".join(p))
+@pytest.mark.parametrize("text", TEXTS, ids=range(len(TEXTS)))
+def test_multimatcher_matches_line_by_line_grep(patterns, text):
+    matcher = MultiMatcher(patterns)
+    assert list(matcher.match_text(text)) == grep_by_lines(text, patterns)
+    assert list(matcher.match_buffer(text.encode("utf-8"))) == grep_by_lines(text, patterns)
+
+
+def test_multimatcher_drops_undecodable_bytes_like_read_text():
+    data = b"caf\xff\xfee au lait\nplain\n"
+    text = data.decode("utf-8", errors="ignore")
+    assert list(MultiMatcher(["cafe", "a.l"]).match_buffer(data)) == grep_by_lines(text, ["cafe", "a.l"])
+
+
+def test_match_file_skips_binary_and_empty_files(tmp_path):
+    (tmp_path / "bin.py").write_bytes(b"\x00foo\n")
+    (tmp_path / "empty.py").write_bytes(b"")
+    write(tmp_path, "text.py", "foo\n")
+    matcher = MultiMatcher(["foo"])
+    assert list(matcher.match_file(tmp_path / "bin.py")) == []
+    assert list(matcher.match_file(tmp_path / "empty.py")) == []
+    assert list(matcher.match_file(tmp_path / "missing.py")) == []
+    assert list(matcher.match_file(tmp_path / "text.py")) == [(1, 1, 0, "foo")]
+
+
+def test_gitignore_rules():
+    gi = GitIgnore([
+        "# comment",
+        "*.log",
+        "!keep.log",
+        "build/",
+        "/top.txt",
+        "docs/*.tmp",
+        "**/cache",
+        "a/**/z",
+        "\\#literal",
+        "file[0-9].py",
+    ])
+    assert gi.match("x.log", False) is True
+    assert gi.match("sub/x.log", False) is True
+    assert gi.match("keep.log", False) is False
+    assert gi.match("build", True) is True
+    assert gi.match("build", False) is None        # directories only
+    assert gi.match("top.txt", False) is True
+    assert gi.match("sub/top.txt", False) is None  # anchored to this directory
+    assert gi.match("docs/a.tmp", False) is True
+    assert gi.match("docs/sub/a.tmp", False) is None
+    assert gi.match("cache", True) is True
+    assert gi.match("deep/er/cache", True) is True
+    assert gi.match("a/z", False) is True
+    assert gi.match("a/b/c/z", False) is True
+    assert gi.match("#literal", False) is True
+    assert gi.match("file7.py", False) is True
+    assert gi.match("fileX.py", False) is None
+    assert gi.match("main.py", False) is None
+
+
+def test_walk_files_prunes_ignored_paths(tmp_path):
+    for rel in ["main.py", "pkg/mod.py", "pkg/debug.log", "pkg/keep.log", "pkg/sub/deep.py",
+                "build/out.py", "node_modules/m.js", ".git/config", "env/lib.py", "notes/local.md",
+                "notes/shared.md"]:
+        write(tmp_path, rel, "x\n")
+    write(tmp_path, "env/pyvenv.cfg", "home = /usr\n")
+    write(tmp_path, ".gitignore", "build/\n*.log\n")
+    write(tmp_path, "pkg/.gitignore", "!keep.log\nsub/\n")
+    write(tmp_path, "notes/.gitignore", "local.md\n")
+
+    rels = [rel for _, rel in walk_files(tmp_path)]
+    assert rels == [
+        ".gitignore", "main.py", "notes/.gitignore", "notes/shared.md",
+        "pkg/.gitignore", "pkg/keep.log", "pkg/mod.py",
+    ]
+    unfiltered = [rel for _, rel in walk_files(tmp_path, use_gitignore=False)]
+    assert "build/out.py" in unfiltered and "pkg/sub/deep.py" in unfiltered
+    assert "env/lib.py" not in unfiltered and "node_modules/m.js" not in unfiltered
+
+
+def test_grep_matches_line_by_line_grep_over_a_tree(tmp_path):
+    files = {"a.py": TEXTS[0], "b.py": TEXTS[1], "c.py": TEXTS[2], "d/e.py": TEXTS[4], "f.txt": TEXTS[1]}
+    for rel, text in files.items():
+        write(tmp_path, rel, text)
+    codebase = CodebaseUtils(tmp_path)
+    for pattern in ["a.b", "TODO.fix", "foo$", "(o)\\1"]:
+        expected = [
+            {"file": str(tmp_path / rel), "line": lineno, "column": column, "content": line.strip()}
+            for rel in sorted(r for r in files if r.endswith(".py"))
+            for lineno, column, _, line in grep_by_lines(files[rel], [pattern])
+        ]
+        assert codebase.grep(pattern) == expected, pattern